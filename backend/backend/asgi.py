@@ -14,3 +14,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Per-worker listener for cross-worker cache evictions (to_do_list.caching)
+from to_do_list.caching import listener  # noqa: E402
+# Per-worker expired token pruning (to_do_list.retention)
+from to_do_list.retention import pruner  # noqa: E402
+
+listener.start()
+pruner.start()
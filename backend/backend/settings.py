@@ -30,6 +30,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework_simplejwt.token_blacklist',
     
     'rest_framework',
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'to_do_list.middleware.replica_routing_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -78,9 +80,65 @@ DATABASES = {
         'PASSWORD': os.getenv("POSTGRES_PASSWORD"),
         'HOST': os.getenv("POSTGRES_HOST"),
         'PORT': os.getenv("POSTGRES_PORT"),
+        # Reuse each worker's connection for this many seconds, checking it
+        # is still alive before the first query of a request
+        'CONN_MAX_AGE': int(os.getenv('POSTGRES_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Per-process connection pool (psycopg_pool), for ASGI deployments where
+# requests do not stay on one thread; it replaces persistent connections and
+# CONN_HEALTH_CHECKS makes it check connections on checkout
+POSTGRES_POOL = os.getenv('POSTGRES_POOL', 'False') == 'True'
+if POSTGRES_POOL:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('POSTGRES_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('POSTGRES_POOL_MAX_SIZE', 10)),
+            # Seconds a request waits for a free connection before failing
+            'timeout': float(os.getenv('POSTGRES_POOL_TIMEOUT', 10)),
+            'max_idle': float(os.getenv('POSTGRES_POOL_MAX_IDLE', 600)),
+            'max_lifetime': float(os.getenv('POSTGRES_POOL_MAX_LIFETIME', 3600)),
+        },
+    }
+
+# Read replicas: comma-separated host[:port] list, served as aliases
+# replica_1, replica_2, ... with the primary's credentials. Safe requests read
+# from one of them (see to_do_list.routers); tests use the primary instead.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.getenv('POSTGRES_REPLICA_HOSTS', '').split(',')), start=1):
+    host, _, port = replica.strip().partition(':')
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+# Task sharding: comma-separated host[:port] list of extra databases, served as
+# aliases shard_1, shard_2, ... (database POSTGRES_SHARD_DB, default POSTGRES_DB).
+# Each user's tasks live on one of TASK_SHARDS (see to_do_list.sharding).
+TASK_SHARDS = ['default']
+for index, shard in enumerate(filter(None, os.getenv('POSTGRES_SHARD_HOSTS', '').split(',')), start=1):
+    host, _, port = shard.strip().partition(':')
+    alias = f'shard_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('POSTGRES_SHARD_DB') or DATABASES['default']['NAME'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+    }
+    TASK_SHARDS.append(alias)
+
+DATABASE_ROUTERS = ['to_do_list.routers.ReplicaRouter']
+# Seconds a client that wrote keeps reading from the primary (read-your-writes)
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DATABASE_REPLICA_PIN_SECONDS', 5))
+REPLICA_PIN_COOKIE = 'read_primary'
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Bearer': {
@@ -139,7 +197,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'to_do_list.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication', 
     ),
     'DEFAULT_PERMISSION_CLASSES': [
@@ -147,6 +205,83 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache
+# Bounded per-process memory cache by default; point CACHE_BACKEND/CACHE_LOCATION
+# at a shared backend (e.g. Redis) to share entries between gunicorn workers.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'to-do-list'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+    }
+}
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 5000))}
+
+# Two-tier caches (per-worker LRU in front of CACHES['default']); evictions are
+# broadcast to the other workers over PostgreSQL LISTEN/NOTIFY
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv('LOCAL_CACHE_MAX_ENTRIES', 1000))
+LOCAL_CACHE_TTL = int(os.getenv('LOCAL_CACHE_TTL', 30))
+CACHE_INVALIDATION_CHANNEL = os.getenv('CACHE_INVALIDATION_CHANNEL', 'to_do_list_cache')
+
+# Seconds a list/my_tasks/search response stays cached (0 disables)
+TASK_RESPONSE_CACHE_TIMEOUT = int(os.getenv('TASK_RESPONSE_CACHE_TIMEOUT', 60))
+
+# Task pagination totals: 'exact', 'capped' (count at most TASK_COUNT_CAP rows)
+# or 'estimated' (planner row estimate for unfiltered lists, capped otherwise)
+TASK_COUNT_STRATEGY = os.getenv('TASK_COUNT_STRATEGY', 'exact')
+TASK_COUNT_CAP = int(os.getenv('TASK_COUNT_CAP', 1000))
+TASK_COUNT_CACHE_TIMEOUT = int(os.getenv('TASK_COUNT_CACHE_TIMEOUT', 300))
+
+# Task search: 'fulltext' (PostgreSQL tsvector + GIN), 'trigram' (pg_trgm
+# substring + typo-tolerant matching) or 'icontains'.
+# Non-PostgreSQL databases always use 'icontains'.
+TASK_SEARCH_BACKEND = os.getenv('TASK_SEARCH_BACKEND', 'fulltext')
+# Minimum pg_trgm word similarity (0-1) for a typo-tolerant match
+TASK_TRIGRAM_THRESHOLD = float(os.getenv('TASK_TRIGRAM_THRESHOLD', 0.4))
+
+# Task sync leaves changes younger than this many seconds for the next sync,
+# so that transactions still in flight cannot be skipped by the watermark
+TASK_SYNC_SETTLE_SECONDS = float(os.getenv('TASK_SYNC_SETTLE_SECONDS', 1))
+
+# Most tasks one bulk create/status/delete request may carry
+TASK_BULK_MAX_ITEMS = int(os.getenv('TASK_BULK_MAX_ITEMS', 500))
+
+# Rows fetched per server-side cursor round trip, and encoded per streamed
+# chunk, by task exports
+TASK_EXPORT_CHUNK_SIZE = int(os.getenv('TASK_EXPORT_CHUNK_SIZE', 2000))
+
+# Upload rows validated and written per transaction by task imports
+TASK_IMPORT_BATCH_SIZE = int(os.getenv('TASK_IMPORT_BATCH_SIZE', 1000))
+
+# Most sub-requests one /api/batch/ request may carry
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 20))
+
+# Serve the task/user read paths with async views (to_do_list.async_views);
+# enable for ASGI deployments (backend.asgi) only
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+
+# Task change feed (server-sent events, served by backend.asgi)
+TASK_EVENTS_CHANNEL = os.getenv('TASK_EVENTS_CHANNEL', 'to_do_list_task_events')
+# Seconds between heartbeat comments on an idle stream
+TASK_EVENTS_HEARTBEAT = float(os.getenv('TASK_EVENTS_HEARTBEAT', 15))
+# Events buffered per stream before it falls back to replaying from the database
+TASK_EVENTS_MAX_PENDING = int(os.getenv('TASK_EVENTS_MAX_PENDING', 100))
+# Changes loaded per query while replaying
+TASK_EVENTS_REPLAY_BATCH = int(os.getenv('TASK_EVENTS_REPLAY_BATCH', 100))
+
+# Per-worker Bloom filter of blacklisted refresh token JTIs (to_do_list.blacklist):
+# the number of unexpired blacklisted tokens it is sized for, and the target
+# false-positive rate at that size
+TOKEN_BLACKLIST_FILTER_CAPACITY = int(os.getenv('TOKEN_BLACKLIST_FILTER_CAPACITY', 100000))
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = float(os.getenv('TOKEN_BLACKLIST_FILTER_ERROR_RATE', 0.001))
+
+# Expired refresh token pruning (to_do_list.retention): tokens deleted per
+# transaction, and seconds between runs on each worker's background thread
+# (0 disables it; run `manage.py prune_tokens` from cron instead)
+TOKEN_PRUNE_BATCH_SIZE = int(os.getenv('TOKEN_PRUNE_BATCH_SIZE', 1000))
+TOKEN_PRUNE_INTERVAL = int(os.getenv('TOKEN_PRUNE_INTERVAL', 3600))
+
 # JWT Settings
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
@@ -9,7 +9,9 @@ done
 
 >&2 echo "Postgres is up - executing commands"
 
-python manage.py migrate
+if [ "$RUN_MIGRATIONS" != "false" ]; then
+    python manage.py migrate
+fi
 
 if [ "$DJANGO_ENVIRONMENT" = "development" ]; then
     echo "Creating superuser..."
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ToDoListConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'to_do_list'
+
+    def ready(self):
+        from . import pooling, signals  # noqa: F401
@@ -0,0 +1,189 @@
+from functools import update_wrapper
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.decorators import classonlymethod
+from rest_framework import exceptions, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .caching import aget_task_version, cache_task_response, task_payload_cache, user_payload_cache
+from .conditional import conditional_list_response, make_etag, precondition_response, set_validators, task_validators
+from .models import ClaimsUser
+from .sharding import is_sharded
+from .views import TaskViewSet, UserViewSet
+
+# Async viewsets
+# ==============================
+# Served instead of TaskViewSet/UserViewSet when settings.ASYNC_VIEWS is on
+# (ASGI deployments). The read paths run on the event loop with the async ORM,
+# so a slow query parks a coroutine instead of a whole worker; every other
+# action runs the inherited sync handler in a worker thread.
+
+
+class AsyncViewSetMixin:
+    """
+    Dispatches a DRF viewset as a coroutine. `async def` handlers are awaited,
+    sync handlers run through `sync_to_async`, and authenticators providing
+    `aauthenticate()` are awaited as well.
+    """
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        # Carries over csrf_exempt and the router's cls/actions/initkwargs
+        return update_wrapper(async_view, view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """`initial()` with authentication awaited."""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request)
+        request.version, request.versioning_scheme = self.determine_version(request, *args, **kwargs)
+
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    async def aperform_authentication(self, request):
+        for authenticator in request.authenticators:
+            aauthenticate = getattr(authenticator, 'aauthenticate', None)
+            try:
+                if aauthenticate is not None:
+                    user_auth_tuple = await aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+        request._not_authenticated()
+
+    async def aget_object(self):
+        """`get_object()` through the async ORM."""
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class AsyncTaskViewSet(AsyncViewSetMixin, TaskViewSet):
+    """TaskViewSet with async list, my_tasks, search and retrieve."""
+
+    async def ainitial(self, request, *args, **kwargs):
+        await super().ainitial(request, *args, **kwargs)
+        if is_sharded():
+            await sync_to_async(self.route_to_user_shard)()
+
+    async def aget_object(self):
+        if is_sharded():
+            await sync_to_async(self.route_to_task_shard)(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        return await super().aget_object()
+
+    async def aget_list_etag(self):
+        """`get_list_etag()` through the async ORM."""
+        if self.paginator.cursor_query_param in self.request.query_params:
+            return None
+        return make_etag(self.request.build_absolute_uri(), await aget_task_version(self.get_response_cache_scope()))
+
+    async def _aget_paginated_response(self, queryset):
+        page = await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return self._get_unpaginated_response(await queryset.acount())
+
+    @cache_task_response
+    @conditional_list_response
+    async def list(self, request, *args, **kwargs):
+        queryset = await sync_to_async(self.get_list_queryset)()
+        return await self._aget_paginated_response(queryset)
+
+    @action(detail=False, methods=['get'])
+    @cache_task_response
+    @conditional_list_response
+    async def my_tasks(self, request):
+        queryset = await sync_to_async(self.get_list_queryset)()
+        return await self._aget_paginated_response(queryset)
+
+    @action(detail=False, methods=['get'])
+    @cache_task_response
+    async def search(self, request):
+        search_term = request.query_params.get('q')
+        if not search_term:
+            return Response(
+                {"detail": "Search term 'q' is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = await sync_to_async(self.get_search_queryset)(search_term)
+        return await self._aget_paginated_response(queryset)
+
+    async def retrieve(self, request, *args, **kwargs):
+        data = await task_payload_cache.aget(kwargs['pk'])
+        if data is not None:
+            return self._get_task_response(request, data)
+
+        task = await self.aget_object()
+        validators = task_validators(task.id, task.updated_at, task.user.username)
+        not_modified = precondition_response(request, *validators)
+        if not_modified:
+            return not_modified
+        data = dict(self.get_serializer(task).data)
+        if task._state.db not in settings.DATABASE_REPLICAS:
+            await task_payload_cache.aset(task.id, data)
+        return set_validators(Response(data), *validators)
+
+
+class AsyncUserViewSet(AsyncViewSetMixin, UserViewSet):
+    """UserViewSet with an async GET /users/me/."""
+
+    @action(detail=False, methods=['get', 'put'], permission_classes=[IsAuthenticated])
+    async def me(self, request):
+        if request.method != 'GET':
+            return await sync_to_async(super().me)(request)
+
+        async def load():
+            if isinstance(request.user, ClaimsUser):
+                await request.user.aload_fields()
+            return dict(self.get_serializer(request.user).data)
+
+        data = await user_payload_cache.aget_or_set(request.user.id, load)
+        return self._get_me_response(request, data)
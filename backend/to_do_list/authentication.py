@@ -0,0 +1,192 @@
+import copy
+
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .blacklist import revoked_tokens
+from .caching import user_auth_cache, user_cache
+from .models import ClaimsUser, User
+
+
+def set_user_claims(token, user):
+    token['username'] = user.username
+    token['is_active'] = user.is_active
+
+
+def get_cached_user(user_id):
+    """The user's row through the user cache, or None if there is none."""
+    user = user_cache.get(user_id)
+    if user is None:
+        user = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id).first()
+        if user is not None:
+            user_cache.set(user_id, user)
+    return user
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the claims ClaimsJWTAuthentication builds users
+    from (access tokens copy them). Its blacklist check only queries the
+    database for JTIs the worker's revoked token filter cannot rule out.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_user_claims(token, user)
+        return token
+
+    def check_blacklist(self):
+        if revoked_tokens.might_be_revoked(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+            revoked_tokens.record_false_positive()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user through the two-tier
+    user cache instead of querying the User table on every request. Rows
+    missing from the cache are read from the primary.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            try:
+                user = self.user_model.objects.using(DEFAULT_DB_ALIAS).get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            self.check_user(user, validated_token)
+            user_cache.set(user_id, user)
+        else:
+            self.check_user(user, validated_token)
+
+        # The cached instance is shared; views get their own copy to mutate
+        return copy.copy(user)
+
+    async def aauthenticate(self, request):
+        """`authenticate()` for async views: the user is loaded through the async ORM."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = await user_cache.aget(user_id)
+        if user is None:
+            try:
+                user = await self.user_model.objects.using(DEFAULT_DB_ALIAS).aget(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            self.check_user(user, validated_token)
+            await user_cache.aset(user_id, user)
+        else:
+            self.check_user(user, validated_token)
+
+        return copy.copy(user)
+
+    def check_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+
+def load_auth_state(user_id):
+    """`(is_active, username, password digest)` of the user, or None once they are deleted."""
+    return auth_state(
+        User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id)
+        .values_list('is_active', 'username', 'password').first()
+    )
+
+
+async def aload_auth_state(user_id):
+    return auth_state(
+        await User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id)
+        .values_list('is_active', 'username', 'password').afirst()
+    )
+
+
+def auth_state(row):
+    if row is None:
+        return None
+    is_active, username, password = row
+    return is_active, username, get_md5_hash_password(password)
+
+
+class ClaimsJWTAuthentication(CachedJWTAuthentication):
+    """
+    Builds the user from the access token's claims (see ClaimsRefreshToken)
+    as a ClaimsUser, whose other fields are loaded from the user cache only
+    when a view reads them. Requests that only need the user's id run no user
+    query and unpickle no user row.
+
+    Deactivation and deletion still take effect at once: each request checks
+    the user's auth state, a small cached entry that is evicted in every
+    worker when the user is saved or deleted. Tokens issued before the claims
+    existed, and tokens of users renamed since, take the full-row path.
+    """
+
+    def get_user(self, validated_token):
+        if 'username' not in validated_token:
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        state = user_auth_cache.get_or_set(user_id, lambda: load_auth_state(user_id))
+        return self.get_claims_user(validated_token, state) or super().get_user(validated_token)
+
+    async def aget_user(self, validated_token):
+        if 'username' not in validated_token:
+            return await super().aget_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        state = await user_auth_cache.aget_or_set(user_id, lambda: aload_auth_state(user_id))
+        return self.get_claims_user(validated_token, state) or await super().aget_user(validated_token)
+
+    def get_claims_user(self, validated_token, state):
+        """The token's ClaimsUser once the auth state allows it; None if the claims are out of date."""
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        is_active, username, password_digest = state
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_digest:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        if validated_token['username'] != username:
+            return None
+        return ClaimsUser.from_claims(
+            DEFAULT_DB_ALIAS, validated_token[api_settings.USER_ID_CLAIM], username, is_active
+        )
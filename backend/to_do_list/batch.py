@@ -0,0 +1,179 @@
+import json
+from contextlib import ExitStack
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import HttpRequest, HttpResponseBase, QueryDict
+from django.urls import Resolver404, resolve, reverse
+from rest_framework import status
+
+from .caching import ALL_TASKS_SCOPE, bump_task_versions, recording_sets
+from .middleware import SAFE_METHODS
+from .routers import routing_subrequest
+from .sharding import is_sharded, shard_for_user
+from .signals import invalidate_task_count
+
+# Batched requests
+# ==============================
+# A batch runs API requests one after another inside a single HTTP request,
+# calling each view directly: authentication, middleware and the connection
+# checkout happen once for the whole batch. Sub-requests carry the batch's
+# user (and token) in place of their own authentication, so they never
+# decode a JWT or look the user up again. Each is routed like a request of
+# its own (see to_do_list.routers).
+#
+# Reads inside an atomic batch see its uncommitted writes and cache them
+# like any other read. When the batch is rolled back, those cache entries
+# are evicted and the user's cached responses and task count expired.
+
+# Views that stream their response or open long-lived state
+UNBATCHABLE = frozenset({'batch', 'task-events', 'task-export', 'task-import'})
+
+BATCH_METHODS = ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+# Response headers passed back with each sub-response
+RETURNED_HEADERS = ('ETag', 'Last-Modified', 'Location')
+
+
+class BatchError(ValueError):
+    pass
+
+
+def parse_subrequest(item):
+    """`(method, path, query, body, headers)` of a sub-request spec, or BatchError."""
+    if not isinstance(item, dict):
+        raise BatchError('Each request must be an object')
+    method = str(item.get('method', 'GET')).upper()
+    if method not in BATCH_METHODS:
+        raise BatchError(f'Unsupported method {method}')
+    url = item.get('path')
+    if not isinstance(url, str) or not url.startswith(reverse('api-root')):
+        raise BatchError('path must be an API path')
+    headers = item.get('headers', {})
+    if not isinstance(headers, dict):
+        raise BatchError('headers must be an object')
+    parts = urlsplit(url)
+    body = item.get('body')
+    return method, parts.path, parts.query, b'' if body is None else json.dumps(body).encode(), headers
+
+
+def build_subrequest(request, method, path, query, body, headers):
+    """An HttpRequest for the sub-request, authenticated as the batch's user."""
+    subrequest = HttpRequest()
+    subrequest.method = method
+    subrequest.path = subrequest.path_info = path
+    subrequest.META = {
+        **{key: value for key, value in request.META.items() if not key.startswith('HTTP_IF_')},
+        **{f"HTTP_{name.upper().replace('-', '_')}": str(value) for name, value in headers.items()},
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+    }
+    subrequest.GET = QueryDict(query)
+    subrequest.COOKIES = request.COOKIES
+    subrequest._stream = BytesIO(body)
+    subrequest._read_started = False
+    # Read by rest_framework.request.Request in place of its authenticators
+    subrequest._force_auth_user = request.user
+    subrequest._force_auth_token = request.auth
+    return subrequest
+
+
+def run_subrequest(request, item, use_replica):
+    """Run one sub-request; returns its result and whether it wrote."""
+    try:
+        method, path, query, body, headers = parse_subrequest(item)
+        match = resolve(path)
+    except BatchError as exc:
+        return {'status': status.HTTP_400_BAD_REQUEST, 'body': {'detail': str(exc)}}, False
+    except Resolver404:
+        return {'status': status.HTTP_404_NOT_FOUND, 'body': {'detail': 'Not found.'}}, False
+    if match.url_name in UNBATCHABLE:
+        return {'status': status.HTTP_400_BAD_REQUEST, 'body': {'detail': 'This endpoint cannot be batched'}}, False
+
+    subrequest = build_subrequest(request, method, path, query, body, headers)
+    subrequest.resolver_match = match
+    with routing_subrequest(use_replica and method in SAFE_METHODS) as state:
+        response = match.func(subrequest, *match.args, **match.kwargs)
+        if not isinstance(response, HttpResponseBase):
+            # An async view (settings.ASYNC_VIEWS)
+            response = async_to_sync(_await)(response)
+
+    result = {'status': response.status_code, 'body': response_body(response)}
+    returned = {name: response[name] for name in RETURNED_HEADERS if response.has_header(name)}
+    if returned:
+        result['headers'] = returned
+    return result, state.wrote
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+def response_body(response):
+    if hasattr(response, 'data'):
+        return response.data
+    content = response.content
+    if not content:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(content)
+    return content.decode(response.charset)
+
+
+def run_batch(request, items, atomic=False):
+    """
+    Run `items` (sub-request specs) in order; returns a result per item. An
+    atomic batch runs in one transaction that is rolled back at the first
+    failed sub-request, and the ones after it are not run (424).
+    """
+    results = []
+    wrote = failed = False
+    aliases = transaction_aliases(request.user) if atomic else []
+    with ExitStack() as stack:
+        cached = stack.enter_context(recording_sets()) if atomic else set()
+        for alias in aliases:
+            stack.enter_context(transaction.atomic(using=alias))
+        for item in items:
+            if failed:
+                result = {
+                    'status': status.HTTP_424_FAILED_DEPENDENCY,
+                    'body': {'detail': 'Not run: an earlier request in the atomic batch failed'},
+                }
+            else:
+                # Reads after a write (or inside a transaction) must see it, so
+                # only the leading safe requests of a non-atomic batch may use a replica
+                result, subrequest_wrote = run_subrequest(request, item, use_replica=not (atomic or wrote))
+                wrote = wrote or subrequest_wrote
+                failed = atomic and result['status'] >= 400
+            if isinstance(item, dict) and 'id' in item:
+                result = {'id': item['id'], **result}
+            results.append(result)
+        if failed:
+            for alias in aliases:
+                transaction.set_rollback(True, using=alias)
+    if failed:
+        forget_rolled_back(request.user.id, cached)
+    return results
+
+
+def forget_rolled_back(user_id, cached):
+    """Evict what a rolled-back batch cached: `cached` two-tier entries, responses and counts."""
+    for two_tier, key in cached:
+        two_tier.delete(key)
+    bump_task_versions(user_id, ALL_TASKS_SCOPE)
+    invalidate_task_count(user_id)
+
+
+def transaction_aliases(user):
+    """Databases an atomic batch's transaction spans: the primary and the user's shard."""
+    aliases = [DEFAULT_DB_ALIAS]
+    if is_sharded():
+        shard = shard_for_user(user.id)
+        if shard != DEFAULT_DB_ALIAS:
+            aliases.append(shard)
+    return aliases
@@ -0,0 +1,152 @@
+import hashlib
+import math
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .caching import listener, registry
+
+# Revoked token filter
+# ==============================
+# Each worker keeps a Bloom filter of the JTIs in token_blacklist, so that
+# checking a refresh token only queries the blacklist when the filter says
+# the JTI may be revoked. The filter is loaded when the worker's invalidation
+# listener connects (and again on every reconnect, since broadcasts sent while
+# disconnected are lost), or on first use in processes without a listener.
+# Tokens blacklisted by any worker are added through the same broadcasts.
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for `capacity` keys at `error_rate` false positives."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, key):
+        # Double hashing over one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * step) % self.size for index in range(self.hashes)]
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+    def estimated_error_rate(self):
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+class RevokedTokenFilter:
+    """
+    Per-worker filter of blacklisted JTIs. `might_be_revoked()` has no false
+    negatives: a JTI it rejects is not blacklisted and needs no lookup.
+    Registered with the cache invalidation listener under `name`.
+    """
+    name = 'revoked-tokens'
+
+    def __init__(self):
+        self._filter = None
+        # JTIs revoked while a load is running, added to the new filter
+        self._pending = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.stats = Counter()
+        registry[self.name] = self
+
+    def load(self, force=False):
+        """Build the filter from the unexpired blacklisted tokens (expired tokens fail validation anyway)."""
+        with self._load_lock:
+            if self._filter is not None and not force:
+                return
+            with self._lock:
+                self._pending = set()
+            jtis = list(
+                BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+                .values_list('token__jti', flat=True)
+            )
+            bloom = BloomFilter(
+                max(settings.TOKEN_BLACKLIST_FILTER_CAPACITY, 2 * len(jtis)),
+                settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE
+            )
+            for jti in jtis:
+                bloom.add(jti)
+            with self._lock:
+                for jti in self._pending:
+                    bloom.add(jti)
+                self._pending = None
+                self._filter = bloom
+            self.stats['loads'] += 1
+
+    def might_be_revoked(self, jti):
+        listener.ensure_started()
+        bloom = self._filter
+        if bloom is None:
+            self.load()
+            bloom = self._filter
+        self.stats['checks'] += 1
+        if jti in bloom:
+            self.stats['lookups'] += 1
+            return True
+        self.stats['skipped_lookups'] += 1
+        return False
+
+    def record_false_positive(self):
+        """The blacklist did not have a JTI the filter flagged."""
+        self.stats['false_positives'] += 1
+
+    def add(self, jti):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.add(jti)
+            bloom = self._filter
+            if bloom is not None:
+                bloom.add(jti)
+                if bloom.count > bloom.capacity:
+                    # Past capacity the error rate climbs; rebuild at twice the size on next use
+                    self._filter = None
+
+    def revoke(self, jti):
+        """Add the JTI here now and in every worker once committed."""
+        self.add(jti)
+        transaction.on_commit(lambda: listener.publish(self.name, jti))
+
+    # Invalidation listener hooks
+
+    def receive(self, jti):
+        self.add(jti)
+
+    def reset(self):
+        # Runs on the listener's thread, which needs no connection of its own afterwards
+        try:
+            self.load(force=True)
+        finally:
+            connection.close()
+
+    def get_stats(self):
+        bloom = self._filter
+        # Lookups the filter could have skipped: JTIs that were not revoked
+        not_revoked = self.stats['skipped_lookups'] + self.stats['false_positives']
+        return {
+            **self.stats,
+            'size': bloom.count if bloom else 0,
+            'capacity': bloom.capacity if bloom else 0,
+            'bytes': len(bloom.bits) if bloom else 0,
+            'false_positive_rate': self.stats['false_positives'] / not_revoked if not_revoked else 0.0,
+            'estimated_false_positive_rate': bloom.estimated_error_rate() if bloom else 0.0,
+        }
+
+
+revoked_tokens = RevokedTokenFilter()
@@ -0,0 +1,182 @@
+from contextlib import nullcontext
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .caching import invalidate_task_responses, task_payload_cache
+from .events import hub as task_events
+from .models import Task, TaskTombstone
+from .serializers import TaskSerializer
+from .sharding import allocate_ids, is_sharded
+from .signals import invalidate_task_count
+
+# Set-based task writes
+# ==============================
+# Each write here is one statement for all of its tasks, so none of the
+# post_save/post_delete receivers in to_do_list.signals run. The functions
+# here do their work once per batch instead: global ids on sharded
+# databases, tombstones, cached counts, responses and payloads, and change
+# events. All of them act on the given user's tasks only. Updates carry
+# their rules as SQL predicates, so checking and writing is one round trip
+# with no window for a concurrent write in between; TaskViewSet's
+# single-task mutations use them too.
+
+# Columns returned by bulk updates, enough to serialize the task (in field
+# order, as Model.from_db() expects)
+RETURNED_FIELDS = ('id', 'title', 'description', 'status', 'created_at', 'updated_at')
+
+
+def ids_predicate(connection, ids):
+    """`(sql, params)` matching rows whose id is among `ids`, on any backend."""
+    ids = list(ids)
+    if connection.vendor == 'postgresql':
+        return 'id = ANY(%s)', [ids]
+    if not ids:
+        return '1 = 0', []
+    return f"id IN ({', '.join(['%s'] * len(ids))})", ids
+
+
+def create_tasks(user, tasks):
+    """Insert the user's unsaved `tasks` in one statement and return them, with ids."""
+    if is_sharded():
+        for task, pk in zip(tasks, allocate_ids(Task, len(tasks))):
+            task.pk = pk
+    for task in tasks:
+        task.user = user
+
+    Task.objects.bulk_create(tasks)
+    invalidate_task_count(user.id)
+    tasks_saved('created', user, tasks)
+    return tasks
+
+
+def update_tasks(user, ids, values, condition=None, params=()):
+    """
+    Set `values` ({field name: value}) on the user's tasks among `ids` in one
+    UPDATE ... RETURNING that writes only those columns and updated_at. Tasks
+    must also match `condition`, an SQL predicate taking `params` (datetimes
+    are adapted as the backend stores them). Returns the
+    updated tasks. A rename that collides with another of the user's titles
+    raises IntegrityError, leaving any outer transaction usable.
+    """
+    alias = router.db_for_write(Task)
+    connection = connections[alias]
+    fields = [Task._meta.get_field(name) for name in values]
+    assignments = ', '.join(f'{field.column} = %s' for field in fields)
+    in_ids, ids_params = ids_predicate(connection, ids)
+    predicates = f'user_id = %s AND {in_ids}' + (f' AND ({condition})' if condition else '')
+    columns = ', '.join(RETURNED_FIELDS)
+    sql = (
+        f'UPDATE {Task._meta.db_table} SET {assignments}, updated_at = %s '
+        f'WHERE {predicates} RETURNING {columns}'
+    )
+    params = [
+        *(field.get_db_prep_save(value, connection) for field, value in zip(fields, values.values())),
+        Task._meta.get_field('updated_at').get_db_prep_save(timezone.now(), connection),
+        user.id, *ids_params,
+        *(connection.ops.adapt_datetimefield_value(param) if isinstance(param, datetime) else param
+          for param in params)
+    ]
+
+    # Only renames can violate a constraint
+    with transaction.atomic(using=alias) if 'title' in values else nullcontext():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            tasks = returned_tasks(alias, cursor.fetchall())
+
+    for task in tasks:
+        task.user = user
+    tasks_saved('updated', user, tasks)
+    return tasks
+
+
+def returned_tasks(alias, rows):
+    """
+    Tasks from RETURNED_FIELDS rows, converted as the ORM converts the
+    columns it reads (e.g. SQLite's naive datetimes to aware ones).
+    """
+    connection = connections[alias]
+    columns = [Task._meta.get_field(name).get_col(Task._meta.db_table) for name in RETURNED_FIELDS]
+    converters = [
+        (index, column, functions) for index, column in enumerate(columns)
+        if (functions := connection.ops.get_db_converters(column) + column.get_db_converters(connection))
+    ]
+    tasks = []
+    for row in rows:
+        if converters:
+            row = list(row)
+            for index, column, functions in converters:
+                for convert in functions:
+                    row[index] = convert(row[index], column, connection)
+        tasks.append(Task.from_db(alias, RETURNED_FIELDS, row))
+    return tasks
+
+
+def update_task_status(user, ids, new_status):
+    """
+    Set the status of the user's tasks among `ids`. Tasks that have progressed
+    past NEW are left alone when `new_status` is NEW (Task.can_change_to_new()).
+    """
+    if new_status == 'NEW':
+        return update_tasks(user, ids, {'status': new_status}, "status = 'NEW'")
+    return update_tasks(user, ids, {'status': new_status})
+
+
+def update_task_title(user, ids, title):
+    """Rename the user's tasks among `ids` that are still within Task.TITLE_EDIT_WINDOW."""
+    return update_tasks(
+        user, ids, {'title': title}, 'created_at > %s', [timezone.now() - Task.TITLE_EDIT_WINDOW]
+    )
+
+
+def delete_tasks(user, ids):
+    """Delete the user's tasks among `ids` in one statement, recording tombstones; returns the deleted ids."""
+    alias = router.db_for_write(Task)
+    in_ids, ids_params = ids_predicate(connections[alias], ids)
+    with transaction.atomic(using=alias):
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {Task._meta.db_table} WHERE user_id = %s AND {in_ids} RETURNING id',
+                [user.id, *ids_params]
+            )
+            deleted = [row[0] for row in cursor.fetchall()]
+        tombstones = [TaskTombstone(task_id=task_id, user_id=user.id) for task_id in deleted]
+        if is_sharded():
+            for tombstone, pk in zip(tombstones, allocate_ids(TaskTombstone, len(tombstones))):
+                tombstone.pk = pk
+        TaskTombstone.objects.using(alias).bulk_create(tombstones)
+
+    if deleted:
+        invalidate_task_count(user.id)
+        invalidate_task_responses(user.id)
+        task_payload_cache.delete_many(deleted)
+        task_events.publish_many(
+            ('deleted', tombstone.task_id, user.id, (tombstone.deleted_at, tombstone.id))
+            for tombstone in tombstones
+        )
+    return deleted
+
+
+def tasks_saved(kind, user, tasks):
+    """What task_saved() does per task, for a batch of the user's tasks."""
+    if not tasks:
+        return
+    invalidate_task_responses(user.id)
+    task_payload_cache.delete_many(task.id for task in tasks)
+    # One serializer for the batch: building its fields costs more than rendering a task
+    serializer = TaskSerializer()
+    task_events.publish_many(
+        (kind, task.id, user.id, (task.updated_at, task.id), serializer.to_representation(task))
+        for task in tasks
+    )
+
+
+def locate_tasks(ids):
+    """`{id: (user_id, status)}` for the tasks among `ids`, from every shard."""
+    found = {}
+    for alias in settings.TASK_SHARDS:
+        rows = Task.objects.using(alias).filter(id__in=ids).values_list('id', 'user_id', 'status')
+        found.update((pk, (user_id, status)) for pk, user_id, status in rows)
+    return found
@@ -0,0 +1,369 @@
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .conditional import precondition_response, set_validators
+from .notifications import NotificationListener
+
+# Version scope covering every user's tasks (global list and search)
+ALL_TASKS_SCOPE = 'all'
+
+
+def task_version_key(scope):
+    return f'tasks:version:{scope}'
+
+
+def get_task_version(scope):
+    """
+    Current version of a scope (a user id or ALL_TASKS_SCOPE). Versions start
+    from a timestamp, so a version evicted from the cache never comes back
+    with a value that old responses were stored under.
+    """
+    return cache.get_or_set(task_version_key(scope), time.time_ns, None)
+
+
+async def aget_task_version(scope):
+    return await cache.aget_or_set(task_version_key(scope), time.time_ns, None)
+
+
+def bump_task_versions(*scopes):
+    for scope in scopes:
+        key = task_version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def invalidate_task_responses(user_id):
+    """Expire cached task responses that may include this user's tasks."""
+    scopes = (user_id, ALL_TASKS_SCOPE)
+    bump_task_versions(*scopes)
+    # Bump again once committed, in case a reader cached pre-commit rows meanwhile
+    transaction.on_commit(lambda: bump_task_versions(*scopes))
+
+
+def task_response_cache_key(request, scope, version=None):
+    """Keyed on the requesting user, the full URL (host + query params) and the scope version."""
+    url_hash = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    if version is None:
+        version = get_task_version(scope)
+    return f'tasks:response:{request.user.id}:{scope}:{version}:{url_hash}'
+
+
+def cached_task_response(request, scope, build_response):
+    """
+    Serve `build_response()`'s data from the cache while `scope` is unchanged.
+    Only successful responses are stored, together with their ETag so that
+    conditional requests are answered from the cache too; a timeout of 0
+    disables caching.
+    """
+    timeout = settings.TASK_RESPONSE_CACHE_TIMEOUT
+    if not timeout:
+        return build_response()
+
+    key = task_response_cache_key(request, scope)
+    entry = cache.get(key)
+    if entry is not None:
+        etag = entry.get('etag')
+        return precondition_response(request, etag=etag) or set_validators(Response(entry['data']), etag)
+
+    response = build_response()
+    if response.status_code == 200:
+        cache.set(key, {'data': response.data, 'etag': response.get('ETag')}, timeout)
+    return response
+
+
+async def acached_task_response(request, scope, build_response):
+    """`cached_task_response()` for async views; `build_response` is a coroutine function."""
+    timeout = settings.TASK_RESPONSE_CACHE_TIMEOUT
+    if not timeout:
+        return await build_response()
+
+    key = task_response_cache_key(request, scope, await aget_task_version(scope))
+    entry = await cache.aget(key)
+    if entry is not None:
+        etag = entry.get('etag')
+        return precondition_response(request, etag=etag) or set_validators(Response(entry['data']), etag)
+
+    response = await build_response()
+    if response.status_code == 200:
+        await cache.aset(key, {'data': response.data, 'etag': response.get('ETag')}, timeout)
+    return response
+
+
+def cache_task_response(view_method):
+    """Cache a TaskViewSet action's response under the view's response cache scope."""
+    if iscoroutinefunction(view_method):
+        @wraps(view_method)
+        async def async_wrapper(view, request, *args, **kwargs):
+            return await acached_task_response(
+                request,
+                view.get_response_cache_scope(),
+                lambda: view_method(view, request, *args, **kwargs)
+            )
+        return async_wrapper
+
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        return cached_task_response(
+            request,
+            view.get_response_cache_scope(),
+            lambda: view_method(view, request, *args, **kwargs)
+        )
+    return wrapper
+
+
+# Two-tier caches
+# ==============================
+# A bounded in-process LRU in front of the shared Django cache. Writes to the
+# cached models evict the key locally and broadcast the eviction to every
+# other worker through PostgreSQL LISTEN/NOTIFY.
+
+_MISSING = object()
+
+# Every TwoTierCache by name, so broadcast evictions can be routed to it; other
+# per-worker state kept in step by broadcasts (to_do_list.blacklist) registers too
+registry = {}
+
+# `(cache, key)` pairs set while recording_sets() is active in this context
+_recorded_sets = ContextVar('recorded_cache_sets', default=None)
+
+
+@contextmanager
+def recording_sets():
+    """
+    Collect the two-tier cache entries set in this context, so that values
+    read inside a transaction that is then rolled back can be evicted.
+    """
+    recorded = set()
+    token = _recorded_sets.set(recorded)
+    try:
+        yield recorded
+    finally:
+        _recorded_sets.reset(token)
+
+
+class LRUCache:
+    """Thread-safe, bounded LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.stats['misses'] += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def delete(self, key):
+        with self._lock:
+            if self._entries.pop(key, _MISSING) is not _MISSING:
+                self.stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TwoTierCache:
+    """
+    Read-through cache: local LRU, then the shared Django cache, then the
+    loader. Values held in the local tier are shared between requests of a
+    worker and must be treated as read-only.
+    """
+
+    def __init__(self, name, max_entries=None, ttl=None, shared_timeout=None):
+        self.name = name
+        self.local = LRUCache(
+            max_entries or settings.LOCAL_CACHE_MAX_ENTRIES,
+            ttl or settings.LOCAL_CACHE_TTL
+        )
+        self.shared_timeout = shared_timeout or settings.CACHES['default'].get('TIMEOUT', 300)
+        self.stats = Counter()
+        registry[name] = self
+
+    def shared_key(self, key):
+        return f'two-tier:{self.name}:{key}'
+
+    def get(self, key, default=None):
+        # Keys are compared as strings, the form they arrive in from broadcasts
+        key = str(key)
+        listener.ensure_started()
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stats['local_hits'] += 1
+            return value
+
+        value = cache.get(self.shared_key(key), _MISSING)
+        if value is not _MISSING:
+            self.stats['shared_hits'] += 1
+            self.local.set(key, value)
+            return value
+
+        self.stats['misses'] += 1
+        return default
+
+    def set(self, key, value):
+        key = str(key)
+        self.record(key)
+        self.local.set(key, value)
+        cache.set(self.shared_key(key), value, self.shared_timeout)
+
+    def get_or_set(self, key, load):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = load()
+            self.set(key, value)
+        return value
+
+    async def aget(self, key, default=None):
+        key = str(key)
+        listener.ensure_started()
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stats['local_hits'] += 1
+            return value
+
+        value = await cache.aget(self.shared_key(key), _MISSING)
+        if value is not _MISSING:
+            self.stats['shared_hits'] += 1
+            self.local.set(key, value)
+            return value
+
+        self.stats['misses'] += 1
+        return default
+
+    async def aset(self, key, value):
+        key = str(key)
+        self.record(key)
+        self.local.set(key, value)
+        await cache.aset(self.shared_key(key), value, self.shared_timeout)
+
+    def record(self, key):
+        recorded = _recorded_sets.get()
+        if recorded is not None:
+            recorded.add((self, key))
+
+    async def aget_or_set(self, key, load):
+        """`get_or_set()` with a coroutine function as the loader."""
+        value = await self.aget(key, _MISSING)
+        if value is _MISSING:
+            value = await load()
+            await self.aset(key, value)
+        return value
+
+    def delete(self, key):
+        """Evict the key in this worker now and in every worker once committed."""
+        key = str(key)
+        self.local.delete(key)
+        cache.delete(self.shared_key(key))
+        transaction.on_commit(lambda: self.broadcast_delete(key))
+
+    def broadcast_delete(self, key):
+        cache.delete(self.shared_key(key))
+        listener.publish(self.name, key)
+
+    def delete_many(self, keys):
+        """`delete()` for many keys, with one shared-cache call and one broadcast."""
+        keys = [str(key) for key in keys]
+        for key in keys:
+            self.local.delete(key)
+        cache.delete_many([self.shared_key(key) for key in keys])
+        transaction.on_commit(lambda: self.broadcast_delete_many(keys))
+
+    def broadcast_delete_many(self, keys):
+        cache.delete_many([self.shared_key(key) for key in keys])
+        listener.publish_many(self.name, keys)
+
+    def receive(self, key):
+        """An eviction broadcast by another worker."""
+        self.local.delete(key)
+
+    def reset(self):
+        """Forget local entries whose evictions may have been missed."""
+        self.local.clear()
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            **{f'local_{name}': count for name, count in self.local.stats.items()},
+            'local_size': len(self.local),
+        }
+
+
+def cache_stats():
+    """Hit/miss/eviction counters for every two-tier cache in this worker."""
+    return {name: two_tier.get_stats() for name, two_tier in registry.items()}
+
+
+class InvalidationListener(NotificationListener):
+    """
+    Per-worker listener for eviction broadcasts. `start()` is called by the
+    WSGI/ASGI entry points. Local tiers are cleared whenever the connection
+    is (re)established, since broadcasts sent while disconnected are lost.
+    """
+    thread_name = 'cache-invalidation'
+
+    def on_connect(self):
+        for two_tier in registry.values():
+            two_tier.reset()
+
+    def dispatch(self, payload):
+        name, _, key = payload.partition(':')
+        two_tier = registry.get(name)
+        if two_tier is not None:
+            two_tier.receive(key)
+
+    def publish(self, name, key):
+        self.notify(f'{name}:{key}')
+
+    def publish_many(self, name, keys):
+        self.notify_many([f'{name}:{key}' for key in keys])
+
+
+listener = InvalidationListener(getattr(settings, 'CACHE_INVALIDATION_CHANNEL', 'to_do_list_cache'))
+
+# User rows resolved during JWT authentication, by user id
+user_cache = TwoTierCache('users')
+# (is_active, username, password digest) checked by ClaimsJWTAuthentication, by user id
+user_auth_cache = TwoTierCache('user-auth')
+# UserSerializer payloads served by UserViewSet.me, by user id
+user_payload_cache = TwoTierCache('user-payloads')
+# TaskSerializer payloads served by TaskViewSet.retrieve, by task id
+task_payload_cache = TwoTierCache('task-payloads')
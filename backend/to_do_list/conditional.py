@@ -0,0 +1,79 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+
+# Conditional GET
+# ==============================
+# Validators are computed from cheap sources (the row's updated_at, an
+# aggregate over the filtered rows, a cached payload) so that a matching
+# If-None-Match / If-Modified-Since is answered with a 304 before any
+# rows are loaded or serialized.
+
+
+def make_etag(*parts):
+    """Strong ETag over the string form of `parts`."""
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def task_validators(task_id, updated_at, owner):
+    """
+    `(etag, last_modified)` for a task; `updated_at` may be a datetime or its
+    serialized form. The ETag includes the `owner`'s username, which the
+    payload embeds and which changes without touching the task.
+    """
+    if isinstance(updated_at, str):
+        updated_at = parse_datetime(updated_at)
+    return make_etag('task', task_id, updated_at.timestamp(), owner), int(updated_at.timestamp())
+
+
+def precondition_response(request, etag=None, last_modified=None):
+    """
+    The 304 (or 412) answering the request's conditional headers for these
+    validators, or None when the full response should be sent.
+    """
+    validators = set_validators(HttpResponse(), etag, last_modified)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified, response=validators)
+    return None if response is validators else response
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def conditional_list_response(view_method):
+    """
+    Answer a TaskViewSet list action with a 304 when the view's list ETag
+    (see `TaskViewSet.get_list_etag`) matches If-None-Match.
+    """
+    if iscoroutinefunction(view_method):
+        @wraps(view_method)
+        async def async_wrapper(view, request, *args, **kwargs):
+            etag = await view.aget_list_etag()
+            if etag is None:
+                return await view_method(view, request, *args, **kwargs)
+            response = precondition_response(request, etag=etag)
+            if response is None:
+                response = set_validators(await view_method(view, request, *args, **kwargs), etag)
+            return response
+        return async_wrapper
+
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        etag = view.get_list_etag()
+        if etag is None:
+            return view_method(view, request, *args, **kwargs)
+        response = precondition_response(request, etag=etag)
+        if response is None:
+            response = set_validators(view_method(view, request, *args, **kwargs), etag)
+        return response
+    return wrapper
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Task, TaskTombstone
+from .notifications import NotificationListener
+from .serializers import TaskSerializer
+from .sharding import scatter, shard_for_user
+from .sync import decode_watermark, encode_watermark, sync_changes
+
+# Task change feed
+# ==============================
+# Task save/delete signals NOTIFY a change event inside the writing
+# transaction, so it is delivered only once committed. Every process serving
+# the feed LISTENs through one TaskEventHub thread and fans events out to
+# the open streams on its event loop.
+#
+# Event ids are sync watermarks (see to_do_list.sync): a client reconnecting
+# with Last-Event-ID, or a stream that fell behind, replays the changes since
+# then from the database. Delivery is at-least-once; events are idempotent
+# upserts/deletes keyed on the task id.
+
+# Queued in place of the backlog when a stream must catch up from the database
+RESYNC = object()
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD = 7900
+
+
+class Subscription:
+    """One open stream's queue of pending events, bounded by TASK_EVENTS_MAX_PENDING."""
+
+    def __init__(self, loop, user_id):
+        self.loop = loop
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=settings.TASK_EVENTS_MAX_PENDING)
+        # A queued RESYNC's replay will cover any event arriving before it is taken
+        self.resync_pending = False
+
+    def wants(self, event):
+        return self.user_id is None or self.user_id == event['user_id']
+
+    def push(self, event):
+        """Queue an event from any thread."""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.resync_pending:
+            return
+        if self.queue.full():
+            # The client reads slower than tasks change: drop the backlog and
+            # let the stream replay from the database instead of buffering it
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = RESYNC
+        self.resync_pending = event is RESYNC
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        event = await self.queue.get()
+        if event is RESYNC:
+            self.resync_pending = False
+        return event
+
+
+class TaskEventHub(NotificationListener):
+    """
+    Fans task change notifications out to the streams open in this process.
+    The listener thread starts with the first subscription.
+    """
+    thread_name = 'task-events'
+
+    def __init__(self, channel):
+        super().__init__(channel)
+        self.subscriptions = set()
+        self._subscriptions_lock = threading.Lock()
+
+    def subscribe(self, user_id=None):
+        """Subscribe to one user's task events, or to every task's with `user_id=None`."""
+        self.start()
+        subscription = Subscription(asyncio.get_running_loop(), user_id)
+        with self._subscriptions_lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._subscriptions_lock:
+            self.subscriptions.discard(subscription)
+
+    def on_connect(self):
+        # Events sent while the listener was disconnected are lost
+        self.broadcast(RESYNC)
+
+    def dispatch(self, payload):
+        self.broadcast(json.loads(payload))
+
+    def broadcast(self, event):
+        with self._subscriptions_lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            if event is RESYNC or subscription.wants(event):
+                try:
+                    subscription.push(event)
+                except RuntimeError:
+                    # The stream's event loop has closed
+                    self.unsubscribe(subscription)
+
+    def publish(self, kind, task_id, user_id, position, task=None):
+        """
+        NOTIFY a task event. `position` is the change's (timestamp, id) in the
+        sync stream it belongs to; `task` is the serialized task, left out
+        when it would not fit in a notification.
+        """
+        self.notify(self.event_payload(kind, task_id, user_id, position, task))
+
+    def publish_many(self, events):
+        """`publish()` each of `events`, `(kind, task_id, user_id, position, task)` tuples, in one statement."""
+        self.notify_many([self.event_payload(*event) for event in events])
+
+    def event_payload(self, kind, task_id, user_id, position, task=None):
+        event = {
+            'type': kind,
+            'id': task_id,
+            'user_id': user_id,
+            'position': [position[0].isoformat(), position[1]],
+        }
+        payload = json.dumps({**event, 'task': task}) if task is not None else json.dumps(event)
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+            payload = json.dumps(event)
+        return payload
+
+
+def format_event(kind, data, event_id=None):
+    lines = []
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: task.{kind}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class TaskEventStream:
+    """
+    Server-sent events for one subscription. Starts from `last_event_id`
+    (replaying the changes since then) or from now, sends a comment every
+    TASK_EVENTS_HEARTBEAT seconds while idle, and replays from the database
+    whenever the subscription overflows.
+    """
+
+    def __init__(self, hub, subscription, last_event_id=None):
+        self.hub = hub
+        self.subscription = subscription
+        self.replay_pending = False
+        try:
+            self.positions = list(decode_watermark(last_event_id))
+            self.replay_pending = bool(last_event_id)
+        except ValidationError:
+            self.positions = [None, None]
+        # A fresh stream only wants changes from now on
+        now = timezone.now()
+        self.positions = [position or (now, 0) for position in self.positions]
+
+    @property
+    def event_id(self):
+        return encode_watermark(*self.positions)
+
+    async def __aiter__(self):
+        try:
+            if self.replay_pending:
+                async for chunk in self.replay():
+                    yield chunk
+            while True:
+                try:
+                    event = await asyncio.wait_for(self.subscription.get(), settings.TASK_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing the idle connection
+                    yield ': heartbeat\n\n'
+                    continue
+
+                if event is RESYNC:
+                    async for chunk in self.replay():
+                        yield chunk
+                    continue
+
+                chunk = await self.live_event(event)
+                if chunk:
+                    yield chunk
+        finally:
+            self.hub.unsubscribe(self.subscription)
+
+    async def live_event(self, event):
+        stream = 1 if event['type'] == 'deleted' else 0
+        moment, row_id = event['position']
+        self.advance(stream, (parse_datetime(moment), row_id))
+
+        data = {'id': event['id'], 'user_id': event['user_id']}
+        if event['type'] != 'deleted':
+            task = event.get('task')
+            if task is None:
+                task = await sync_to_async(self.load_task)(event['id'])
+                if task is None:
+                    # Deleted since; its own event follows
+                    return None
+            data['task'] = task
+        return format_event(event['type'], data, self.event_id)
+
+    def advance(self, stream, position):
+        # Commits can arrive out of timestamp order; never move a position back
+        if position > self.positions[stream]:
+            self.positions[stream] = position
+
+    async def replay(self):
+        has_more = True
+        while has_more:
+            chunks, has_more = await sync_to_async(self.load_changes)()
+            for chunk in chunks:
+                yield chunk
+
+    def on_shards(self, queryset):
+        """The queryset on the subscribed user's shard, or on every shard for the global feed."""
+        user_id = self.subscription.user_id
+        if user_id is None:
+            return scatter(queryset)
+        return queryset.filter(user_id=user_id).using(shard_for_user(user_id))
+
+    def task_queryset(self):
+        return self.on_shards(Task.objects.select_related('user'))
+
+    def load_task(self, task_id):
+        task = next(iter(self.task_queryset().filter(id=task_id)[:1]), None)
+        return TaskSerializer(task).data if task is not None else None
+
+    def load_changes(self):
+        """One batch of changes since the current positions, as formatted events."""
+        tombstones = self.on_shards(TaskTombstone.objects.only('task_id', 'user_id', 'deleted_at'))
+        since = self.positions[0][0]
+        tasks, tombstones, _, has_more = sync_changes(
+            self.task_queryset(), tombstones, tuple(self.positions), timezone.now(),
+            settings.TASK_EVENTS_REPLAY_BATCH
+        )
+
+        chunks = []
+        for task in tasks:
+            self.advance(0, (task.updated_at, task.id))
+            kind = 'created' if task.created_at > since else 'updated'
+            data = {'id': task.id, 'user_id': task.user_id, 'task': TaskSerializer(task).data}
+            chunks.append(format_event(kind, data, self.event_id))
+        for tombstone in tombstones:
+            self.advance(1, (tombstone.deleted_at, tombstone.id))
+            data = {'id': tombstone.task_id, 'user_id': tombstone.user_id}
+            chunks.append(format_event('deleted', data, self.event_id))
+        return chunks, has_more
+
+
+hub = TaskEventHub(getattr(settings, 'TASK_EVENTS_CHANNEL', 'to_do_list_task_events'))
@@ -0,0 +1,212 @@
+import codecs
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .bulk import create_tasks, tasks_saved
+from .models import Task
+from .routers import routing_to_shard
+from .serializers import TaskSerializer
+
+# Streaming import
+# ==============================
+# An import reads the upload a line at a time and handles it in batches of
+# TASK_IMPORT_BATCH_SIZE rows: each batch is validated with TaskSerializer,
+# has its title conflicts resolved with one lookup of the user's titles, and
+# is written in one transaction with one INSERT (and one UPDATE when
+# upserting). A progress line is streamed back per batch, so neither the
+# upload nor the report is ever held in memory whole. Like exports, imports
+# only stream through the sync WSGI workers.
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+
+# What happens to a row whose title the user already has (or an earlier row
+# of the upload took): `skip` it, `rename` it to the first free
+# "<title> (n)", or `upsert` it into the existing task
+CONFLICT_MODES = ('skip', 'rename', 'upsert')
+
+# Rows per outcome, in every progress line (renamed rows are also created)
+REPORT_COUNTS = ('rows', 'created', 'renamed', 'updated', 'skipped', 'failed')
+
+# Numbered titles tried per conflicting title per lookup when renaming
+RENAME_WINDOW = 10
+
+# The error of an upserted row that would set a task back to NEW (what
+# TaskSerializer.validate_status() says when updating a task)
+BACK_TO_NEW_ERROR = {'status': ['Cannot set status back to NEW once task has progressed']}
+
+
+def read_records(stream, import_format):
+    """
+    `(row number, data, error)` for each record of the upload: `data` is the
+    row's dict, or None with `error` saying why it could not be read. CSV
+    cells left empty are omitted, so the serializer's defaults apply.
+    """
+    lines = codecs.iterdecode(iter(stream.readline, b''), 'utf-8')
+    if import_format == 'csv':
+        for number, row in enumerate(csv.DictReader(lines), 1):
+            yield number, {key: value for key, value in row.items() if key and value}, None
+        return
+
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield number, None, 'Invalid JSON'
+            continue
+        if isinstance(data, dict):
+            yield number, data, None
+        else:
+            yield number, None, 'Expected a JSON object'
+
+
+def stream_import(user, records, on_conflict, shard=None):
+    """
+    Import `records` (from read_records()) as the user's tasks, yielding an
+    NDJSON progress line per batch, with the batch's row errors and
+    conflicts, and a final line with the totals.
+    """
+    totals = dict.fromkeys(REPORT_COUNTS, 0)
+    records = iter(records)
+    try:
+        while batch := list(islice(records, settings.TASK_IMPORT_BATCH_SIZE)):
+            with routing_to_shard(shard):
+                report = import_batch(user, batch, on_conflict)
+            for key in REPORT_COUNTS:
+                totals[key] += report[key]
+            yield _ndjson_line({**report, 'total_rows': totals['rows']})
+    except (UnicodeDecodeError, csv.Error) as exc:
+        yield _ndjson_line({'detail': f'Unreadable upload: {exc}'})
+    yield _ndjson_line({'done': True, **totals})
+
+
+def _ndjson_line(data):
+    return (json.dumps(data) + '\n').encode()
+
+
+def import_batch(user, batch, on_conflict):
+    """Validate, resolve and write one batch of records; returns the batch's report."""
+    report = {**dict.fromkeys(REPORT_COUNTS, 0), 'rows': len(batch)}
+    errors, rows = [], []
+    # One serializer validates every row (what is_valid() runs, without
+    # building its fields per row)
+    serializer = TaskSerializer()
+    for number, data, error in batch:
+        if data is None:
+            errors.append({'row': number, 'errors': error})
+            continue
+        try:
+            rows.append((number, serializer.run_validation(data)))
+        except ValidationError as exc:
+            errors.append({'row': number, 'errors': exc.detail})
+
+    # A concurrent write can take a title between the lookup and the
+    # INSERT; resolving again sees it
+    for attempt in range(2):
+        try:
+            with transaction.atomic(using=router.db_for_write(Task)):
+                conflicts, rejected = write_rows(user, rows, on_conflict, report)
+            break
+        except IntegrityError:
+            if attempt:
+                raise
+            report.update(created=0, renamed=0, updated=0, skipped=0)
+    errors = sorted(errors + rejected, key=lambda error: error['row'])
+    report['failed'] = len(errors)
+    return {**report, 'errors': errors, 'conflicts': conflicts}
+
+
+def write_rows(user, rows, on_conflict, report):
+    """
+    Write validated `(row number, data)` rows; returns how their title
+    conflicts were resolved, and the errors of upserted rows that break the
+    task rules (Task.can_change_to_new()).
+    """
+    existing = {
+        task.title: task
+        for task in Task.objects.filter(user=user, title__in={data['title'] for _, data in rows})
+    }
+    new, conflicting, conflicts, rejected = [], [], [], []
+    # New tasks by title, and existing tasks to update by id
+    by_title, updated = {}, {}
+    for number, data in rows:
+        title = data['title']
+        target = by_title.get(title) or existing.get(title)
+        if target is None:
+            task = Task(**data)
+            new.append(task)
+            by_title[title] = task
+        elif on_conflict == 'skip':
+            conflicts.append({'row': number, 'title': title, 'resolution': 'skipped'})
+            report['skipped'] += 1
+        elif on_conflict == 'upsert':
+            if data.get('status') == 'NEW' and not target.can_change_to_new():
+                rejected.append({'row': number, 'errors': BACK_TO_NEW_ERROR})
+                continue
+            for field in ('description', 'status'):
+                if field in data:
+                    setattr(target, field, data[field])
+            if target.pk is not None:
+                updated[target.pk] = target
+            conflicts.append({'row': number, 'title': title, 'resolution': 'updated'})
+            report['updated'] += 1
+        else:
+            task = Task(**data)
+            new.append(task)
+            conflicting.append((number, task))
+
+    if conflicting:
+        rename_tasks(user, [task for _, task in conflicting], set(existing) | set(by_title))
+        for number, task in conflicting:
+            conflicts.append({'row': number, 'title': task.title, 'resolution': 'renamed'})
+        report['renamed'] += len(conflicting)
+
+    if updated:
+        now = timezone.now()
+        for task in updated.values():
+            task.updated_at = now
+        Task.objects.bulk_update(updated.values(), ['description', 'status', 'updated_at'])
+        tasks_saved('updated', user, list(updated.values()))
+    create_tasks(user, new)
+    report['created'] += len(new)
+    return sorted(conflicts, key=lambda conflict: conflict['row']), rejected
+
+
+def rename_tasks(user, tasks, taken):
+    """Retitle each of `tasks` to the first "<title> (n)" not in `taken` or among the user's titles."""
+    waiting = defaultdict(list)
+    for task in tasks:
+        waiting[task.title].append(task)
+    next_number = dict.fromkeys(waiting, 2)
+
+    while waiting:
+        candidates = {}
+        for title, pending in waiting.items():
+            first = next_number[title]
+            next_number[title] = first + len(pending) + RENAME_WINDOW
+            candidates[title] = [numbered_title(title, n) for n in range(first, next_number[title])]
+        names = [name for names in candidates.values() for name in names]
+        taken.update(Task.objects.filter(user=user, title__in=names).values_list('title', flat=True))
+
+        for title, names in candidates.items():
+            pending = waiting[title]
+            for name in names:
+                if not pending:
+                    break
+                if name not in taken:
+                    pending.pop(0).title = name
+                    taken.add(name)
+        waiting = {title: pending for title, pending in waiting.items() if pending}
+
+
+def numbered_title(title, number):
+    suffix = f' ({number})'
+    return title[:Task._meta.get_field('title').max_length - len(suffix)] + suffix
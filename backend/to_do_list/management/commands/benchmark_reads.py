@@ -0,0 +1,125 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = (
+    '/api/tasks/',
+    '/api/tasks/my_tasks/',
+    '/api/tasks/search/?q=task',
+    '/api/users/me/',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure read throughput of running deployments side by side, e.g. the '
+        'WSGI workers against the ASGI ones:\n'
+        '  gunicorn --workers 3 backend.wsgi:application --bind :8000\n'
+        '  ASYNC_VIEWS=True gunicorn --workers 3 -k uvicorn.workers.UvicornWorker '
+        'backend.asgi:application --bind :8001\n'
+        '  manage.py benchmark_reads http://localhost:8000 http://localhost:8001 '
+        '--username alice --password secret --concurrency 200'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help='Base URLs of the deployments to compare')
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--concurrency', type=int, default=100, help='Concurrent clients')
+        parser.add_argument('--duration', type=float, default=20, help='Seconds per deployment')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Request path (repeatable); defaults to the task and profile read paths'
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        rows = []
+        for url in options['urls']:
+            token = self.obtain_token(url, options['username'], options['password'])
+            self.stdout.write(f'Benchmarking {url} ({options["concurrency"]} clients, {options["duration"]}s)...')
+            rows.append((url, self.run(url, token, paths, options['concurrency'], options['duration'])))
+
+        self.stdout.write('')
+        self.stdout.write(f'{"deployment":<32} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+        for url, result in rows:
+            self.stdout.write(
+                f'{url:<32} {result["throughput"]:>9.1f} {result["p50"]:>8.1f} '
+                f'{result["p95"]:>8.1f} {result["p99"]:>8.1f} {result["errors"]:>7}'
+            )
+
+    def obtain_token(self, url, username, password):
+        connection = self.connect(url)
+        body = json.dumps({'username': username, 'password': password})
+        connection.request('POST', '/api/token/', body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        payload = response.read()
+        connection.close()
+        if response.status != 200:
+            raise CommandError(f'{url}: could not obtain a token ({response.status}): {payload[:200]!r}')
+        return json.loads(payload)['access']
+
+    @staticmethod
+    def connect(url):
+        parts = urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        return connection_class(parts.netloc, timeout=60)
+
+    def run(self, url, token, paths, concurrency, duration):
+        """Each client loops over `paths` on a keep-alive connection until the time is up."""
+        headers = {'Authorization': f'Bearer {token}'}
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+
+        def client(offset):
+            connection = self.connect(url)
+            local_latencies = []
+            local_errors = 0
+            index = offset
+            while time.monotonic() < deadline:
+                path = paths[index % len(paths)]
+                index += 1
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status >= 400:
+                        local_errors += 1
+                except (OSError, http.client.HTTPException):
+                    local_errors += 1
+                    connection.close()
+                    connection = self.connect(url)
+                    continue
+                local_latencies.append((time.perf_counter() - started) * 1000)
+            connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors.append(local_errors)
+
+        threads = [threading.Thread(target=client, args=(offset,)) for offset in range(concurrency)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        latencies.sort()
+        if not latencies:
+            raise CommandError(f'{url}: no request succeeded')
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        return {
+            'throughput': len(latencies) / elapsed,
+            'p50': quantiles[49],
+            'p95': quantiles[94],
+            'p99': quantiles[98],
+            'errors': sum(errors),
+        }
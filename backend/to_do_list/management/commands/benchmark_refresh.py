@@ -0,0 +1,108 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from to_do_list.authentication import ClaimsRefreshToken
+from to_do_list.models import User
+from to_do_list.views import CookieTokenRefreshView
+
+
+class PreviousRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class PreviousCookieTokenRefreshView(TokenRefreshView):
+    """CookieTokenRefreshView before single-pass refresh: validate, decode again, load the user."""
+    serializer_class = PreviousRefreshSerializer
+
+    def post(self, request, *args, **kwargs):
+        refresh_token = request.COOKIES.get('refresh_token')
+        if refresh_token:
+            request.data['refresh'] = refresh_token
+
+        response = super().post(request, *args, **kwargs)
+
+        if response.status_code == 200 and 'access' in response.data:
+            try:
+                refresh = ClaimsRefreshToken(refresh_token)
+                user = User.objects.get(id=refresh.payload.get('user_id'))
+                response.data['user'] = {
+                    'id': user.id,
+                    'username': user.username,
+                    'first_name': user.first_name,
+                    'last_name': user.last_name,
+                }
+            except (User.DoesNotExist, TokenError):
+                pass
+        return response
+
+
+class Command(BaseCommand):
+    help = (
+        'Time token refreshes in-process, the previous refresh pipeline against '
+        'CookieTokenRefreshView, on the configured database. The benchmark user '
+        'is created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000, help='Refreshes timed per pipeline')
+        parser.add_argument('--warmup', type=int, default=100, help='Untimed refreshes per pipeline')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        pipelines = (
+            ('before', PreviousCookieTokenRefreshView.as_view()),
+            ('after', CookieTokenRefreshView.as_view()),
+        )
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username='refresh-benchmark', password='benchmark-pass', first_name='Refresh', last_name='Benchmark'
+            )
+            token = str(ClaimsRefreshToken.for_user(user))
+            rows = [(name, self.run(view, token, options)) for name, view in pipelines]
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{"pipeline":<10} {"mean us":>9} {"p50 us":>9} {"p99 us":>9} {"queries":>8}')
+        for name, result in rows:
+            self.stdout.write(
+                f'{name:<10} {result["mean"]:>9.0f} {result["p50"]:>9.0f} {result["p99"]:>9.0f} '
+                f'{result["queries"]:>8}'
+            )
+
+    def run(self, view, token, options):
+        factory = APIRequestFactory()
+
+        def refresh():
+            request = factory.post('/api/token/refresh/', {}, format='json')
+            request.COOKIES['refresh_token'] = token
+            response = view(request)
+            if response.status_code != 200:
+                raise CommandError(f'Refresh failed: {response.status_code} {response.data}')
+            return response
+
+        for _ in range(options['warmup']):
+            refresh()
+        with CaptureQueriesContext(connection) as context:
+            refresh()
+
+        latencies = []
+        for _ in range(options['iterations']):
+            started = time.perf_counter()
+            refresh()
+            latencies.append((time.perf_counter() - started) * 1e6)
+        latencies.sort()
+        return {
+            'mean': statistics.fmean(latencies),
+            'p50': latencies[len(latencies) // 2],
+            'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+            'queries': len(context.captured_queries),
+        }
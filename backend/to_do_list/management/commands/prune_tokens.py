@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from to_do_list.retention import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired outstanding refresh tokens and their blacklist entries in '
+        'batches of short transactions (unlike flushexpiredtokens, which deletes '
+        'them all in one). Safe to run from cron while the API is serving.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TOKEN_PRUNE_BATCH_SIZE,
+            help='Outstanding tokens deleted per transaction'
+        )
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Count the expired tokens without deleting them')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        if options['dry_run']:
+            expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+            self.stdout.write(
+                f'{expired.count()} expired outstanding tokens '
+                f'({expired.filter(blacklistedtoken__isnull=False).count()} blacklisted)'
+            )
+            return
+
+        result = prune_expired_tokens(options['batch_size'], options['max_batches'], options['pause'])
+        self.stdout.write(
+            f'Removed {result["outstanding"]} outstanding and {result["blacklisted"]} blacklisted tokens '
+            f'in {result["batches"]} batches ({result["seconds"]:.2f}s, {result["rows_per_second"]:.0f} rows/s)'
+        )
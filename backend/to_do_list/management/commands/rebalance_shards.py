@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from to_do_list.models import Task, User
+from to_do_list.sharding import is_sharded, move_user
+
+
+class Command(BaseCommand):
+    help = (
+        'Move users (with their tasks and tombstones) between task shards. '
+        'With --user and --to, moves that user; otherwise repeatedly moves a user '
+        'from the fullest shard to the emptiest until task counts are within '
+        '--tolerance of each other.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Id of a user to move (requires --to)')
+        parser.add_argument('--to', dest='target', help='Shard alias to move --user to')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.1,
+            help='Stop once the fullest and emptiest shards differ by at most this fraction of the mean'
+        )
+        parser.add_argument('--max-moves', type=int, default=100)
+        parser.add_argument('--dry-run', action='store_true', help='Print the moves without making them')
+
+    def handle(self, *args, **options):
+        if not is_sharded():
+            raise CommandError('Tasks are not sharded (settings.TASK_SHARDS has a single alias)')
+
+        if options['user'] is not None or options['target'] is not None:
+            if options['user'] is None or options['target'] not in settings.TASK_SHARDS:
+                raise CommandError(f'--user needs --to, one of: {", ".join(settings.TASK_SHARDS)}')
+            if not User.objects.filter(pk=options['user']).exists():
+                raise CommandError(f'No user with id {options["user"]}')
+            self.move(options['user'], options['target'], options['dry_run'])
+            return
+
+        users = self.task_counts()
+        loads = {alias: sum(counts.values()) for alias, counts in users.items()}
+        mean = sum(loads.values()) / len(loads)
+        moves = 0
+        while moves < options['max_moves']:
+            fullest = max(loads, key=loads.get)
+            emptiest = min(loads, key=loads.get)
+            gap = loads[fullest] - loads[emptiest]
+            if gap <= options['tolerance'] * mean:
+                break
+            # The largest user that still narrows the gap
+            candidates = [(count, user_id) for user_id, count in users[fullest].items() if count <= gap / 2]
+            if not candidates:
+                break
+            count, user_id = max(candidates)
+            self.move(user_id, emptiest, options['dry_run'], source=fullest)
+            del users[fullest][user_id]
+            users[emptiest][user_id] = count
+            loads[fullest] -= count
+            loads[emptiest] += count
+            moves += 1
+
+        self.stdout.write(f'{moves} user(s) {"to move" if options["dry_run"] else "moved"}; tasks per shard:')
+        for alias, load in loads.items():
+            self.stdout.write(f'  {alias}: {load}')
+
+    def task_counts(self):
+        """`{alias: {user_id: task count}}` from the rows each shard holds."""
+        return {
+            alias: dict(
+                Task.objects.using(alias).order_by().values_list('user_id').annotate(count=Count('id'))
+            )
+            for alias in settings.TASK_SHARDS
+        }
+
+    def move(self, user_id, target, dry_run, source=None):
+        origin = f' from {source}' if source else ''
+        if dry_run:
+            self.stdout.write(f'Would move user {user_id}{origin} to {target}')
+            return
+        moved = move_user(user_id, target)
+        self.stdout.write(f'Moved user {user_id}{origin} to {target} ({moved} rows)')
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from to_do_list.models import User
+from to_do_list.stats import reconcile_task_counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount tasks per user and status and correct the task status counters '
+        'that drifted, a batch of users per short transaction on each task shard. '
+        'Task writes to a shard wait while a batch is recounted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only reconcile this user')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users recounted per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted counters without fixing them')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        checked = drifted = 0
+        for alias in settings.TASK_SHARDS:
+            if connections[alias].vendor != 'postgresql':
+                raise CommandError('Task status counters are only maintained on PostgreSQL')
+            for user_ids in self.user_batches(alias, options['user'], options['batch_size']):
+                drift = reconcile_task_counts(alias, user_ids, options['dry_run'])
+                for (user_id, status), (stored, actual) in sorted(drift.items()):
+                    self.stdout.write(f'{alias}: user {user_id} {status} counted {stored}, has {actual}')
+                checked += len(user_ids)
+                drifted += len(drift)
+
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(f'{verb} {drifted} drifted counters among {checked} users')
+
+    def user_batches(self, alias, user_id, batch_size):
+        """Ids of the users on `alias`, in batches (shards hold copies of their users)."""
+        users = User.objects.using(alias).order_by('pk').values_list('pk', flat=True)
+        if user_id is not None:
+            users = users.filter(pk=user_id)
+        last = 0
+        while batch := list(users.filter(pk__gt=last)[:batch_size]):
+            yield batch
+            last = batch[-1]
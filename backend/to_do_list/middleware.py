@@ -0,0 +1,53 @@
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from .routers import start_routing, stop_routing
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """
+    Reads safe requests from a replica (see to_do_list.routers). A response to
+    a request that wrote sets a cookie keeping the client's reads on the
+    primary for DATABASE_REPLICA_PIN_SECONDS, so it reads its own writes
+    while the replicas catch up.
+    """
+
+    def begin(request):
+        use_replica = (
+            request.method in SAFE_METHODS
+            and settings.REPLICA_PIN_COOKIE not in request.COOKIES
+        )
+        return start_routing(use_replica)
+
+    def finish(state, response):
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            state, token = begin(request)
+            try:
+                response = await get_response(request)
+            finally:
+                stop_routing(token)
+            return finish(state, response)
+    else:
+        def middleware(request):
+            state, token = begin(request)
+            try:
+                response = get_response(request)
+            finally:
+                stop_routing(token)
+            return finish(state, response)
+    return middleware
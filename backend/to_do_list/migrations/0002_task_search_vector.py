@@ -0,0 +1,51 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from to_do_list.operations import PostgresOnly
+
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('english', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce({row}description, '')), 'B')
+"""
+
+CREATE_TRIGGER_SQL = f"""
+CREATE FUNCTION to_do_list_task_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER to_do_list_task_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON to_do_list_task
+    FOR EACH ROW EXECUTE FUNCTION to_do_list_task_search_vector_update();
+
+UPDATE to_do_list_task SET search_vector = {SEARCH_VECTOR_SQL.format(row='')};
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS to_do_list_task_search_vector_trigger ON to_do_list_task;
+DROP FUNCTION IF EXISTS to_do_list_task_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('to_do_list', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        PostgresOnly(migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL)),
+        PostgresOnly(migrations.AddIndex(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_vector_gin'),
+        )),
+    ]
@@ -0,0 +1,37 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+from to_do_list.operations import CreateExtensionIfAvailable, RequiresExtension
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('to_do_list', '0002_task_search_vector'),
+    ]
+
+    operations = [
+        CreateExtensionIfAvailable('pg_trgm'),
+        RequiresExtension('pg_trgm', AddIndexConcurrently(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'
+                ),
+                name='task_title_trgm',
+            ),
+        )),
+        RequiresExtension('pg_trgm', AddIndexConcurrently(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('description'), name='gin_trgm_ops'
+                ),
+                name='task_description_trgm',
+            ),
+        )),
+    ]
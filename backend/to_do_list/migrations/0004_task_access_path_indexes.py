@@ -0,0 +1,37 @@
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+from to_do_list.operations import PostgresOnly
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('to_do_list', '0003_task_trigram_indexes'),
+    ]
+
+    operations = [
+        PostgresOnly(AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['-created_at', '-id'], name='task_created_id_idx'),
+        )),
+        PostgresOnly(AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='task_user_created_id_idx'),
+        )),
+        PostgresOnly(AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['user', 'status', '-created_at'], name='task_user_status_created_idx'),
+        )),
+        PostgresOnly(AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['status', '-created_at'], name='task_status_created_idx'),
+        )),
+        # Superseded by task_status_created_idx, which has status as its leading column
+        PostgresOnly(RemoveIndexConcurrently(
+            model_name='task',
+            name='to_do_list__status_105122_idx',
+        )),
+    ]
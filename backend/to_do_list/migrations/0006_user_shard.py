@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 09:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('to_do_list', '0005_task_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserShard',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_shard', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('shard', models.CharField(max_length=64)),
+            ],
+            options={
+                'verbose_name': 'User shard',
+                'verbose_name_plural': 'User shards',
+            },
+        ),
+    ]
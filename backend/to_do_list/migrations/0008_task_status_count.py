@@ -0,0 +1,90 @@
+# Generated by Django 5.2 on 2026-10-18 10:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from to_do_list.operations import PostgresOnly
+
+
+# One function for the three statement-level triggers: each passes the
+# statement's rows as transition tables, so a bulk write updates each
+# (user, status) counter it touched once. Counters are written in
+# (user, status) order, so concurrent statements lock them in the same order.
+CREATE_TRIGGER_SQL = """
+CREATE FUNCTION to_do_list_task_status_count_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO to_do_list_taskstatuscount (user_id, status, count)
+        SELECT user_id, status, count(*) FROM new_rows
+        GROUP BY user_id, status ORDER BY user_id, status
+        ON CONFLICT (user_id, status)
+        DO UPDATE SET count = to_do_list_taskstatuscount.count + EXCLUDED.count;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO to_do_list_taskstatuscount (user_id, status, count)
+        SELECT user_id, status, sum(delta) FROM (
+            SELECT user_id, status, 1 AS delta FROM new_rows
+            UNION ALL
+            SELECT user_id, status, -1 FROM old_rows
+        ) AS changes
+        GROUP BY user_id, status HAVING sum(delta) <> 0 ORDER BY user_id, status
+        ON CONFLICT (user_id, status)
+        DO UPDATE SET count = to_do_list_taskstatuscount.count + EXCLUDED.count;
+    ELSE
+        -- Only existing rows: a cascading user delete may have removed them already
+        UPDATE to_do_list_taskstatuscount AS counts SET count = counts.count - deleted.tasks
+        FROM (
+            SELECT user_id, status, count(*) AS tasks FROM old_rows
+            GROUP BY user_id, status ORDER BY user_id, status
+        ) AS deleted
+        WHERE counts.user_id = deleted.user_id AND counts.status = deleted.status;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER to_do_list_task_status_count_insert
+    AFTER INSERT ON to_do_list_task REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION to_do_list_task_status_count_update();
+CREATE TRIGGER to_do_list_task_status_count_update
+    AFTER UPDATE ON to_do_list_task REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION to_do_list_task_status_count_update();
+CREATE TRIGGER to_do_list_task_status_count_delete
+    AFTER DELETE ON to_do_list_task REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION to_do_list_task_status_count_update();
+
+INSERT INTO to_do_list_taskstatuscount (user_id, status, count)
+SELECT user_id, status, count(*) FROM to_do_list_task GROUP BY user_id, status;
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS to_do_list_task_status_count_insert ON to_do_list_task;
+DROP TRIGGER IF EXISTS to_do_list_task_status_count_update ON to_do_list_task;
+DROP TRIGGER IF EXISTS to_do_list_task_status_count_delete ON to_do_list_task;
+DROP FUNCTION IF EXISTS to_do_list_task_status_count_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('to_do_list', '0007_claims_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('NEW', 'New'), ('IN_PROGRESS', 'In Progress'), ('COMPLETED', 'Completed')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_status_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Task status count',
+                'verbose_name_plural': 'Task status counts',
+                'constraints': [models.UniqueConstraint(fields=('user', 'status'), name='task_status_count_user_status')],
+            },
+        ),
+        PostgresOnly(migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL)),
+    ]
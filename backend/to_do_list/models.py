@@ -1,9 +1,15 @@
 from datetime import timedelta
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinLengthValidator
 
+from .caching import user_cache
+
+
 class User(AbstractUser):
     first_name = models.CharField(max_length=30, blank=False)
     last_name = models.CharField(max_length=30, blank=True)
@@ -19,12 +25,61 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user._loaded_username = user.__dict__.get('username')
+        return user
+
+    def username_changed(self):
+        """Whether the username differs from the one loaded (always, for users not loaded)."""
+        return self.__dict__.get('username') != getattr(self, '_loaded_username', None)
     
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['username']
-    
+
+
+class ClaimsUser(User):
+    """
+    A user built from access token claims by ClaimsJWTAuthentication. Fields
+    the token does not carry are deferred; the first access to any of them
+    loads them all from the cached user row.
+    """
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, db, user_id, username, is_active):
+        claims = {'id': user_id, 'username': username, 'is_active': is_active}
+        # from_db() takes the values in field order
+        names = [field.attname for field in cls._meta.concrete_fields if field.attname in claims]
+        return cls.from_db(db, names, [claims[name] for name in names])
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and from_queryset is None and deferred and set(fields) <= deferred:
+            self.load_fields()
+        else:
+            super().refresh_from_db(using, fields, from_queryset)
+
+    def load_fields(self):
+        self.set_fields(user_cache.get_or_set(self.pk, lambda: User.objects.using(DEFAULT_DB_ALIAS).get(pk=self.pk)))
+
+    async def aload_fields(self):
+        """`load_fields()` for async code, where deferred fields cannot load themselves."""
+        if self.get_deferred_fields():
+            self.set_fields(
+                await user_cache.aget_or_set(self.pk, lambda: User.objects.using(DEFAULT_DB_ALIAS).aget(pk=self.pk))
+            )
+
+    def set_fields(self, row):
+        for attname in self.get_deferred_fields():
+            setattr(self, attname, getattr(row, attname))
+
 
 class Task(models.Model):
     STATUS_CHOICES = [
@@ -48,13 +103,18 @@ class Task(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Weighted title (A) + description (B) document, kept up to date by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # How long after creation a task's title may be edited
+    TITLE_EDIT_WINDOW = timedelta(minutes=5)
     
     def __str__(self):
         return f"{self.title} ({self.status})"
     
     def can_edit_title(self):
         """Check if title can still be edited (within 5 minutes of creation)"""
-        return timezone.now() < self.created_at + timedelta(minutes=5)
+        return timezone.now() < self.created_at + self.TITLE_EDIT_WINDOW
     
     def can_change_to_new(self):
         """Check if status can be changed to NEW"""
@@ -64,7 +124,86 @@ class Task(models.Model):
         unique_together = ('user', 'title')
         indexes = [
             models.Index(fields=['title']),
-            models.Index(fields=['status']),
+            # Composite indexes matching TaskViewSet's hot paths; the trailing
+            # `-id` also serves cursor pagination's (created_at, id) keyset.
+            # Global list, default ordering
+            models.Index(fields=['-created_at', '-id'], name='task_created_id_idx'),
+            # my_tasks and ?user_id=
+            models.Index(fields=['user', '-created_at', '-id'], name='task_user_created_id_idx'),
+            # my_tasks?status=
+            models.Index(fields=['user', 'status', '-created_at'], name='task_user_status_created_idx'),
+            # list?status= (also covers plain status lookups)
+            models.Index(fields=['status', '-created_at'], name='task_status_created_idx'),
+            # sync: a user's changes in (updated_at, id) order
+            models.Index(fields=['user', 'updated_at', 'id'], name='task_user_updated_id_idx'),
+            GinIndex(fields=['search_vector'], name='task_search_vector_gin'),
+            # Trigram indexes on UPPER(...) serve both icontains (UPPER(col) LIKE ...)
+            # and the typo-tolerant trigram search; they need pg_trgm
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='task_title_trgm'),
+            GinIndex(OpClass(Upper('description'), name='gin_trgm_ops'), name='task_description_trgm'),
         ]
         verbose_name = 'Task'
-        verbose_name_plural = 'Tasks'    
\ No newline at end of file
+        verbose_name_plural = 'Tasks'
+
+
+class TaskTombstone(models.Model):
+    """Records a deleted task so that syncing clients can drop their copy."""
+    task_id = models.BigIntegerField()
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='task_tombstones'
+    )
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Task {self.task_id} (deleted)"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'id'], name='tombstone_user_deleted_id_idx'),
+        ]
+        verbose_name = 'Task tombstone'
+        verbose_name_plural = 'Task tombstones'
+
+
+class UserShard(models.Model):
+    """Directory entry placing a user's tasks on one of settings.TASK_SHARDS."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_shard'
+    )
+    shard = models.CharField(max_length=64)
+
+    def __str__(self):
+        return f"{self.user_id} on {self.shard}"
+
+    class Meta:
+        verbose_name = 'User shard'
+        verbose_name_plural = 'User shards'
+
+
+class TaskStatusCount(models.Model):
+    """
+    How many of a user's tasks have a status, kept by a database trigger on
+    the task table (see to_do_list.stats); lives on the user's shard.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='task_status_counts'
+    )
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} {self.status}: {self.count}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'status'], name='task_status_count_user_status'),
+        ]
+        verbose_name = 'Task status count'
+        verbose_name_plural = 'Task status counts'
@@ -0,0 +1,103 @@
+import logging
+import os
+import threading
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationListener:
+    """
+    Per-process thread LISTENing on a PostgreSQL channel over a dedicated
+    connection, handing every payload to `dispatch()`. If the process forks
+    after `start()` (gunicorn --preload), `ensure_started()` restarts the
+    thread in the child. `on_connect()` runs whenever the connection is
+    (re)established: notifications sent while disconnected are lost.
+    """
+    poll_interval = 1
+    reconnect_delay = 1
+    thread_name = 'notification-listener'
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.enabled = False
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.connected = threading.Event()
+
+    def start(self):
+        self.enabled = True
+        self.ensure_started()
+
+    def stop(self, timeout=None):
+        self.enabled = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._pid = None
+
+    def ensure_started(self):
+        if not self.enabled or self._pid == os.getpid() or connection.vendor != 'postgresql':
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self.connected.clear()
+            self._thread = threading.Thread(
+                target=self.run,
+                args=(connection.get_connection_params(),),
+                name=self.thread_name,
+                daemon=True
+            )
+            self._thread.start()
+
+    def run(self, params):
+        import psycopg
+
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg.connect(**params, autocommit=True)
+                conn.execute(f'LISTEN "{self.channel}"')
+                self.on_connect()
+                self.connected.set()
+
+                while not self._stop.is_set():
+                    # Returns after poll_interval so that stop() is noticed
+                    for notification in conn.notifies(timeout=self.poll_interval):
+                        self.dispatch(notification.payload)
+            except Exception:
+                logger.exception('%s lost its connection; reconnecting', self.thread_name)
+                self._stop.wait(self.reconnect_delay)
+            finally:
+                self.connected.clear()
+                if conn is not None:
+                    conn.close()
+
+    def on_connect(self):
+        pass
+
+    def dispatch(self, payload):
+        raise NotImplementedError
+
+    def notify(self, payload):
+        """Send `payload` on the channel (delivered to listeners when the transaction commits)."""
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def notify_many(self, payloads):
+        """`notify()` each of `payloads`, in one statement."""
+        if connection.vendor != 'postgresql' or not payloads:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload',
+                [self.channel, list(payloads)]
+            )
@@ -0,0 +1,82 @@
+from django.contrib.postgres.operations import CreateExtension
+from django.db.migrations.operations.base import Operation
+
+
+def extension_available(connection, name):
+    """Whether the PostgreSQL server ships (and can install) the extension."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_available_extensions WHERE name = %s', [name])
+        return cursor.fetchone() is not None
+
+
+def extension_installed(connection, name):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_extension WHERE extname = %s', [name])
+        return cursor.fetchone() is not None
+
+
+class PostgresOnly(Operation):
+    """
+    Runs the wrapped migration operation against PostgreSQL only.
+    The migration state is always updated, so other backends (e.g. SQLite
+    test runs) keep a model state consistent with `models.py`.
+    """
+    reversible = True
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    def deconstruct(self):
+        return (self.__class__.__qualname__, [self.operation], {})
+
+    def state_forwards(self, app_label, state):
+        self.operation.state_forwards(app_label, state)
+
+    def applies_to(self, connection):
+        return connection.vendor == 'postgresql'
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if self.applies_to(schema_editor.connection):
+            self.operation.database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if self.applies_to(schema_editor.connection):
+            self.operation.database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return f'{self.operation.describe()} (PostgreSQL only)'
+
+    @property
+    def migration_name_fragment(self):
+        return self.operation.migration_name_fragment
+
+
+class RequiresExtension(PostgresOnly):
+    """
+    Runs the wrapped operation only where the extension is installed, so
+    servers without it (some managed databases) still migrate cleanly.
+    """
+
+    def __init__(self, extension, operation):
+        self.extension = extension
+        super().__init__(operation)
+
+    def deconstruct(self):
+        return (self.__class__.__qualname__, [self.extension, self.operation], {})
+
+    def applies_to(self, connection):
+        return extension_installed(connection, self.extension)
+
+    def describe(self):
+        return f'{self.operation.describe()} (requires {self.extension})'
+
+
+class CreateExtensionIfAvailable(CreateExtension):
+    """CreateExtension that is a no-op when the server does not ship the extension."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        if connection.vendor == 'postgresql' and extension_available(connection, self.name):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,399 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, InvalidPage, Page, Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import IntegerField, Q
+from django.db.models.lookups import Exact, GreaterThan, GreaterThanOrEqual, LessThan, LessThanOrEqual
+from django.utils.functional import cached_property
+from rest_framework import filters
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .sharding import ScatteredQuerySet
+
+# Lookups keyset filters compare expressions with
+KEYSET_LOOKUPS = {
+    'exact': Exact, 'gt': GreaterThan, 'gte': GreaterThanOrEqual, 'lt': LessThan, 'lte': LessThanOrEqual,
+}
+
+
+def task_count_cache_key(user_id):
+    return f'tasks:count:user:{user_id}'
+
+
+class TaskPage(Page):
+    # Set when the total is an estimate and the next page was probed directly
+    has_more = None
+
+    def has_next(self):
+        if self.has_more is not None:
+            return self.has_more
+        return super().has_next()
+
+
+class TaskCountPaginator(DjangoPaginator):
+    """Django paginator whose total comes from a TaskPaginator count strategy."""
+
+    def __init__(self, object_list, per_page, counter, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.counter = counter
+        self.is_estimate = False
+
+    @cached_property
+    def count(self):
+        count, self.is_estimate = self.counter(self.object_list)
+        return count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # An estimated total may be short of the real row count, so pages past it stay valid
+            if self.is_estimate and int(number) > 1:
+                return int(number)
+            raise
+
+    def page(self, number):
+        if not self.count or not self.is_estimate:
+            return super().page(number)
+
+        # Probe one extra row to tell whether a next page exists
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+    async def apage(self, number):
+        """`page()` for async views; the count must already be known (see `TaskPaginator.aget_total`)."""
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        if not self.count or not self.is_estimate:
+            top = bottom + self.per_page
+            if top + self.orphans >= self.count:
+                top = self.count
+            return self._get_page([row async for row in self.object_list[bottom:top]], number, self)
+
+        rows = [row async for row in self.object_list[bottom:bottom + self.per_page + 1]]
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+    def _get_page(self, *args, **kwargs):
+        return TaskPage(*args, **kwargs)
+
+
+class TaskPaginator(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset mode.
+
+    Passing `?cursor=` (empty for the first page) switches to keyset
+    pagination: pages are located with a `WHERE (key, id) < (...)` predicate
+    instead of `OFFSET`, and no `COUNT(*)` is run. The `pagination` envelope
+    keeps the same keys; the page/count fields are null in cursor mode.
+
+    In page-number mode the total follows `settings.TASK_COUNT_STRATEGY`:
+    - 'exact': a full COUNT(*)
+    - 'capped': count at most TASK_COUNT_CAP rows and report the cap
+    - 'estimated': the planner's row estimate for unfiltered querysets, capped otherwise
+    Approximate totals are flagged with `is_estimate` in the envelope.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    cursor_mode = False
+    # (total, is_estimate) once counted, or seeded by the view
+    total = None
+    view = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_queryset_by_cursor(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset()` for async views, fetching rows with the async ORM."""
+        self.request = request
+        self.view = view
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if self.cursor_mode:
+            page_queryset, cursor = self.get_cursor_page_queryset(queryset, request, view)
+            return self.finish_cursor_page([row async for row in page_queryset], *cursor)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        page_number = self.get_page_number(request, paginator)
+        await self.aget_total(queryset)
+        try:
+            self.page = await paginator.apage(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return Response({
+                'pagination': {
+                    'next': self.next_link,
+                    'previous': self.previous_link,
+                    'current_page': None,
+                    'total_pages': None,
+                    'page_size': self.cursor_page_size,
+                    'total_items': None,
+                    'is_estimate': False
+                },
+                'results': data
+            })
+
+        paginator = self.page.paginator
+        total_pages = paginator.num_pages
+        if paginator.is_estimate:
+            total_pages = max(total_pages, self.page.number + self.page.has_next())
+        return Response({
+            'pagination': {
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'current_page': self.page.number,
+                'total_pages': total_pages,
+                'page_size': self.page_size,
+                'total_items': paginator.count,
+                'is_estimate': paginator.is_estimate
+            },
+            'results': data
+        })
+
+    def django_paginator_class(self, queryset, page_size):
+        return TaskCountPaginator(queryset, page_size, counter=self.get_total)
+
+    # Counting
+
+    def get_total(self, queryset, view=None):
+        """`count_queryset`, run at most once per request."""
+        if view is not None:
+            self.view = view
+        if self.total is None:
+            self.total = self.count_queryset(queryset)
+        return self.total
+
+    async def aget_total(self, queryset, view=None):
+        if view is not None:
+            self.view = view
+        if self.total is None:
+            self.total = await self.acount_queryset(queryset)
+        return self.total
+
+    def count_queryset(self, queryset):
+        """Returns `(total, is_estimate)` for the queryset being paginated."""
+        get_cache_key = getattr(self.view, 'get_count_cache_key', None)
+        cache_key = get_cache_key() if get_cache_key else None
+        if cache_key:
+            return cache.get_or_set(cache_key, queryset.count, settings.TASK_COUNT_CACHE_TIMEOUT), False
+
+        strategy = settings.TASK_COUNT_STRATEGY
+        cap = settings.TASK_COUNT_CAP
+        if strategy == 'estimated' and not queryset.query.where:
+            estimate = self.estimate_table_rows(queryset)
+            # Small tables are cheap to count exactly
+            if estimate is not None and estimate > cap:
+                return estimate, True
+            return queryset.count(), False
+
+        if strategy in ('capped', 'estimated'):
+            count = queryset[:cap + 1].count()
+            if count > cap:
+                return cap, True
+            return count, False
+
+        return queryset.count(), False
+
+    async def acount_queryset(self, queryset):
+        """`count_queryset()` for async views."""
+        get_cache_key = getattr(self.view, 'get_count_cache_key', None)
+        cache_key = get_cache_key() if get_cache_key else None
+        if cache_key:
+            count = await cache.aget(cache_key)
+            if count is None:
+                count = await queryset.acount()
+                await cache.aset(cache_key, count, settings.TASK_COUNT_CACHE_TIMEOUT)
+            return count, False
+
+        strategy = settings.TASK_COUNT_STRATEGY
+        cap = settings.TASK_COUNT_CAP
+        if strategy == 'estimated' and not queryset.query.where:
+            estimate = await sync_to_async(self.estimate_table_rows)(queryset)
+            if estimate is not None and estimate > cap:
+                return estimate, True
+            return await queryset.acount(), False
+
+        if strategy in ('capped', 'estimated'):
+            count = await queryset[:cap + 1].acount()
+            if count > cap:
+                return cap, True
+            return count, False
+
+        return await queryset.acount(), False
+
+    @staticmethod
+    def estimate_table_rows(queryset):
+        """Planner row estimate for the queryset's table, or None if unavailable."""
+        shard_querysets = getattr(queryset, 'shard_querysets', None)
+        if shard_querysets is not None:
+            # A ScatteredQuerySet: the table's rows on every shard
+            estimates = [TaskPaginator.estimate_table_rows(shard) for shard in shard_querysets()]
+            return None if None in estimates else sum(estimates)
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 until the table has been vacuumed or analyzed
+        if row is None or row[0] < 0:
+            return None
+        return row[0]
+
+    # Keyset pagination
+
+    def paginate_queryset_by_cursor(self, queryset, request, view):
+        page_queryset, cursor = self.get_cursor_page_queryset(queryset, request, view)
+        return self.finish_cursor_page(list(page_queryset), *cursor)
+
+    def get_cursor_page_queryset(self, queryset, request, view):
+        """
+        The slice holding the requested page plus one row (telling whether
+        another page follows), and the `(keys, position, reverse)` it was
+        located by.
+        """
+        self.cursor_page_size = self.get_page_size(request)
+        keys = self.get_ordering_keys(queryset, request, view)
+        position, reverse = self.decode_cursor(request, keys)
+
+        # Walking backwards means reading the index in the opposite direction
+        query_keys = [(name, desc != reverse) for name, desc in keys]
+        if position is not None:
+            # Compared as the shards order them when merging
+            expression = queryset.collated if isinstance(queryset, ScatteredQuerySet) else None
+            queryset = queryset.filter(self.keyset_filter(query_keys, position, expression))
+        queryset = queryset.order_by(*[('-' if desc else '') + name for name, desc in query_keys])
+        return queryset[:self.cursor_page_size + 1], (keys, position, reverse)
+
+    def finish_cursor_page(self, rows, keys, position, reverse):
+        has_following = len(rows) > self.cursor_page_size
+        rows = rows[:self.cursor_page_size]
+        if reverse:
+            rows.reverse()
+
+        # Moving forwards, there is a previous page whenever we started from a
+        # position; moving backwards, there is a next page by the same logic.
+        has_next = has_following if not reverse else position is not None
+        has_previous = position is not None if not reverse else has_following
+
+        self.next_link = None
+        self.previous_link = None
+        if has_next:
+            after = self.get_position(rows[-1], keys) if rows else position
+            self.next_link = self.encode_cursor(after, reverse=False)
+        if has_previous:
+            before = self.get_position(rows[0], keys) if rows else position
+            self.previous_link = self.encode_cursor(before, reverse=True)
+        return rows
+
+    def get_ordering_keys(self, queryset, request, view):
+        """
+        Resolve the active ordering (from `?ordering=` or the view default)
+        into `(field, descending)` pairs, with `id` appended as a tiebreaker.
+        """
+        ordering = filters.OrderingFilter().get_ordering(request, queryset, view) or ['-id']
+        keys = []
+        for term in ordering:
+            name = term.lstrip('-')
+            name = 'id' if name == 'pk' else name
+            if name not in [key for key, _ in keys]:
+                keys.append((name, term.startswith('-')))
+        if 'id' not in [name for name, _ in keys]:
+            keys.append(('id', keys[0][1]))
+        self.model = queryset.model
+        return keys
+
+    @staticmethod
+    def keyset_filter(keys, position, expression=None):
+        """
+        Lexicographic "comes after `position`" predicate over `keys`.
+        The leading `key0 <=/>= value0` bound is redundant but lets the database
+        seek straight into the index instead of filtering from its start.
+        `expression(name)`, if given, is what each key is compared as.
+        """
+        def compare(name, lookup, value):
+            if expression is None:
+                return Q(**{f'{name}__{lookup}': value})
+            return Q(KEYSET_LOOKUPS[lookup](expression(name), value))
+
+        first_name, first_desc = keys[0]
+        condition = Q()
+        for index, (name, desc) in enumerate(keys):
+            clause = compare(name, 'lt' if desc else 'gt', position[index])
+            for prior_name, prior_value in zip([key for key, _ in keys[:index]], position):
+                clause &= compare(prior_name, 'exact', prior_value)
+            condition |= clause
+        bound = compare(first_name, 'lte' if first_desc else 'gte', position[0])
+        return bound & condition
+
+    def get_position(self, obj, keys):
+        return [getattr(obj, name) for name, _ in keys]
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': [self._encode_value(value) for value in position]}
+        if reverse:
+            payload['r'] = 1
+        token = urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, keys):
+        """Returns (position, reverse); position is None on the first page."""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(token.encode('ascii')))
+            values = payload['p']
+            if not isinstance(values, list) or len(values) != len(keys):
+                raise ValueError('Cursor does not match the current ordering')
+            position = []
+            for (name, _), value in zip(keys, values):
+                field = self.model._meta.get_field(name)
+                # As _encode_value() writes them: ints for integer fields, strings otherwise
+                if type(value) is not (int if isinstance(field, IntegerField) else str):
+                    raise ValueError(f'Bad cursor value for {name}')
+                position.append(field.to_python(value))
+        except (TypeError, ValueError, KeyError, ValidationError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get('r'))
+
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
@@ -0,0 +1,61 @@
+import threading
+from collections import Counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Database connection metrics
+# ==============================
+# Each process counts the connections Django opens per alias. With
+# persistent connections that is the connection churn; with POSTGRES_POOL
+# it counts checkouts, and the pool reports its own churn and wait times.
+
+_connects = Counter()
+_connects_lock = threading.Lock()
+
+
+def count_connect(sender, connection, **kwargs):
+    with _connects_lock:
+        _connects[connection.alias] += 1
+
+
+connection_created.connect(count_connect, dispatch_uid='to_do_list.pooling.count_connect')
+
+
+def pool_stats(pool):
+    """Wait, checkout and churn figures of a psycopg ConnectionPool."""
+    stats = pool.get_stats()
+    size, available = stats.get('pool_size', 0), stats.get('pool_available', 0)
+    return {
+        'min_size': stats.get('pool_min', 0),
+        'max_size': stats.get('pool_max', 0),
+        'size': size,
+        'checked_out': size - available,
+        'available': available,
+        # Requests waiting for a connection right now
+        'waiting': stats.get('requests_waiting', 0),
+        'requests': stats.get('requests_num', 0),
+        'requests_queued': stats.get('requests_queued', 0),
+        'wait_ms': stats.get('requests_wait_ms', 0),
+        'timeouts': stats.get('requests_errors', 0),
+        'connections_opened': stats.get('connections_num', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+        'connection_errors': stats.get('connections_errors', 0),
+        'connect_ms': stats.get('connections_ms', 0),
+        'returns_bad': stats.get('returns_bad', 0),
+    }
+
+
+def connection_stats():
+    """Connection counters for every database alias in this worker."""
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        pool = getattr(connection, 'pool', None)
+        stats[alias] = {
+            'vendor': connection.vendor,
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'connects': _connects[alias],
+            'pool': pool_stats(pool) if pool else None,
+        }
+    return stats
@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+logger = logging.getLogger(__name__)
+
+# Token retention
+# ==============================
+# Every login outstands a refresh token row and every logout blacklists one;
+# neither is needed once the token has expired, since expired tokens fail
+# validation anyway. prune_expired_tokens() deletes them in small batches,
+# each in its own short transaction, so logins, refreshes and logouts never
+# wait long on its locks. Batches claim their rows with SKIP LOCKED, so
+# workers pruning at the same time split the work instead of queueing.
+#
+# Pruned JTIs stay in the workers' revoked token filters (to_do_list.blacklist)
+# until they are rebuilt; they can only cause lookups for expired tokens.
+
+
+def prune_expired_tokens(batch_size=None, max_batches=None, pause=0):
+    """
+    Delete outstanding tokens that have expired, with their blacklist entries.
+    Returns the rows removed per table, the batches run and the throughput.
+    """
+    batch_size = batch_size or settings.TOKEN_PRUNE_BATCH_SIZE
+    now = timezone.now()
+    removed = Counter()
+    batches = 0
+    started = time.monotonic()
+
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            # Tokens expire in roughly id order, so the oldest ids are the expired ones
+            ids = list(
+                OutstandingToken.objects.filter(expires_at__lte=now).order_by('id')
+                .select_for_update(skip_locked=True).values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            removed.update(OutstandingToken.objects.filter(id__in=ids).delete()[1])
+        batches += 1
+        if pause:
+            time.sleep(pause)
+
+    seconds = time.monotonic() - started
+    outstanding = removed[OutstandingToken._meta.label]
+    blacklisted = removed[BlacklistedToken._meta.label]
+    return {
+        'outstanding': outstanding,
+        'blacklisted': blacklisted,
+        'batches': batches,
+        'seconds': seconds,
+        'rows_per_second': (outstanding + blacklisted) / seconds if seconds else 0.0,
+    }
+
+
+class TokenPruner:
+    """
+    Per-worker thread running prune_expired_tokens() every
+    settings.TOKEN_PRUNE_INTERVAL seconds (0 disables it). `start()` is
+    called by the WSGI/ASGI entry points.
+    """
+    thread_name = 'token-pruner'
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.totals = Counter()
+        self.last_run = None
+
+    def start(self):
+        if not settings.TOKEN_PRUNE_INTERVAL or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name=self.thread_name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._pid = None
+
+    def run(self):
+        while not self._stop.wait(settings.TOKEN_PRUNE_INTERVAL):
+            try:
+                self.record(prune_expired_tokens())
+            except Exception:
+                logger.exception('%s failed; retrying in %ss', self.thread_name, settings.TOKEN_PRUNE_INTERVAL)
+            finally:
+                connection.close()
+
+    def record(self, result):
+        self.totals['runs'] += 1
+        for key in ('outstanding', 'blacklisted', 'batches'):
+            self.totals[key] += result[key]
+        self.last_run = {**result, 'finished_at': timezone.now().isoformat()}
+        if result['batches']:
+            logger.info(
+                'Pruned %(outstanding)d outstanding and %(blacklisted)d blacklisted tokens '
+                'in %(batches)d batches (%(rows_per_second).0f rows/s)', result
+            )
+
+    def get_stats(self):
+        return {**self.totals, 'interval': settings.TOKEN_PRUNE_INTERVAL, 'last_run': self.last_run}
+
+
+pruner = TokenPruner()
@@ -0,0 +1,141 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import User
+from .sharding import SHARDED_MODELS, is_sharded, shard_for_user
+
+# Read replicas
+# ==============================
+# Requests with a safe method read from one replica (settings.DATABASE_REPLICAS),
+# chosen once per request so all of its queries see the same server. Everything
+# else reads from the primary: unsafe requests, requests from clients that wrote
+# within DATABASE_REPLICA_PIN_SECONDS (see to_do_list.middleware), the rest of a
+# request once it has written, and code running outside a request.
+#
+# The two-tier caches are shared by every request, so they are only filled
+# with rows read from the primary: cache loaders read users and the shard
+# directory from it, and task payloads read on a replica are not cached.
+# Otherwise a lagging replica could cache a row older than a write (or an
+# active user after a deactivation) until the next eviction.
+#
+# Tasks and tombstones are read from and written to their user's shard when
+# the task table is sharded (see to_do_list.sharding): the shard of the
+# instance or user the query starts from, else the one the request was
+# routed to, else the default database. Shards have no replicas.
+
+_routing = ContextVar('to_do_list_db_routing', default=None)
+
+
+class RoutingState:
+    def __init__(self, replica=None):
+        # None reads from the primary
+        self.replica = replica
+        self.wrote = False
+        # Shard for task queries, set once the request's user is known
+        self.shard = None
+
+
+def is_sharded_model(model):
+    return model in SHARDED_MODELS and is_sharded()
+
+
+def start_routing(use_replica):
+    """Route the current request's reads; returns `(state, token)` for `stop_routing()`."""
+    replicas = settings.DATABASE_REPLICAS
+    state = RoutingState(random.choice(replicas) if use_replica and replicas else None)
+    return state, _routing.set(state)
+
+
+def stop_routing(token):
+    _routing.reset(token)
+
+
+@contextmanager
+def routing_to_shard(alias):
+    """
+    Route task queries to shard `alias` outside a request's routing, e.g. while
+    a streamed response is generated after the middleware has stopped routing.
+    """
+    state, token = start_routing(use_replica=False)
+    state.shard = alias
+    try:
+        yield
+    finally:
+        stop_routing(token)
+
+
+@contextmanager
+def routing_subrequest(use_replica):
+    """
+    Route a sub-request of a batch (see to_do_list.batch) as a request of its
+    own; its writes pin the rest of the enclosing request to the primary.
+    """
+    outer = _routing.get()
+    state, token = start_routing(use_replica)
+    try:
+        yield state
+    finally:
+        stop_routing(token)
+        if outer is not None and state.wrote:
+            outer.wrote = True
+            outer.replica = None
+
+
+def use_primary():
+    """Read the rest of the current request from the primary."""
+    state = _routing.get()
+    if state is not None:
+        state.replica = None
+
+
+def route_to_shard(alias):
+    """Send the current request's task queries to shard `alias`."""
+    state = _routing.get()
+    if state is not None:
+        state.shard = alias
+
+
+def task_shard(model, hints):
+    instance = hints.get('instance')
+    if isinstance(instance, model):
+        return instance._state.db or shard_for_user(instance.user_id)
+    if isinstance(instance, User):
+        return shard_for_user(instance.pk)
+    state = _routing.get()
+    if state is None or state.shard is None:
+        return DEFAULT_DB_ALIAS
+    return state.shard
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if is_sharded_model(model):
+            return task_shard(model, hints)
+        state = _routing.get()
+        if state is None or state.replica is None:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            # Later reads must see this write
+            state.wrote = True
+            state.replica = None
+        if is_sharded_model(model):
+            return task_shard(model, hints)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas apply the primary's schema through replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
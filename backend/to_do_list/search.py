@@ -0,0 +1,134 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.functions import Greatest, Upper
+from rest_framework import filters
+
+from .sharding import is_sharded
+
+SEARCH_CONFIG = 'english'
+RANK_ANNOTATION = 'search_rank'
+
+
+class IContainsSearchBackend:
+    """`ILIKE '%term%'` over the given fields. Works everywhere, indexes nothing."""
+    name = 'icontains'
+
+    def search(self, queryset, term, fields):
+        return queryset.filter(reduce(or_, (Q(**{f'{field}__icontains': term}) for field in fields)))
+
+
+class FullTextSearchBackend:
+    """
+    Prefix-matching full-text search over `Task.search_vector` (GIN indexed).
+    Every word in the term must match the start of a word in the title or
+    description; results are annotated with a relevance rank.
+    """
+    name = 'fulltext'
+
+    def search(self, queryset, term, fields):
+        query = self.build_query(term)
+        if query is None:
+            return queryset.none()
+
+        queryset = queryset.filter(search_vector=query)
+        if RANK_ANNOTATION not in queryset.query.annotations:
+            queryset = queryset.annotate(**{RANK_ANNOTATION: SearchRank(F('search_vector'), query)})
+        return queryset
+
+    @staticmethod
+    def build_query(term):
+        words = re.findall(r'\w+', term)
+        if not words:
+            return None
+        return SearchQuery(
+            ' & '.join(f'{word}:*' for word in words),
+            search_type='raw',
+            config=SEARCH_CONFIG
+        )
+
+
+class TrigramSearchBackend:
+    """
+    pg_trgm search: substring matches (icontains) plus typo-tolerant word
+    similarity above `settings.TASK_TRIGRAM_THRESHOLD`, both served by the
+    GIN trigram indexes on UPPER(title) and UPPER(description).
+    Results are annotated with the best word similarity across the fields.
+    """
+    name = 'trigram'
+
+    def search(self, queryset, term, fields):
+        term = term.strip()
+        if not term:
+            return queryset.none()
+        # Searches over every user's tasks run on all shards
+        for alias in settings.TASK_SHARDS if is_sharded() else [queryset.db]:
+            self.set_threshold(connections[alias], settings.TASK_TRIGRAM_THRESHOLD)
+
+        condition = Q()
+        aliases = {}
+        for field in fields:
+            alias = f'{field}_upper'
+            aliases[alias] = Upper(field)
+            condition |= Q(**{f'{field}__icontains': term})
+            condition |= Q(**{f'{alias}__trigram_word_similar': term.upper()})
+        queryset = queryset.alias(**aliases).filter(condition)
+
+        if RANK_ANNOTATION not in queryset.query.annotations:
+            similarities = [TrigramWordSimilarity(term, field) for field in fields]
+            rank = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+            queryset = queryset.annotate(**{RANK_ANNOTATION: rank})
+        return queryset
+
+    @staticmethod
+    def set_threshold(connection, threshold):
+        """The `%>` operator reads its cut-off from a session setting rather than an argument."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)",
+                [str(threshold)]
+            )
+
+
+SEARCH_BACKENDS = {
+    backend.name: backend
+    for backend in (IContainsSearchBackend(), FullTextSearchBackend(), TrigramSearchBackend())
+}
+
+
+def get_search_backend(queryset):
+    """
+    Backend named by `settings.TASK_SEARCH_BACKEND`. Databases other than
+    PostgreSQL (SQLite test runs) always fall back to icontains.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return SEARCH_BACKENDS['icontains']
+    return SEARCH_BACKENDS[settings.TASK_SEARCH_BACKEND]
+
+
+def order_by_rank(queryset, request, view):
+    """Most relevant matches first, unless the client asked for an explicit ordering."""
+    if RANK_ANNOTATION not in queryset.query.annotations or request.query_params.get('ordering'):
+        return queryset
+    return queryset.order_by(f'-{RANK_ANNOTATION}', *getattr(view, 'ordering', None) or [])
+
+
+class TaskSearchFilter(filters.SearchFilter):
+    """`?search=` routed through the configured search backend."""
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+
+        backend = get_search_backend(queryset)
+        if backend.name == IContainsSearchBackend.name:
+            return super().filter_queryset(request, queryset, view)
+        queryset = backend.search(queryset, ' '.join(search_terms), search_fields)
+        return order_by_rank(queryset, request, view)
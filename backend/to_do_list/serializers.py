@@ -2,6 +2,10 @@ from rest_framework import serializers
 from .models import User, Task
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .authentication import ClaimsRefreshToken, get_cached_user, set_user_claims
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -55,7 +59,45 @@ class LoginSerializer(serializers.Serializer):
             raise serializers.ValidationError('User account is disabled.')
         data['user'] = user
         return data
-    
+
+
+class CookieTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Decodes the refresh token once and checks its user against the cached
+    user row, which also supplies the profile returned with the new access
+    token and refreshes the access token's user claims.
+    """
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = get_cached_user(refresh.payload.get(api_settings.USER_ID_CLAIM))
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        access = refresh.access_token
+        set_user_claims(access, user)
+        data = {
+            'access': str(access),
+            'user': {
+                'id': user.id,
+                'username': user.username,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+            },
+        }
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+
+        return data
+
 
 class TaskSerializer(serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source='user.username')
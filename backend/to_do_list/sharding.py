@@ -0,0 +1,344 @@
+import heapq
+from functools import cmp_to_key
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import CharField, Count, F, Max, Min, Sum, TextField
+from django.db.models.functions import Collate
+
+from .caching import TwoTierCache
+from .models import Task, TaskStatusCount, TaskTombstone, User, UserShard
+
+# Task sharding
+# ==============================
+# With more than one alias in settings.TASK_SHARDS, each user's tasks,
+# tombstones and status counters live on one shard, recorded in the
+# UserShard directory on the default database. Shards other than default
+# hold a copy of their users' rows for the tasks' foreign key. Task and
+# tombstone ids are drawn from the default database's sequences, so they are
+# unique across shards and rows keep them when a user moves. Counters are
+# not copied: the moved tasks' inserts recount them on the target shard.
+#
+# Requests route task queries to a shard through to_do_list.routers; queries
+# spanning every user (the global list, search, the global event feed) run
+# on all shards through ScatteredQuerySet.
+
+# Raw deletes go in this order: deleting tasks updates their counters
+SHARDED_MODELS = (Task, TaskTombstone, TaskStatusCount)
+
+user_shard_cache = TwoTierCache('user-shards')
+
+
+def is_sharded():
+    return len(settings.TASK_SHARDS) > 1
+
+
+def shard_for_user(user_id):
+    """Alias holding the user's tasks."""
+    if not is_sharded():
+        return DEFAULT_DB_ALIAS
+    return user_shard_cache.get_or_set(user_id, lambda: place_user(user_id))
+
+
+def place_user(user_id):
+    """The user's shard from the directory, assigning one on first use."""
+    # From the primary: the result is cached for every request
+    shard = UserShard.objects.using(DEFAULT_DB_ALIAS).filter(user_id=user_id).values_list('shard', flat=True).first()
+    if shard is not None:
+        return shard
+
+    if Task.objects.using(DEFAULT_DB_ALIAS).filter(user_id=user_id).exists():
+        # Users from before sharding keep their tasks where they are
+        shard = DEFAULT_DB_ALIAS
+    else:
+        shard = settings.TASK_SHARDS[user_id % len(settings.TASK_SHARDS)]
+    copy_user(user_id, shard)
+    return UserShard.objects.get_or_create(user_id=user_id, defaults={'shard': shard})[0].shard
+
+
+def placed_shard(user_id):
+    """The user's shard if they have been given one, without placing them; else None."""
+    if not is_sharded():
+        return DEFAULT_DB_ALIAS
+    return user_shard_cache.get(user_id) or UserShard.objects.filter(
+        user_id=user_id
+    ).values_list('shard', flat=True).first()
+
+
+def copy_user(user_id, alias):
+    """
+    Make sure the shard has the user's row for its tasks to reference; later
+    saves of the user are written to it by update_user_copy().
+    """
+    if alias == DEFAULT_DB_ALIAS:
+        return
+    user = User.objects.using(DEFAULT_DB_ALIAS).get(pk=user_id)
+    User.objects.using(alias).bulk_create([user], ignore_conflicts=True)
+
+
+def update_user_copy(user, update_fields=None):
+    """
+    Write the user's saved fields (`update_fields`, or all of them) to the
+    copy of their row on their shard: task payloads read the owner's
+    username through it.
+    """
+    shard = placed_shard(user.id)
+    if shard in (None, DEFAULT_DB_ALIAS):
+        return
+    fields = [
+        field for field in User._meta.concrete_fields
+        if not field.primary_key and (update_fields is None or field.name in update_fields)
+    ]
+    if fields:
+        User.objects.using(shard).filter(pk=user.pk).update(
+            **{field.attname: getattr(user, field.attname) for field in fields}
+        )
+
+
+def find_task_shard(task_id, preferred=None):
+    """Alias holding the task, trying `preferred` first; None if no shard has it."""
+    aliases = sorted(settings.TASK_SHARDS, key=lambda alias: alias != preferred)
+    for alias in aliases:
+        if Task.objects.using(alias).filter(pk=task_id).exists():
+            return alias
+    return None
+
+
+def allocate_ids(model, count):
+    """`count` ids from the model's sequence on the default database."""
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+            [model._meta.db_table, count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def move_user(user_id, target):
+    """
+    Move the user's tasks and tombstones from every other shard to `target`
+    and point the directory at it. Returns the number of rows moved.
+
+    New tasks wait on the lock of the user's row on the source shard and
+    edits on the locks of the task rows. A write routed before the directory
+    changed can still land on the old shard; moving the user again collects it.
+    """
+    copy_user(user_id, target)
+    moved = 0
+    for source in settings.TASK_SHARDS:
+        if source != target:
+            moved += _move_rows(user_id, source, target)
+
+    UserShard.objects.update_or_create(user_id=user_id, defaults={'shard': target})
+    user_shard_cache.delete(user_id)
+    return moved
+
+
+def _move_rows(user_id, source, target):
+    with transaction.atomic(using=source):
+        locked = User.objects.using(source).select_for_update().filter(pk=user_id).values_list('pk', flat=True)
+        if not list(locked):
+            return 0
+        tasks = list(Task.objects.using(source).select_for_update().filter(user_id=user_id))
+        tombstones = list(TaskTombstone.objects.using(source).filter(user_id=user_id))
+
+        with transaction.atomic(using=target):
+            # The copy commits before the source rows go, so an interrupted
+            # move leaves them on both shards: replace any earlier copy
+            with connections[target].cursor() as cursor:
+                for model, rows in ((Task, tasks), (TaskTombstone, tombstones)):
+                    cursor.execute(
+                        f'DELETE FROM {model._meta.db_table} WHERE id = ANY(%s)', [[row.pk for row in rows]]
+                    )
+            stamps = [(task.created_at, task.updated_at) for task in tasks]
+            Task.objects.using(target).bulk_create(tasks)
+            # bulk_create stamps auto_now(_add) fields with the current time
+            for task, (created_at, updated_at) in zip(tasks, stamps):
+                task.created_at, task.updated_at = created_at, updated_at
+            Task.objects.using(target).bulk_update(tasks, ['created_at', 'updated_at'])
+            TaskTombstone.objects.using(target).bulk_create(tombstones)
+
+        # Raw deletes: signals would record the moved tasks as deleted
+        with connections[source].cursor() as cursor:
+            for model in SHARDED_MODELS:
+                cursor.execute(f'DELETE FROM {model._meta.db_table} WHERE user_id = %s', [user_id])
+            if source != DEFAULT_DB_ALIAS:
+                cursor.execute(f'DELETE FROM {User._meta.db_table} WHERE id = %s', [user_id])
+    return len(tasks) + len(tombstones)
+
+
+def delete_user_data(user_id):
+    """Drop a deleted user's rows from their shard (the default database cascades itself)."""
+    shard = UserShard.objects.filter(user_id=user_id).values_list('shard', flat=True).first()
+    if shard is None or shard == DEFAULT_DB_ALIAS:
+        return
+    with transaction.atomic(using=shard), connections[shard].cursor() as cursor:
+        for model in SHARDED_MODELS:
+            cursor.execute(f'DELETE FROM {model._meta.db_table} WHERE user_id = %s', [user_id])
+        cursor.execute(f'DELETE FROM {User._meta.db_table} WHERE id = %s', [user_id])
+    user_shard_cache.delete(user_id)
+
+
+def scatter(queryset):
+    """The queryset over every shard (or as it is, when not sharded)."""
+    if not is_sharded():
+        return queryset
+    return ScatteredQuerySet(queryset, settings.TASK_SHARDS)
+
+
+class ScatteredQuerySet:
+    """
+    Runs a queryset on each of `aliases` and merges the rows in the
+    queryset's ordering. Slicing fetches each shard's first `stop` rows and
+    k-way merges them, so deep offsets cost `stop` rows per shard; cursor
+    pagination keeps that to a page per shard. Supports the queryset API
+    used by the task views, paginator, ETags and sync.
+
+    Rows are merged by comparing their values in Python, which orders
+    strings by code point: the order of the "C" collation, not of the
+    database's default one. Shards therefore sort text columns in
+    `text_collation`, and keyset filters on a ScatteredQuerySet must compare
+    them in it too (see collated()). Such orderings cannot use the columns'
+    indexes.
+    """
+    chained_methods = frozenset({
+        'all', 'alias', 'annotate', 'defer', 'exclude', 'filter', 'none', 'only',
+        'order_by', 'select_related',
+    })
+    combined_aggregates = {Count: sum, Sum: sum, Max: max, Min: min}
+    text_collation = 'C'
+
+    def __init__(self, queryset, aliases, start=0, stop=None):
+        self.queryset = queryset
+        self.aliases = list(aliases)
+        self.start = start
+        self.stop = stop
+
+    @property
+    def query(self):
+        return self.queryset.query
+
+    @property
+    def model(self):
+        return self.queryset.model
+
+    @property
+    def ordered(self):
+        return self.queryset.ordered
+
+    def __getattr__(self, name):
+        if name not in self.chained_methods:
+            raise AttributeError(f'{type(self).__name__} does not support {name}()')
+        if self.start or self.stop is not None:
+            raise TypeError(f'Cannot call {name}() once a slice has been taken')
+        method = getattr(self.queryset, name)
+
+        def chained(*args, **kwargs):
+            return ScatteredQuerySet(method(*args, **kwargs), self.aliases, self.start, self.stop)
+        return chained
+
+    def shard_querysets(self):
+        """The queryset on each shard, limited to the rows a slice could need."""
+        queryset = self.queryset
+        keys = self.ordering_keys()
+        if any(isinstance(self.collated(name), Collate) for name, _ in keys):
+            queryset = queryset.order_by(*[
+                self.collated(name).desc() if descending else self.collated(name).asc()
+                for name, descending in keys
+            ])
+        return [
+            queryset.using(alias)[:self.stop] if self.stop is not None else queryset.using(alias)
+            for alias in self.aliases
+        ]
+
+    def collated(self, name):
+        """The expression rows are merged by for the field: text in `text_collation`."""
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # An annotation
+            return F(name)
+        if isinstance(field, (CharField, TextField)):
+            return Collate(F(name), self.text_collation)
+        return F(name)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return list(self[key:key + 1])[0]
+        if key.step is not None or (key.start or 0) < 0 or (key.stop or 0) < 0:
+            raise ValueError('ScatteredQuerySet supports non-negative slices without a step')
+        start = self.start + (key.start or 0)
+        stop = self.stop
+        if key.stop is not None:
+            stop = self.start + key.stop if stop is None else min(stop, self.start + key.stop)
+        return ScatteredQuerySet(self.queryset, self.aliases, start, stop)
+
+    def __iter__(self):
+        rows = [iter(queryset) for queryset in self.shard_querysets()]
+        key = self.sort_key()
+        merged = heapq.merge(*rows, key=key) if key else (row for shard in rows for row in shard)
+        return islice(merged, self.start, self.stop)
+
+    async def __aiter__(self):
+        for row in await sync_to_async(list)(self):
+            yield row
+
+    def iterator(self, chunk_size=None):
+        """Like __iter__, but streaming each shard through a server-side cursor."""
+        rows = [queryset.iterator(chunk_size=chunk_size) for queryset in self.shard_querysets()]
+        key = self.sort_key()
+        merged = heapq.merge(*rows, key=key) if key else (row for shard in rows for row in shard)
+        return islice(merged, self.start, self.stop)
+
+    def ordering_keys(self):
+        """The queryset's ordering as `(field name, descending)` pairs."""
+        query = self.queryset.query
+        ordering = query.order_by or (query.default_ordering and query.get_meta().ordering) or []
+        keys = []
+        for term in ordering:
+            if not isinstance(term, str):
+                raise ValueError('ScatteredQuerySet orders by field names only')
+            name = term.lstrip('-')
+            keys.append(('id' if name == 'pk' else name, term.startswith('-')))
+        return keys
+
+    def sort_key(self):
+        """Key ordering rows as the shards' ORDER BY does, or None if unordered."""
+        keys = self.ordering_keys()
+        if not keys:
+            return None
+
+        def compare(first, second):
+            for name, descending in keys:
+                a, b = getattr(first, name), getattr(second, name)
+                if a != b:
+                    return (1 if a > b else -1) * (-1 if descending else 1)
+            return 0
+        return cmp_to_key(compare)
+
+    def count(self):
+        total = sum(queryset.count() for queryset in self.shard_querysets())
+        if self.stop is not None:
+            total = min(total, self.stop)
+        return max(0, total - self.start)
+
+    async def acount(self):
+        return await sync_to_async(self.count)()
+
+    def aggregate(self, **aggregates):
+        """Per-shard aggregates, combined; supports Count, Sum, Max and Min."""
+        for name, aggregate in aggregates.items():
+            if type(aggregate) not in self.combined_aggregates:
+                raise ValueError(f'Cannot combine {type(aggregate).__name__} across shards')
+        results = [queryset.aggregate(**aggregates) for queryset in self.shard_querysets()]
+        combined = {}
+        for name, aggregate in aggregates.items():
+            values = [result[name] for result in results if result[name] is not None]
+            combined[name] = self.combined_aggregates[type(aggregate)](values) if values else None
+        return combined
+
+    async def aaggregate(self, **aggregates):
+        return await sync_to_async(self.aggregate)(**aggregates)
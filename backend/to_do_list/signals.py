@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from .blacklist import revoked_tokens
+from .caching import (
+    invalidate_task_responses, task_payload_cache, user_auth_cache, user_cache, user_payload_cache
+)
+from .events import hub as task_events
+from .models import Task, TaskTombstone, User
+from .pagination import task_count_cache_key
+from .serializers import TaskSerializer
+from .sharding import allocate_ids, delete_user_data, is_sharded, placed_shard, update_user_copy
+
+
+def invalidate_task_count(user_id):
+    key = task_count_cache_key(user_id)
+    cache.delete(key)
+    # Drop it again once committed, in case a reader cached the old total meanwhile
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=TaskTombstone)
+def assign_global_id(sender, instance, **kwargs):
+    # Ids must be unique across shards (see to_do_list.sharding)
+    if instance.pk is None and is_sharded():
+        instance.pk = allocate_ids(sender, 1)[0]
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    if created:
+        invalidate_task_count(instance.user_id)
+    invalidate_task_responses(instance.user_id)
+    task_payload_cache.delete(instance.id)
+    task_events.publish(
+        'created' if created else 'updated', instance.id, instance.user_id,
+        (instance.updated_at, instance.id), TaskSerializer(instance).data
+    )
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, using, origin=None, **kwargs):
+    # Syncing clients learn about deletes from tombstones; a deleted user's tasks need none
+    if not isinstance(origin, User):
+        # On the task's shard
+        tombstone = TaskTombstone.objects.using(using).create(task_id=instance.id, user_id=instance.user_id)
+        task_events.publish(
+            'deleted', instance.id, instance.user_id, (tombstone.deleted_at, tombstone.id)
+        )
+    invalidate_task_count(instance.user_id)
+    invalidate_task_responses(instance.user_id)
+    task_payload_cache.delete(instance.id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, using, update_fields=None, **kwargs):
+    # Task responses embed the owner's username, read on the tasks' shard
+    if not created and using == DEFAULT_DB_ALIAS:
+        update_user_copy(instance, update_fields)
+        if instance.username_changed():
+            # Cached task payloads embed it too. Users not yet placed on a
+            # shard can only have tasks on default
+            owned = Task.objects.using(placed_shard(instance.id) or DEFAULT_DB_ALIAS).filter(user_id=instance.id)
+            task_ids = list(owned.values_list('id', flat=True))
+            if task_ids:
+                task_payload_cache.delete_many(task_ids)
+    instance._loaded_username = instance.__dict__.get('username')
+    invalidate_task_responses(instance.id)
+    # Deactivation revokes the user's access tokens
+    user_auth_cache.delete(instance.id)
+    user_cache.delete(instance.id)
+    user_payload_cache.delete(instance.id)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # Tasks on other shards are out of reach of the delete's cascade
+    if is_sharded():
+        delete_user_data(instance.id)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    user_auth_cache.delete(instance.id)
+    user_cache.delete(instance.id)
+    user_payload_cache.delete(instance.id)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance, created, **kwargs):
+    if created:
+        revoked_tokens.revoke(instance.token.jti)
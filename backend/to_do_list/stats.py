@@ -0,0 +1,65 @@
+from django.db import connections, transaction
+from django.db.models import Count
+
+from .models import Task, TaskStatusCount
+
+# Task statistics
+# ==============================
+# TaskStatusCount holds each user's task count per status. On PostgreSQL,
+# statement-level triggers on the task table (migration 0008) keep it in the
+# same transaction as every insert, status change and delete, however the
+# rows are written: saves, to_do_list.bulk's raw SQL, queryset and admin
+# deletes, cascades and shard moves. Reading a user's statistics is then one
+# indexed lookup of at most one row per status. reconcile_task_counts()
+# repairs counters that drifted, e.g. while the triggers were disabled.
+# Other backends have no triggers and count the tasks instead.
+
+
+def task_status_counts(user_id):
+    """`{status: count}` of the user's tasks, for every status."""
+    counts = dict.fromkeys(dict(Task.STATUS_CHOICES), 0)
+    counters = TaskStatusCount.objects.filter(user_id=user_id)
+    if connections[counters.db].vendor == 'postgresql':
+        counts.update(counters.values_list('status', 'count'))
+    else:
+        counts.update(
+            Task.objects.filter(user_id=user_id).order_by().values_list('status').annotate(Count('id'))
+        )
+    return counts
+
+
+def reconcile_task_counts(alias, user_ids, dry_run=False):
+    """
+    Recount the tasks of `user_ids` on `alias` and correct their counters.
+    Returns the counters that were wrong, as `{(user_id, status): (stored, actual)}`.
+    """
+    with transaction.atomic(using=alias):
+        with connections[alias].cursor() as cursor:
+            # Conflicts with the triggers' ROW EXCLUSIVE lock: task writes
+            # whose counters are already updated commit (and are counted)
+            # before the lock is granted, later ones wait for this batch
+            cursor.execute(f'LOCK TABLE {TaskStatusCount._meta.db_table} IN SHARE ROW EXCLUSIVE MODE')
+        actual = {
+            (user_id, status): count
+            for user_id, status, count in Task.objects.using(alias).filter(user_id__in=user_ids)
+            .order_by().values_list('user_id', 'status').annotate(Count('id'))
+        }
+        stored = {
+            (user_id, status): count
+            for user_id, status, count in TaskStatusCount.objects.using(alias).filter(user_id__in=user_ids)
+            .values_list('user_id', 'status', 'count')
+        }
+        drift = {
+            key: (stored.get(key, 0), actual.get(key, 0))
+            for key in actual.keys() | stored.keys()
+            if stored.get(key, 0) != actual.get(key, 0)
+        }
+        if drift and not dry_run:
+            TaskStatusCount.objects.using(alias).bulk_create(
+                [
+                    TaskStatusCount(user_id=user_id, status=status, count=count)
+                    for (user_id, status), (_, count) in drift.items()
+                ],
+                update_conflicts=True, unique_fields=['user', 'status'], update_fields=['count']
+            )
+    return drift
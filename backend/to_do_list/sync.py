@@ -0,0 +1,112 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import TaskTombstone
+from .pagination import TaskPaginator
+from .routers import use_primary
+
+# Delta sync
+# ==============================
+# A watermark records how far a client has read two change streams, each in
+# (timestamp, id) order: the user's tasks by updated_at and their tombstones
+# by deleted_at. Each sync returns the rows past both positions and the
+# watermark to send next time.
+
+TASK_KEYS = [('updated_at', False), ('id', False)]
+TOMBSTONE_KEYS = [('deleted_at', False), ('id', False)]
+invalid_watermark_message = 'Invalid watermark'
+
+
+def encode_watermark(tasks_position, tombstones_position):
+    payload = {
+        't': _encode_position(tasks_position),
+        'd': _encode_position(tombstones_position),
+    }
+    return urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+
+def decode_watermark(token):
+    """Returns `(tasks_position, tombstones_position)`; both are None for an empty watermark."""
+    if not token:
+        return None, None
+    try:
+        payload = json.loads(urlsafe_b64decode(token.encode('ascii')))
+        return _decode_position(payload['t']), _decode_position(payload['d'])
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise ValidationError({'since': [invalid_watermark_message]})
+
+
+def _encode_position(position):
+    if position is None:
+        return None
+    moment, row_id = position
+    return [moment.isoformat(), row_id]
+
+
+def _decode_position(value):
+    if value is None:
+        return None
+    moment, row_id = value
+    moment = parse_datetime(moment)
+    if moment is None or not isinstance(row_id, int):
+        raise ValueError('Malformed watermark position')
+    return moment, row_id
+
+
+def changed_since(queryset, keys, position, cutoff, limit):
+    """
+    Up to `limit` rows past `position` in `keys` order, and whether more follow.
+    Rows stamped after `cutoff` are left for the next sync: a transaction that
+    stamped an earlier time may not have committed yet, and reading past it
+    would move the watermark beyond rows the client never saw.
+    """
+    first_key = keys[0][0]
+    queryset = queryset.filter(**{f'{first_key}__lte': cutoff})
+    if position is not None:
+        queryset = queryset.filter(TaskPaginator.keyset_filter(keys, position))
+    rows = list(queryset.order_by(*[name for name, _ in keys])[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def sync_changes(tasks, tombstones, since, cutoff, limit):
+    """
+    Rows of the `tasks` and `tombstones` querysets changed after the `since`
+    positions (a decoded watermark) and up to `cutoff`.
+    Returns `(tasks, tombstones, positions, has_more)`, where `positions`
+    is the watermark to resume from.
+    """
+    tasks_position, tombstones_position = since
+    tasks, more_tasks = changed_since(tasks, TASK_KEYS, tasks_position, cutoff, limit)
+    tombstones, more_tombstones = changed_since(tombstones, TOMBSTONE_KEYS, tombstones_position, cutoff, limit)
+
+    if tasks:
+        tasks_position = (tasks[-1].updated_at, tasks[-1].id)
+    if tombstones:
+        tombstones_position = (tombstones[-1].deleted_at, tombstones[-1].id)
+    return tasks, tombstones, (tasks_position, tombstones_position), more_tasks or more_tombstones
+
+
+def sync_tasks(queryset, user, since, limit):
+    """
+    Tasks of `queryset` (the user's, already planned for rendering) changed
+    after the `since` watermark, with the ids of tasks deleted since then.
+    Returns `(tasks, deleted_ids, watermark, has_more)`.
+    """
+    # A lagging replica could hide changes stamped before the cutoff, which
+    # the watermark would then move past for good
+    use_primary()
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_SYNC_SETTLE_SECONDS)
+    tasks, tombstones, positions, has_more = sync_changes(
+        queryset,
+        TaskTombstone.objects.filter(user=user).only('task_id', 'deleted_at'),
+        decode_watermark(since),
+        cutoff,
+        limit
+    )
+    return tasks, [tombstone.task_id for tombstone in tombstones], encode_watermark(*positions), has_more
@@ -0,0 +1,121 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase
+from to_do_list.async_views import AsyncTaskViewSet, AsyncUserViewSet
+from to_do_list.authentication import ClaimsRefreshToken
+from to_do_list.caching import (
+    ALL_TASKS_SCOPE, task_payload_cache, task_version_key, user_auth_cache, user_cache, user_payload_cache
+)
+from to_do_list.models import Task, User
+from to_do_list.views import TaskViewSet, UserViewSet
+
+
+class AsyncViewSetTests(TestCase):
+    """The async viewsets must answer exactly like the sync ones they replace under ASGI."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.other_user = other_user = User.objects.create_user(
+            username='otheruser',
+            password='otherpass123',
+            first_name='Other'
+        )
+        statuses = ['NEW', 'IN_PROGRESS', 'COMPLETED']
+        for i in range(15):
+            Task.objects.create(
+                user=self.user if i % 2 else other_user,
+                title=f'Task {i}',
+                status=statuses[i % 3]
+            )
+        self.task = Task.objects.filter(user=self.user).first()
+        self.factory = AsyncRequestFactory()
+        self.headers = {'Authorization': f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}'}
+
+    def clear_caches(self):
+        # List ETags are derived from the task versions, which must survive
+        keys = [task_version_key(scope) for scope in (ALL_TASKS_SCOPE, self.user.id, self.other_user.id)]
+        versions = cache.get_many(keys)
+        cache.clear()
+        cache.set_many(versions, None)
+        for two_tier in (task_payload_cache, user_auth_cache, user_cache, user_payload_cache):
+            two_tier.local.clear()
+
+    async def get(self, viewset, actions, path, params=None, headers=None, **kwargs):
+        request = self.factory.get(path, params, headers=self.headers if headers is None else headers)
+        view = viewset.as_view(actions)
+        if iscoroutinefunction(view):
+            response = await view(request, **kwargs)
+        else:
+            response = await sync_to_async(view)(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    async def assertSameResponse(self, viewsets, actions, path, params=None, **kwargs):
+        sync_viewset, async_viewset = viewsets
+        self.clear_caches()
+        sync_response = await self.get(sync_viewset, actions, path, params, **kwargs)
+        self.clear_caches()
+        async_response = await self.get(async_viewset, actions, path, params, **kwargs)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.content, sync_response.content)
+        self.assertEqual(async_response.get('ETag'), sync_response.get('ETag'))
+        return async_response
+
+    async def test_task_read_paths_match_sync_views(self):
+        tasks = (TaskViewSet, AsyncTaskViewSet)
+        cases = [
+            ({'get': 'list'}, '/api/tasks/', {}),
+            ({'get': 'list'}, '/api/tasks/', {'status': 'NEW', 'ordering': 'title', 'page': 2, 'page_size': 3}),
+            ({'get': 'list'}, '/api/tasks/', {'user_id': self.user.id}),
+            ({'get': 'list'}, '/api/tasks/', {'cursor': ''}),
+            ({'get': 'list'}, '/api/tasks/', {'page': 99}),
+            ({'get': 'my_tasks'}, '/api/tasks/my_tasks/', {}),
+            ({'get': 'my_tasks'}, '/api/tasks/my_tasks/', {'status': 'COMPLETED'}),
+            ({'get': 'search'}, '/api/tasks/search/', {'q': 'Task 1'}),
+            ({'get': 'search'}, '/api/tasks/search/', {}),
+        ]
+        for actions, path, params in cases:
+            with self.subTest(path=path, params=params):
+                await self.assertSameResponse(tasks, actions, path, params)
+
+        detail = f'/api/tasks/{self.task.id}/'
+        await self.assertSameResponse(tasks, {'get': 'retrieve'}, detail, pk=str(self.task.id))
+        response = await self.assertSameResponse(tasks, {'get': 'retrieve'}, '/api/tasks/0/', pk='0')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_me_matches_sync_view(self):
+        await self.assertSameResponse((UserViewSet, AsyncUserViewSet), {'get': 'me', 'put': 'me'}, '/api/users/me/')
+
+    async def test_cached_and_conditional_responses(self):
+        first = await self.get(AsyncTaskViewSet, {'get': 'list'}, '/api/tasks/')
+        cached = await self.get(AsyncTaskViewSet, {'get': 'list'}, '/api/tasks/')
+        self.assertEqual(cached.content, first.content)
+
+        headers = {**self.headers, 'If-None-Match': first['ETag']}
+        response = await self.get(AsyncTaskViewSet, {'get': 'list'}, '/api/tasks/', headers=headers)
+        self.assertEqual(response.status_code, 304)
+
+    async def test_authentication(self):
+        response = await self.get(AsyncTaskViewSet, {'get': 'list'}, '/api/tasks/', headers={})
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.get(
+            AsyncTaskViewSet, {'get': 'list'}, '/api/tasks/', headers={'Authorization': 'Bearer invalid'}
+        )
+        self.assertEqual(response.status_code, 401)
+
+        self.user.is_active = False
+        await self.user.asave()
+        response = await self.get(AsyncUserViewSet, {'get': 'me', 'put': 'me'}, '/api/users/me/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_writes_fall_back_to_sync_handlers(self):
+        request = self.factory.post('/api/tasks/', {'title': 'Created async'}, content_type='application/json', headers=self.headers)
+        response = await AsyncTaskViewSet.as_view({'post': 'create'})(request)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(await Task.objects.filter(title='Created async', user=self.user).aexists())
@@ -0,0 +1,186 @@
+import unittest
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import AccessToken
+from to_do_list.authentication import ClaimsRefreshToken
+from to_do_list.blacklist import BloomFilter, revoked_tokens
+from to_do_list.caching import user_auth_cache, user_cache, user_payload_cache
+from to_do_list.models import Task, User
+
+
+def user_queries(context):
+    return [query for query in context.captured_queries if f'"{User._meta.db_table}"' in query['sql']]
+
+
+class ClaimsJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        for two_tier in (user_auth_cache, user_cache, user_payload_cache):
+            two_tier.local.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test',
+            last_name='User'
+        )
+        Task.objects.create(user=self.user, title='Existing task')
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}'
+        )
+        self.me_url = reverse('user-me')
+
+    def test_login_issues_claims(self):
+        response = self.client.post(
+            reverse('login-list'), {'username': 'testuser', 'password': 'testpass123'}, format='json'
+        )
+        token = AccessToken(response.data['access'])
+        self.assertEqual((token['username'], token['is_active']), ('testuser', True))
+
+    def test_task_requests_do_not_load_the_user(self):
+        self.client.get(reverse('task-my-tasks'))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse('task-list'), {'title': 'New task'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Task.objects.get(pk=response.data['id']).user, self.user)
+        self.assertEqual(user_queries(context), [])
+
+    def test_profile_loads_the_full_row(self):
+        response = self.client.get(self.me_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['first_name'], response.data['last_name']), ('Test', 'User'))
+
+    def test_profile_update_keeps_other_fields(self):
+        response = self.client.put(self.me_url, {'first_name': 'Updated'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.first_name, self.user.last_name), ('Updated', 'User'))
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_deactivation_revokes_tokens(self):
+        self.assertEqual(self.client.get(reverse('task-my-tasks')).status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('task-my-tasks'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get(reverse('task-my-tasks'))
+        self.user.delete()
+        response = self.client.get(reverse('task-my-tasks'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_renamed_user_falls_back_to_the_row(self):
+        self.user.username = 'renameduser'
+        self.user.save()
+        response = self.client.get(self.me_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], 'renameduser')
+
+
+class BloomFilterTests(unittest.TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f'jti-{index}' for index in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+
+    def test_error_rate_near_target(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for index in range(1000):
+            bloom.add(f'jti-{index}')
+        false_positives = sum(f'other-{index}' in bloom for index in range(10000))
+        self.assertLess(false_positives / 10000, 0.03)
+        self.assertAlmostEqual(bloom.estimated_error_rate(), 0.01, delta=0.005)
+
+
+@override_settings(TOKEN_BLACKLIST_FILTER_CAPACITY=100)
+class TokenRefreshTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.local.clear()
+        revoked_tokens.load(force=True)
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.refresh_url = reverse('token_refresh')
+        response = self.client.post(
+            reverse('login-list'), {'username': 'testuser', 'password': 'testpass123'}, format='json'
+        )
+        self.refresh_token = response.cookies['refresh_token'].value
+
+    def refresh(self):
+        self.client.cookies['refresh_token'] = self.refresh_token
+        return self.client.post(self.refresh_url, format='json')
+
+    def test_refresh_skips_blacklist_lookup(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.refresh()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        blacklist_table = BlacklistedToken._meta.db_table
+        self.assertFalse([query for query in context.captured_queries if blacklist_table in query['sql']])
+
+    def test_revoked_token_is_refused(self):
+        ClaimsRefreshToken(self.refresh_token).blacklist()
+        self.assertTrue(revoked_tokens.might_be_revoked(AccessToken(self.refresh_token, verify=False)['jti']))
+        self.assertEqual(self.refresh().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_loads_existing_blacklist(self):
+        ClaimsRefreshToken(self.refresh_token).blacklist()
+        revoked_tokens.load(force=True)
+        self.assertEqual(revoked_tokens.get_stats()['size'], 1)
+        self.assertEqual(self.refresh().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_broadcast_adds_jti(self):
+        revoked_tokens.receive('revoked-elsewhere')
+        self.assertTrue(revoked_tokens.might_be_revoked('revoked-elsewhere'))
+
+    def test_refresh_returns_profile_without_user_queries(self):
+        self.refresh()
+        with CaptureQueriesContext(connection) as context:
+            response = self.refresh()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user'], {
+            'id': self.user.id, 'username': 'testuser', 'first_name': 'Test', 'last_name': ''
+        })
+        self.assertEqual(AccessToken(response.data['access'])['user_id'], self.user.id)
+        self.assertEqual(user_queries(context), [])
+
+    def test_refresh_updates_user_claims(self):
+        self.user.username = 'renameduser'
+        self.user.save()
+        response = self.refresh()
+        self.assertEqual(AccessToken(response.data['access'])['username'], 'renameduser')
+
+    def test_refresh_from_body(self):
+        response = self.client.post(self.refresh_url, {'refresh': self.refresh_token}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user']['username'], 'testuser')
+
+    def test_refresh_refused_for_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.refresh().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_false_positives_are_reported(self):
+        false_positives = revoked_tokens.stats['false_positives']
+        for index in range(150):
+            revoked_tokens.add(f'jti-{index}')
+        # Past capacity the filter is rebuilt from the (empty) blacklist on next use
+        self.assertEqual(self.refresh().status_code, status.HTTP_200_OK)
+        self.assertEqual(revoked_tokens.get_stats()['size'], 0)
+
+        revoked_tokens.add(AccessToken(self.refresh_token, verify=False)['jti'])
+        self.assertEqual(self.refresh().status_code, status.HTTP_200_OK)
+        stats = revoked_tokens.get_stats()
+        self.assertEqual(stats['false_positives'], false_positives + 1)
+        self.assertGreater(stats['false_positive_rate'], 0)
@@ -0,0 +1,129 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.authentication import ClaimsJWTAuthentication, ClaimsRefreshToken
+from to_do_list.caching import user_auth_cache
+from to_do_list.models import Task, User
+
+
+class BatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            password='otherpass123',
+            first_name='Other'
+        )
+        self.tasks = [Task.objects.create(user=self.user, title=f'Task {i}') for i in range(2)]
+        self.other_task = Task.objects.create(user=self.other_user, title='Not mine')
+
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}'
+        )
+        self.batch_url = reverse('batch')
+        cache.clear()
+        user_auth_cache.local.clear()
+
+    def batch(self, *requests, atomic=False):
+        response = self.client.post(self.batch_url, {'requests': list(requests), 'atomic': atomic}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response.data['responses']
+
+    def test_dashboard_batch(self):
+        requests = [
+            {'id': 'me', 'path': reverse('user-me')},
+            {'id': 'tasks', 'path': reverse('task-my-tasks') + '?page_size=5'},
+            *({'path': reverse('task-can-edit-title', kwargs={'pk': task.id})} for task in self.tasks),
+            {'path': reverse('task-search') + '?q=Task'},
+        ]
+        with mock.patch.object(
+            ClaimsJWTAuthentication, 'authenticate', autospec=True, side_effect=ClaimsJWTAuthentication.authenticate
+        ) as authenticate:
+            responses = self.batch(*requests)
+        self.assertEqual(authenticate.call_count, 1)
+
+        self.assertEqual([response['status'] for response in responses], [200] * 5)
+        self.assertEqual(responses[0]['id'], 'me')
+        self.assertEqual(responses[0]['body']['username'], 'testuser')
+        self.assertEqual(responses[1]['body']['pagination']['total_items'], 2)
+        self.assertIn('ETag', responses[1]['headers'])
+        self.assertTrue(responses[2]['body']['can_edit'])
+        self.assertEqual(
+            responses[1]['body']['results'], self.client.get(reverse('task-my-tasks'), {'page_size': 5}).data['results']
+        )
+
+    def test_subrequests_keep_their_own_status(self):
+        responses = self.batch(
+            {'method': 'POST', 'path': reverse('task-list'), 'body': {'title': 'Batched'}},
+            {'method': 'POST', 'path': reverse('task-complete', kwargs={'pk': self.other_task.id})},
+            {'path': reverse('task-detail', kwargs={'pk': 999999})},
+            {'path': '/admin/'},
+            {'path': reverse('task-export')},
+        )
+        self.assertEqual([response['status'] for response in responses], [201, 403, 404, 400, 400])
+        self.assertTrue(Task.objects.filter(user=self.user, title='Batched').exists())
+
+    def test_conditional_subrequest(self):
+        detail = reverse('task-detail', kwargs={'pk': self.tasks[0].id})
+        etag = self.batch({'path': detail})[0]['headers']['ETag']
+        self.assertEqual(self.batch({'path': detail, 'headers': {'If-None-Match': etag}})[0]['status'], 304)
+
+    def test_atomic_batch_rolls_back(self):
+        responses = self.batch(
+            {'method': 'POST', 'path': reverse('task-list'), 'body': {'title': 'Rolled back'}},
+            {'method': 'PATCH', 'path': reverse('task-update-status', kwargs={'pk': self.tasks[0].id}),
+             'body': {'status': 'DONE'}},
+            {'method': 'POST', 'path': reverse('task-complete', kwargs={'pk': self.tasks[1].id})},
+            atomic=True
+        )
+        self.assertEqual([response['status'] for response in responses], [201, 400, 424])
+        self.assertFalse(Task.objects.filter(title='Rolled back').exists())
+        self.tasks[1].refresh_from_db()
+        self.assertEqual(self.tasks[1].status, 'NEW')
+
+    def test_rolled_back_reads_are_not_cached(self):
+        task = self.tasks[0]
+        self.client.get(reverse('task-detail', kwargs={'pk': task.id}))
+        responses = self.batch(
+            {'method': 'PATCH', 'path': reverse('task-update-description', kwargs={'pk': task.id}),
+             'body': {'description': 'phantom'}},
+            {'method': 'GET', 'path': reverse('task-detail', kwargs={'pk': task.id})},
+            {'method': 'GET', 'path': reverse('task-my-tasks')},
+            {'method': 'GET', 'path': reverse('task-detail', kwargs={'pk': 0})},
+            atomic=True
+        )
+        self.assertEqual([response['status'] for response in responses], [200, 200, 200, 404])
+        self.assertEqual(responses[1]['body']['description'], 'phantom')
+
+        detail = self.client.get(reverse('task-detail', kwargs={'pk': task.id}))
+        self.assertEqual(detail.data['description'], task.description)
+        my_tasks = self.client.get(reverse('task-my-tasks'))
+        self.assertNotIn('phantom', [item['description'] for item in my_tasks.data['results']])
+
+    def test_atomic_batch_commits(self):
+        responses = self.batch(
+            {'method': 'POST', 'path': reverse('task-list'), 'body': {'title': 'Kept'}},
+            {'method': 'POST', 'path': reverse('task-complete', kwargs={'pk': self.tasks[0].id})},
+            atomic=True
+        )
+        self.assertEqual([response['status'] for response in responses], [201, 200])
+        self.assertTrue(Task.objects.filter(title='Kept').exists())
+
+    def test_requires_authentication(self):
+        response = APIClient().post(self.batch_url, {'requests': [{'path': reverse('user-me')}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_rejects_malformed_batches(self):
+        for data in ({'requests': []}, {'requests': [{'path': reverse('user-me')}] * 3}, {}):
+            with self.subTest(data=data):
+                response = self.client.post(self.batch_url, data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
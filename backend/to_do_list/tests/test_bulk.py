@@ -0,0 +1,111 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.pagination import task_count_cache_key
+from to_do_list.models import Task, TaskTombstone, User
+
+
+class BulkTaskTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            password='otherpass123',
+            first_name='Other'
+        )
+        self.tasks = [Task.objects.create(user=self.user, title=f'Task {i}') for i in range(3)]
+        self.other_task = Task.objects.create(user=self.other_user, title='Not mine')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        cache.clear()
+
+    def post(self, name, data):
+        return self.client.post(reverse(f'task-{name}'), data, format='json')
+
+    def test_bulk_create(self):
+        response = self.post('bulk-create', {'tasks': [{'title': 'One'}, {'title': 'Two', 'description': 'Second'}]})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['succeeded'], response.data['failed']), (2, 0))
+        created = [result['task'] for result in response.data['results']]
+        self.assertEqual([task['title'] for task in created], ['One', 'Two'])
+        self.assertTrue(Task.objects.filter(id=created[1]['id'], user=self.user, description='Second').exists())
+
+    def test_bulk_create_reports_invalid_items(self):
+        response = self.post('bulk-create', {'tasks': [
+            {'title': 'Fresh'}, {'title': 'Task 0'}, {'title': 'Fresh'}, {'description': 'No title'}
+        ]})
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [(result['index'], result['status']) for result in response.data['results']],
+            [(0, 201), (1, 400), (2, 400), (3, 400)]
+        )
+        self.assertIn('title', response.data['results'][3]['errors'])
+        self.assertEqual(Task.objects.filter(user=self.user, title='Fresh').count(), 1)
+
+    def test_bulk_update_status(self):
+        ids = [self.tasks[0].id, self.other_task.id, 999999, self.tasks[1].id]
+        response = self.post('bulk-update-status', {'ids': ids, 'status': 'IN_PROGRESS'})
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [(result['id'], result['status']) for result in response.data['results']],
+            list(zip(ids, [200, 403, 404, 200]))
+        )
+        self.assertEqual(response.data['results'][0]['task']['status'], 'IN_PROGRESS')
+        self.other_task.refresh_from_db()
+        self.assertEqual(self.other_task.status, 'NEW')
+
+    def test_bulk_update_status_keeps_new_rule(self):
+        Task.objects.filter(id=self.tasks[0].id).update(status='COMPLETED')
+        ids = [task.id for task in self.tasks]
+        response = self.post('bulk-update-status', {'ids': ids, 'status': 'NEW'})
+        self.assertEqual([result['status'] for result in response.data['results']], [400, 200, 200])
+        self.assertEqual(
+            response.data['results'][0]['detail'], 'Cannot set status back to NEW once task has progressed'
+        )
+        self.tasks[0].refresh_from_db()
+        self.assertEqual(self.tasks[0].status, 'COMPLETED')
+
+    def test_bulk_update_status_requires_valid_status(self):
+        response = self.post('bulk-update-status', {'ids': [self.tasks[0].id], 'status': 'DONE'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_delete_records_tombstones(self):
+        ids = [self.tasks[0].id, self.tasks[0].id, self.other_task.id]
+        response = self.post('bulk-delete', {'ids': ids})
+        self.assertEqual(
+            [(result['id'], result['status']) for result in response.data['results']],
+            [(self.tasks[0].id, 204), (self.other_task.id, 403)]
+        )
+        self.assertFalse(Task.objects.filter(id=self.tasks[0].id).exists())
+        self.assertTrue(Task.objects.filter(id=self.other_task.id).exists())
+        self.assertEqual(list(TaskTombstone.objects.values_list('task_id', flat=True)), [self.tasks[0].id])
+
+    def test_bulk_writes_invalidate_cached_counts(self):
+        my_tasks = reverse('task-my-tasks')
+        self.assertEqual(self.client.get(my_tasks).data['pagination']['total_items'], 3)
+        self.assertIsNotNone(cache.get(task_count_cache_key(self.user.id)))
+
+        self.post('bulk-create', {'tasks': [{'title': 'Counted'}]})
+        self.assertEqual(self.client.get(my_tasks).data['pagination']['total_items'], 4)
+        self.post('bulk-update-status', {'ids': [self.tasks[0].id], 'status': 'COMPLETED'})
+        self.assertEqual(self.client.get(my_tasks, {'status': 'COMPLETED'}).data['pagination']['total_items'], 1)
+        self.post('bulk-delete', {'ids': [task.id for task in self.tasks]})
+        self.assertEqual(self.client.get(my_tasks).data['pagination']['total_items'], 1)
+
+    @override_settings(TASK_BULK_MAX_ITEMS=2)
+    def test_rejects_malformed_requests(self):
+        for name, data in (
+            ('bulk-create', {'tasks': []}),
+            ('bulk-create', {'tasks': [{'title': 'A'}, {'title': 'B'}, {'title': 'C'}]}),
+            ('bulk-delete', {'ids': 'all'}),
+            ('bulk-delete', {'ids': ['1']}),
+        ):
+            with self.subTest(name=name, data=data):
+                self.assertEqual(self.post(name, data).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,110 @@
+import time
+import unittest
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from to_do_list.caching import LRUCache, TwoTierCache, listener, user_cache
+from to_do_list.models import User
+
+
+class LRUCacheTests(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(max_entries=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 1)
+        self.assertEqual(lru.stats['evictions'], 1)
+
+    def test_entries_expire(self):
+        lru = LRUCache(max_entries=2, ttl=0.01)
+        lru.set('a', 1)
+        time.sleep(0.02)
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.stats['expirations'], 1)
+
+
+class TwoTierCacheTests(unittest.TestCase):
+    def setUp(self):
+        cache.clear()
+        self.two_tier = TwoTierCache('test-two-tier', max_entries=10, ttl=60)
+
+    def test_read_through_tiers(self):
+        self.assertEqual(self.two_tier.get_or_set(1, lambda: 'loaded'), 'loaded')
+        self.assertEqual(self.two_tier.get(1), 'loaded')
+
+        # Another worker has an empty local tier but shares the backend
+        self.two_tier.local.clear()
+        self.assertEqual(self.two_tier.get(1), 'loaded')
+        self.assertEqual(self.two_tier.get_stats()['misses'], 1)
+        self.assertEqual(self.two_tier.get_stats()['local_hits'], 1)
+        self.assertEqual(self.two_tier.get_stats()['shared_hits'], 1)
+
+    def test_delete_evicts_both_tiers(self):
+        self.two_tier.set(1, 'value')
+        self.two_tier.delete(1)
+        self.assertIsNone(self.two_tier.get(1))
+
+    def test_broadcast_payload_evicts_local_entry(self):
+        self.two_tier.set(1, 'value')
+        listener.dispatch('test-two-tier:1')
+        self.assertEqual(len(self.two_tier.local), 0)
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.me_url = reverse('user-me')
+
+    def test_user_row_is_cached_between_requests(self):
+        self.client.get(self.me_url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.me_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], 'testuser')
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_profile_updates_evict_cached_user_and_payload(self):
+        self.client.get(self.me_url)
+        self.client.put(self.me_url, {'first_name': 'Updated'}, format='json')
+        self.assertEqual(self.client.get(self.me_url).data['first_name'], 'Updated')
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(self.me_url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.me_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Broadcasts use LISTEN/NOTIFY')
+class InvalidationBroadcastTests(TransactionTestCase):
+    def setUp(self):
+        listener.start()
+        self.assertTrue(listener.connected.wait(5))
+
+    def tearDown(self):
+        listener.stop(timeout=5)
+
+    def test_committed_delete_evicts_other_workers(self):
+        user_cache.set(42, 'cached row')
+        # Simulates a NOTIFY sent by another worker's committed write
+        listener.publish(user_cache.name, '42')
+
+        deadline = time.monotonic() + 2
+        while user_cache.local.get('42') is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIsNone(user_cache.local.get('42'))
@@ -0,0 +1,128 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.caching import task_payload_cache
+from to_do_list.models import Task, User
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.task = Task.objects.create(user=self.user, title='First task')
+        Task.objects.create(user=self.user, title='Second task')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.detail_url = reverse('task-detail', kwargs={'pk': self.task.id})
+        self.list_url = reverse('task-list')
+        self.my_tasks_url = reverse('task-my-tasks')
+        cache.clear()
+
+    def revalidate(self, url, params=None, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params, **headers)
+        return response, len(context.captured_queries)
+
+    def test_detail_validators(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+        # Served from the cached payload without touching the database
+        response, queries = self.revalidate(self.detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(queries, 0)
+
+    def test_detail_not_modified_before_serializing(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        cache.clear()
+        task_payload_cache.local.clear()
+
+        response, queries = self.revalidate(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(queries, 1)
+
+    def test_detail_if_modified_since(self):
+        last_modified = self.client.get(self.detail_url)['Last-Modified']
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_etag_changes_on_update(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        self.client.patch(self.detail_url, {'title': 'Renamed'}, format='json')
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Renamed')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_follows_an_owner_rename(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        self.user.username = 'renamed'
+        self.user.save()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user'], 'renamed')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_not_modified(self):
+        for url in (self.list_url, self.my_tasks_url):
+            with self.subTest(url=url):
+                etag = self.client.get(url, {'status': 'NEW'})['ETag']
+                response = self.client.get(url, {'status': 'NEW'}, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response['ETag'], etag)
+
+    def test_list_not_modified_runs_no_query(self):
+        for strategy in ('exact', 'estimated'):
+            with self.subTest(strategy=strategy), self.settings(TASK_COUNT_STRATEGY=strategy):
+                etag = self.client.get(self.list_url)['ETag']
+                response, queries = self.revalidate(self.list_url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(queries, 0)
+
+    def test_list_etag_depends_on_query_params(self):
+        etag = self.client.get(self.list_url)['ETag']
+        self.assertNotEqual(self.client.get(self.list_url, {'ordering': 'title'})['ETag'], etag)
+
+    def test_list_etag_changes_on_writes(self):
+        etag = self.client.get(self.my_tasks_url)['ETag']
+        self.client.patch(self.detail_url, {'title': 'Renamed'}, format='json')
+        updated_etag = self.client.get(self.my_tasks_url)['ETag']
+        self.assertNotEqual(updated_etag, etag)
+
+        self.client.delete(self.detail_url)
+        response = self.client.get(self.my_tasks_url, HTTP_IF_NONE_MATCH=updated_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['pagination']['total_items'], 1)
+
+    def test_list_etag_changes_on_owner_rename(self):
+        etag = self.client.get(self.list_url)['ETag']
+        self.user.username = 'renamed'
+        self.user.save()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({task['user'] for task in response.data['results']}, {'renamed'})
+
+    def test_cursor_pages_have_no_etag(self):
+        response = self.client.get(self.list_url, {'cursor': ''})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
+
+    def test_me_not_modified(self):
+        me_url = reverse('user-me')
+        etag = self.client.get(me_url)['ETag']
+        self.assertEqual(self.client.get(me_url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.put(me_url, {'first_name': 'Updated'}, format='json')
+        response = self.client.get(me_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Updated')
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import unittest
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from to_do_list.events import RESYNC, hub
+from to_do_list.models import Task, User
+from to_do_list.sync import encode_watermark
+
+
+def parse_event(chunk):
+    """`(event, id, data)` of a server-sent event chunk."""
+    fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+    return fields.get('event'), fields.get('id'), json.loads(fields.get('data', 'null'))
+
+
+@override_settings(TASK_EVENTS_HEARTBEAT=5)
+class TaskEventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            password='otherpass123',
+            first_name='Other'
+        )
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.url = reverse('task-events')
+
+    def tearDown(self):
+        # Test streams are never closed, so they never unsubscribe themselves
+        hub.subscriptions.clear()
+        hub.stop(timeout=5)
+
+    async def open_stream(self, params=None, **headers):
+        response = await self.async_client.get(self.url, params, headers={**self.headers, **headers})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response.streaming_content
+
+    async def next_chunk(self, stream):
+        chunk = await asyncio.wait_for(anext(stream), 5)
+        return chunk.decode() if isinstance(chunk, bytes) else chunk
+
+    def live_event(self, task, kind='updated', user=None):
+        return json.dumps({
+            'type': kind,
+            'id': task.id,
+            'user_id': (user or self.user).id,
+            'position': [timezone.now().isoformat(), task.id],
+            'task': {'id': task.id, 'title': task.title},
+        })
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+    async def test_streams_own_events_only(self):
+        task = await Task.objects.acreate(user=self.user, title='Mine')
+        other_task = await Task.objects.acreate(user=self.other_user, title='Theirs')
+        stream = await self.open_stream()
+
+        hub.dispatch(self.live_event(other_task, user=self.other_user))
+        hub.dispatch(self.live_event(task))
+        event, event_id, data = parse_event(await self.next_chunk(stream))
+        self.assertEqual(event, 'task.updated')
+        self.assertEqual(data['id'], task.id)
+        self.assertEqual(data['task']['title'], 'Mine')
+        self.assertTrue(event_id)
+
+    async def test_global_feed(self):
+        other_task = await Task.objects.acreate(user=self.other_user, title='Theirs')
+        stream = await self.open_stream({'scope': 'all'})
+        hub.dispatch(self.live_event(other_task, user=self.other_user))
+        _, _, data = parse_event(await self.next_chunk(stream))
+        self.assertEqual(data['id'], other_task.id)
+
+    @override_settings(TASK_EVENTS_HEARTBEAT=0.01)
+    async def test_heartbeat(self):
+        stream = await self.open_stream()
+        self.assertEqual(await self.next_chunk(stream), ': heartbeat\n\n')
+
+    async def test_resume_replays_deletes(self):
+        start = timezone.now()
+        watermark = encode_watermark((start, 0), (start, 0))
+        task = await Task.objects.acreate(user=self.user, title='Created while away')
+        task_id = task.id
+        await sync_to_async(task.delete)()
+
+        stream = await self.open_stream(**{'Last-Event-ID': watermark})
+        # The task itself is gone, so only its tombstone is replayed
+        event, _, data = parse_event(await self.next_chunk(stream))
+        self.assertEqual(event, 'task.deleted')
+        self.assertEqual(data, {'id': task_id, 'user_id': self.user.id})
+
+    async def test_replays_changes_since_last_event_id(self):
+        start = timezone.now()
+        watermark = encode_watermark((start, 0), (start, 0))
+        task = await Task.objects.acreate(user=self.user, title='Created while away')
+
+        stream = await self.open_stream(**{'Last-Event-ID': watermark})
+        event, event_id, data = parse_event(await self.next_chunk(stream))
+        self.assertEqual(event, 'task.created')
+        self.assertEqual(data['task']['title'], 'Created while away')
+
+        # Resuming from that event replays nothing further
+        stream = await self.open_stream(**{'Last-Event-ID': event_id})
+        hub.dispatch(self.live_event(task))
+        self.assertEqual(parse_event(await self.next_chunk(stream))[0], 'task.updated')
+
+    @override_settings(TASK_EVENTS_MAX_PENDING=2)
+    async def test_slow_stream_replays_from_database(self):
+        stream = await self.open_stream()
+        tasks = [await Task.objects.acreate(user=self.user, title=f'Task {i}') for i in range(4)]
+        for task in tasks:
+            hub.dispatch(self.live_event(task))
+        await asyncio.sleep(0)
+
+        subscription = next(iter(hub.subscriptions))
+        self.assertTrue(subscription.resync_pending)
+        self.assertLessEqual(subscription.queue.qsize(), 1)
+        replayed = [parse_event(await self.next_chunk(stream)) for _ in tasks]
+        self.assertEqual([data['id'] for _, _, data in replayed], [task.id for task in tasks])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'The feed uses LISTEN/NOTIFY')
+class TaskEventNotifyTests(TransactionTestCase):
+    def tearDown(self):
+        hub.stop(timeout=5)
+
+    async def test_committed_writes_reach_subscribers(self):
+        user = await User.objects.acreate(username='testuser', first_name='Test')
+        subscription = hub.subscribe(user.id)
+        self.assertTrue(await sync_to_async(hub.connected.wait)(5))
+        # Drain the resync queued when the listener connected
+        self.assertIs(await asyncio.wait_for(subscription.get(), 5), RESYNC)
+
+        task = await Task.objects.acreate(user=user, title='Pushed')
+        event = await asyncio.wait_for(subscription.get(), 5)
+        self.assertEqual((event['type'], event['id']), ('created', task.id))
+        self.assertEqual(event['task']['title'], 'Pushed')
+
+        task_id = task.id
+        await sync_to_async(task.delete)()
+        event = await asyncio.wait_for(subscription.get(), 5)
+        self.assertEqual((event['type'], event['id']), ('deleted', task_id))
+        hub.unsubscribe(subscription)
@@ -0,0 +1,73 @@
+import csv
+import json
+from io import StringIO
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.models import Task, User
+
+
+@override_settings(TASK_EXPORT_CHUNK_SIZE=4)
+class TaskExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            password='otherpass123',
+            first_name='Other'
+        )
+        Task.objects.bulk_create(
+            Task(user=self.user, title=f'Task {i}', status='COMPLETED' if i % 3 == 0 else 'NEW')
+            for i in range(10)
+        )
+        Task.objects.create(user=self.other_user, title='Not mine', description='Line one\nline "two", three')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.export_url = reverse('task-export')
+
+    def export(self, **params):
+        response = self.client.get(self.export_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export_matches_the_list(self):
+        response, body = self.export(ordering='title')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        listed = self.client.get(reverse('task-list'), {'ordering': 'title', 'page_size': 100}).data['results']
+        self.assertEqual(rows, [dict(task) for task in listed])
+
+    def test_csv_export(self):
+        response, body = self.export(**{'as': 'csv', 'user_id': self.other_user.id})
+        self.assertIn('filename="tasks.csv"', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['description'], 'Line one\nline "two", three')
+        self.assertEqual(rows[0]['user'], 'otheruser')
+
+    def test_export_applies_filters(self):
+        _, body = self.export(user_id=self.user.id, status='COMPLETED', ordering='-title')
+        titles = [json.loads(line)['title'] for line in body.splitlines()]
+        self.assertEqual(titles, ['Task 9', 'Task 6', 'Task 3', 'Task 0'])
+
+        _, body = self.export(search='mine')
+        self.assertEqual([json.loads(line)['title'] for line in body.splitlines()], ['Not mine'])
+
+    def test_export_runs_one_query(self):
+        with CaptureQueriesContext(connection) as context:
+            _, body = self.export()
+        self.assertEqual(len(body.splitlines()), 11)
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(self.export_url, {'as': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,137 @@
+import json
+from urllib.parse import urlencode
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.importing import numbered_title
+from to_do_list.models import Task, User
+
+NOTIFY = int(connection.vendor == 'postgresql')
+
+
+@override_settings(TASK_IMPORT_BATCH_SIZE=3)
+class TaskImportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            password='otherpass123',
+            first_name='Other'
+        )
+        self.existing = Task.objects.create(user=self.user, title='Existing', description='Old')
+        Task.objects.create(user=self.other_user, title='Mine', description='Not yours')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.import_url = reverse('task-import')
+        cache.clear()
+
+    def upload(self, body, content_type='application/x-ndjson', **params):
+        url = f'{self.import_url}?{urlencode(params)}'
+        response = self.client.generic('POST', url, body.encode(), content_type=content_type)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def ndjson(self, *rows):
+        return ''.join(json.dumps(row) + '\n' for row in rows)
+
+    def test_imports_rows_in_batches(self):
+        rows = [{'title': f'Imported {i}', 'status': 'COMPLETED' if i % 2 else 'NEW'} for i in range(7)]
+        lines = self.upload(self.ndjson(*rows))
+        self.assertEqual([line.get('total_rows') for line in lines[:-1]], [3, 6, 7])
+        self.assertEqual(lines[-1], {
+            'done': True, 'rows': 7, 'created': 7, 'renamed': 0, 'updated': 0, 'skipped': 0, 'failed': 0
+        })
+        self.assertEqual(Task.objects.filter(user=self.user, title__startswith='Imported').count(), 7)
+        self.assertEqual(Task.objects.get(user=self.user, title='Imported 1').status, 'COMPLETED')
+
+    def test_reports_row_errors(self):
+        body = self.ndjson({'title': 'Good'}, {'title': 'Bad status', 'status': 'DONE'}) + 'not json\n[1]\n'
+        lines = self.upload(body)
+        errors = [error for line in lines[:-1] for error in line['errors']]
+        self.assertEqual([error['row'] for error in errors], [2, 3, 4])
+        self.assertIn('status', errors[0]['errors'])
+        self.assertEqual(errors[1]['errors'], 'Invalid JSON')
+        self.assertEqual((lines[-1]['created'], lines[-1]['failed']), (1, 3))
+
+    def test_skip_conflicts(self):
+        lines = self.upload(self.ndjson({'title': 'Existing'}, {'title': 'Mine'}, {'title': 'Mine'}))
+        self.assertEqual(
+            lines[0]['conflicts'],
+            [
+                {'row': 1, 'title': 'Existing', 'resolution': 'skipped'},
+                {'row': 3, 'title': 'Mine', 'resolution': 'skipped'},
+            ]
+        )
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 2)
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.description, 'Old')
+
+    def test_rename_conflicts(self):
+        Task.objects.create(user=self.user, title='Existing (2)')
+        lines = self.upload(
+            self.ndjson({'title': 'Existing'}, {'title': 'Existing'}, {'title': 'New'}), on_conflict='rename'
+        )
+        self.assertEqual(
+            [conflict['title'] for conflict in lines[0]['conflicts']], ['Existing (3)', 'Existing (4)']
+        )
+        self.assertEqual((lines[-1]['created'], lines[-1]['renamed']), (3, 2))
+        self.assertTrue(Task.objects.filter(user=self.user, title='Existing (4)').exists())
+
+    def test_numbered_titles_fit_the_column(self):
+        self.assertEqual(len(numbered_title('x' * 200, 12)), 200)
+
+    def test_upsert_conflicts(self):
+        lines = self.upload(
+            self.ndjson({'title': 'Existing', 'description': 'New', 'status': 'IN_PROGRESS'}, {'title': 'Fresh'}),
+            on_conflict='upsert'
+        )
+        self.assertEqual((lines[-1]['created'], lines[-1]['updated']), (1, 1))
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.description, self.existing.status), ('New', 'IN_PROGRESS'))
+
+    def test_upsert_cannot_set_a_task_back_to_new(self):
+        self.existing.status = 'COMPLETED'
+        self.existing.save()
+        lines = self.upload(
+            self.ndjson({'title': 'Existing', 'description': 'New', 'status': 'NEW'}, {'title': 'Existing'}),
+            on_conflict='upsert'
+        )
+        self.assertEqual((lines[-1]['updated'], lines[-1]['failed']), (1, 1))
+        self.assertEqual(lines[0]['errors'], [
+            {'row': 1, 'errors': {'status': ['Cannot set status back to NEW once task has progressed']}}
+        ])
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.description, self.existing.status), ('Old', 'COMPLETED'))
+
+    def test_csv_import_round_trips_an_export(self):
+        Task.objects.create(user=self.user, title='Quoted, "multi"\nline', status='COMPLETED')
+        response = self.client.get(reverse('task-export'), {'as': 'csv', 'user_id': self.user.id})
+        export = b''.join(response.streaming_content)
+        Task.objects.filter(user=self.user).delete()
+
+        lines = self.upload(export.decode(), content_type='text/csv', **{'as': 'csv'})
+        self.assertEqual(lines[-1]['created'], 2)
+        self.assertTrue(Task.objects.filter(user=self.user, title='Quoted, "multi"\nline', status='COMPLETED').exists())
+
+    def test_each_batch_runs_a_fixed_number_of_queries(self):
+        for size in (3, 30):
+            with self.subTest(size=size), CaptureQueriesContext(connection) as context:
+                self.upload(self.ndjson(*({'title': f'Batch {size}-{i}'} for i in range(size))))
+            # Title lookup, then INSERT and NOTIFY in a savepoint
+            self.assertEqual(len(context.captured_queries), (size // 3) * (4 + NOTIFY))
+
+    def test_rejects_bad_parameters(self):
+        for params in ({'as': 'xml'}, {'on_conflict': 'merge'}):
+            with self.subTest(params=params):
+                url = f'{self.import_url}?{urlencode(params)}'
+                response = self.client.generic('POST', url, b'{}', content_type='application/x-ndjson')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,101 @@
+import unittest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.models import Task, User
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Query plans are PostgreSQL specific')
+class AccessPathIndexTests(APITestCase):
+    """
+    The main (row-fetching) query of every TaskViewSet read action must be
+    answerable from an index, in index order, without a sort step.
+    Test tables are tiny, so sequential scans and sorts are priced out
+    (not forbidden): a Sort node in the plan means no index fits.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        other_user = User.objects.create_user(
+            username='otheruser',
+            password='otherpass123',
+            first_name='Other'
+        )
+        statuses = ['NEW', 'IN_PROGRESS', 'COMPLETED']
+        Task.objects.bulk_create(
+            Task(
+                user=self.user if i % 4 == 0 else other_user,
+                title=f'Task {i}' if i % 50 else f'Needle {i}',
+                status=statuses[i % 3]
+            )
+            for i in range(600)
+        )
+        self.task = Task.objects.first()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def main_query_plan(self, url, params=None, allow_sort=False):
+        """EXPLAIN the request's row-fetching query."""
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url, params)
+        sql = next(
+            query['sql'] for query in context.captured_queries
+            if 'COUNT(' not in query['sql'] and 'MAX(' not in query['sql']
+            and 'to_do_list_task' in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Task._meta.db_table}')
+            cursor.execute('SET enable_seqscan = off')
+            if not allow_sort:
+                cursor.execute('SET enable_sort = off')
+            try:
+                cursor.execute(f'EXPLAIN {sql}')
+                return '\n'.join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.execute('RESET enable_seqscan')
+                cursor.execute('RESET enable_sort')
+
+    def assertUsesIndex(self, index_name, url, params=None, sorted_by_index=True):
+        plan = self.main_query_plan(url, params, allow_sort=not sorted_by_index)
+        self.assertIn(index_name, plan)
+        if sorted_by_index:
+            self.assertNotIn('Sort', plan)
+
+    def test_list_default_ordering(self):
+        self.assertUsesIndex('task_created_id_idx', reverse('task-list'))
+
+    def test_list_by_user(self):
+        self.assertUsesIndex('task_user_created_id_idx', reverse('task-list'), {'user_id': self.user.id})
+
+    def test_list_by_status(self):
+        self.assertUsesIndex('task_status_created_idx', reverse('task-list'), {'status': 'NEW'})
+
+    def test_my_tasks(self):
+        self.assertUsesIndex('task_user_created_id_idx', reverse('task-my-tasks'))
+
+    def test_my_tasks_by_status(self):
+        self.assertUsesIndex('task_user_status_created_idx', reverse('task-my-tasks'), {'status': 'NEW'})
+
+    def test_my_tasks_cursor_page(self):
+        first_page = self.client.get(reverse('task-my-tasks'), {'cursor': ''}).data
+        self.assertUsesIndex('task_user_created_id_idx', first_page['pagination']['next'])
+
+    def test_retrieve(self):
+        self.assertUsesIndex('to_do_list_task_pkey', reverse('task-detail', kwargs={'pk': self.task.id}))
+
+    @override_settings(TASK_SYNC_SETTLE_SECONDS=0)
+    def test_sync(self):
+        first_batch = self.client.get(reverse('task-sync')).data
+        self.assertUsesIndex('task_user_updated_id_idx', reverse('task-sync'), {'since': first_batch['watermark']})
+
+    def test_search(self):
+        # Ranked results are sorted after the index lookup
+        self.assertUsesIndex(
+            'task_search_vector_gin', reverse('task-search'), {'q': 'needle'}, sorted_by_index=False
+        )
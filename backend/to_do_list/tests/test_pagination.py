@@ -0,0 +1,162 @@
+import json
+import unittest
+from base64 import urlsafe_b64encode
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.models import Task, User
+from to_do_list.views import TaskViewSet
+
+
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        statuses = ['NEW', 'IN_PROGRESS', 'COMPLETED']
+        Task.objects.bulk_create(
+            Task(user=self.user, title=f'Task {i:02}', status=statuses[i % 3])
+            for i in range(25)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.my_tasks_url = reverse('task-my-tasks')
+
+    def walk(self, url, params):
+        """Follow `next` links from the first cursor page, then `previous` links back."""
+        response = self.client.get(url, dict(params, cursor=''))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pages = [response.data]
+        while pages[-1]['pagination']['next']:
+            pages.append(self.client.get(pages[-1]['pagination']['next']).data)
+
+        backwards = [pages[-1]]
+        while backwards[-1]['pagination']['previous']:
+            backwards.append(self.client.get(backwards[-1]['pagination']['previous']).data)
+        return pages, backwards
+
+    def test_cursor_walk_matches_offset_ordering_for_every_ordering_field(self):
+        for field in TaskViewSet.ordering_fields:
+            for ordering in (field, f'-{field}'):
+                with self.subTest(ordering=ordering):
+                    params = {'ordering': ordering, 'page_size': 4}
+                    pages, backwards = self.walk(self.my_tasks_url, params)
+
+                    ids = [task['id'] for page in pages for task in page['results']]
+                    tiebreaker = '-id' if ordering.startswith('-') else 'id'
+                    expected = list(
+                        Task.objects.order_by(ordering, tiebreaker).values_list('id', flat=True)
+                    )
+                    self.assertEqual(ids, expected)
+
+                    back_ids = [task['id'] for page in reversed(backwards) for task in page['results']]
+                    self.assertEqual(back_ids, ids)
+
+    def test_cursor_mode_keeps_envelope_and_skips_count(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.my_tasks_url, {'cursor': '', 'page_size': 10})
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertNotIn('COUNT', context.captured_queries[0]['sql'])
+
+        page_response = self.client.get(self.my_tasks_url, {'page_size': 10})
+        self.assertEqual(response.data['pagination'].keys(), page_response.data['pagination'].keys())
+        self.assertEqual(response.data['pagination']['page_size'], 10)
+        self.assertIsNone(response.data['pagination']['total_items'])
+        self.assertIsNone(response.data['pagination']['previous'])
+        self.assertEqual(
+            [task['id'] for task in response.data['results']],
+            [task['id'] for task in page_response.data['results']]
+        )
+
+    def test_cursor_mode_on_list_and_search(self):
+        for url, params in ((reverse('task-list'), {}), (reverse('task-search'), {'q': 'Task'})):
+            with self.subTest(url=url):
+                pages, _ = self.walk(url, dict(params, page_size=10))
+                self.assertEqual(sum(len(page['results']) for page in pages), 25)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.my_tasks_url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_values_must_fit_the_ordering(self):
+        for position in ([None, 1], ['2024-01-01T00:00:00+00:00', None], [True, 1], [['x'], 1], {'p': 1}):
+            with self.subTest(position=position):
+                token = urlsafe_b64encode(json.dumps({'p': position}).encode()).decode()
+                response = self.client.get(self.my_tasks_url, {'cursor': token})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CountStrategyTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        Task.objects.bulk_create(Task(user=self.user, title=f'Task {i:02}') for i in range(25))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.task_list_url = reverse('task-list')
+        cache.clear()
+
+    def test_exact_count_by_default(self):
+        response = self.client.get(self.task_list_url)
+        self.assertEqual(response.data['pagination']['total_items'], 25)
+        self.assertFalse(response.data['pagination']['is_estimate'])
+
+    @override_settings(TASK_COUNT_STRATEGY='capped', TASK_COUNT_CAP=12)
+    def test_capped_count(self):
+        response = self.client.get(self.task_list_url, {'page_size': 5})
+        pagination = response.data['pagination']
+        self.assertEqual(pagination['total_items'], 12)
+        self.assertTrue(pagination['is_estimate'])
+
+        # Pages past the cap are still served, and keep linking forward while rows remain
+        response = self.client.get(self.task_list_url, {'page_size': 5, 'page': 4})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNotNone(response.data['pagination']['next'])
+        self.assertEqual(response.data['pagination']['total_pages'], 5)
+
+        response = self.client.get(self.task_list_url, {'page_size': 5, 'page': 5})
+        self.assertIsNone(response.data['pagination']['next'])
+
+        response = self.client.get(self.task_list_url, {'status': 'COMPLETED'})
+        self.assertEqual(response.data['pagination']['total_items'], 0)
+        self.assertFalse(response.data['pagination']['is_estimate'])
+
+    @override_settings(TASK_COUNT_STRATEGY='estimated', TASK_COUNT_CAP=10)
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'Planner statistics are PostgreSQL specific')
+    def test_estimated_count_uses_planner_statistics(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Task._meta.db_table}')
+        response = self.client.get(self.task_list_url)
+        self.assertEqual(response.data['pagination']['total_items'], 25)
+        self.assertTrue(response.data['pagination']['is_estimate'])
+
+        # Filtered lists fall back to a capped count
+        response = self.client.get(self.task_list_url, {'status': 'NEW'})
+        self.assertEqual(response.data['pagination']['total_items'], 10)
+        self.assertTrue(response.data['pagination']['is_estimate'])
+
+    def test_my_tasks_count_is_cached_and_invalidated(self):
+        my_tasks_url = reverse('task-my-tasks')
+        self.assertEqual(self.client.get(my_tasks_url).data['pagination']['total_items'], 25)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(my_tasks_url, {'page': 2})
+        self.assertEqual(response.data['pagination']['total_items'], 25)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in context.captured_queries))
+
+        self.client.post(reverse('task-list'), {'title': 'Another'}, format='json')
+        self.assertEqual(self.client.get(my_tasks_url).data['pagination']['total_items'], 26)
+
+        task = Task.objects.filter(user=self.user).first()
+        self.client.delete(reverse('task-detail', kwargs={'pk': task.id}))
+        self.assertEqual(self.client.get(my_tasks_url).data['pagination']['total_items'], 25)
@@ -0,0 +1,73 @@
+import unittest
+from django.db import connection, connections
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from to_do_list import pooling
+from to_do_list.models import User
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Pooling needs PostgreSQL')
+class ConnectionPoolTests(TestCase):
+    def setUp(self):
+        settings_dict = {
+            **connection.settings_dict,
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {'pool': {'min_size': 1, 'max_size': 2, 'timeout': 5}},
+        }
+        self.pooled = connections['default'].__class__(settings_dict, alias='pool_test')
+        # Returning a connection looks its pool up through the handler
+        connections['pool_test'] = self.pooled
+
+    def tearDown(self):
+        self.pooled.close()
+        self.pooled.close_pool()
+        del connections['pool_test']
+
+    def test_checkout_and_return(self):
+        connects = pooling._connects['pool_test']
+        self.pooled.ensure_connection()
+        stats = pooling.pool_stats(self.pooled.pool)
+        self.assertEqual(stats['checked_out'], 1)
+        self.assertEqual(stats['max_size'], 2)
+        self.assertEqual(pooling._connects['pool_test'], connects + 1)
+
+        self.pooled.close()
+        stats = pooling.pool_stats(self.pooled.pool)
+        self.assertEqual(stats['checked_out'], 0)
+        self.assertGreaterEqual(stats['connections_opened'], 1)
+        self.assertEqual(stats['requests'], 1)
+
+    def test_connection_is_reused(self):
+        self.pooled.ensure_connection()
+        self.pooled.close()
+        opened = pooling.pool_stats(self.pooled.pool)['connections_opened']
+
+        self.pooled.ensure_connection()
+        self.pooled.close()
+        stats = pooling.pool_stats(self.pooled.pool)
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['connections_opened'], opened)
+
+
+class MetricsViewTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', email='user@example.com', password='pass12345')
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass12345', is_staff=True
+        )
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_reports_connection_and_cache_stats(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        database = response.data['database']['default']
+        self.assertEqual(database['conn_max_age'], connection.settings_dict['CONN_MAX_AGE'])
+        self.assertIsInstance(database['connects'], int)
+        self.assertIn('caches', response.data)
@@ -0,0 +1,147 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.blacklist import revoked_tokens
+from to_do_list.models import Task, User
+
+# Task writes NOTIFY the change feed, on PostgreSQL only
+NOTIFY = int(connection.vendor == 'postgresql')
+
+
+class QueryBudgetTests(APITestCase):
+    """
+    Every endpoint in to_do_list/urls.py must run a fixed number of queries,
+    no matter how many rows a page renders.
+    """
+    PAGE_SIZES = (1, 10, 100)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            password='otherpass123',
+            first_name='Other'
+        )
+        Task.objects.bulk_create(
+            Task(user=self.user if i % 2 else self.other_user, title=f'Task {i}')
+            for i in range(120)
+        )
+        self.task = Task.objects.filter(user=self.user).first()
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        cache.clear()
+
+    def count_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 400, response.data)
+        return len(context.captured_queries)
+
+    def assertQueryBudget(self, budget, method, url, data=None):
+        self.assertEqual(self.count_queries(method, url, data), budget)
+
+    def assertPageBudget(self, budget, url, params=None):
+        for page_size in self.PAGE_SIZES:
+            with self.subTest(url=url, page_size=page_size):
+                query = dict(params or {}, page_size=page_size)
+                self.assertQueryBudget(budget, 'get', url, query)
+
+    # Collection endpoints: count + page
+    def test_task_list_budget(self):
+        self.assertPageBudget(2, reverse('task-list'))
+
+    def test_task_list_filtered_budget(self):
+        self.assertPageBudget(2, reverse('task-list'), {'user_id': self.user.id, 'status': 'NEW'})
+
+    def test_my_tasks_budget(self):
+        # Unfiltered totals are cached per user after the first page
+        self.assertQueryBudget(2, 'get', reverse('task-my-tasks'))
+        self.assertPageBudget(1, reverse('task-my-tasks'))
+        self.assertPageBudget(2, reverse('task-my-tasks'), {'status': 'NEW'})
+
+    def test_search_budget(self):
+        self.assertPageBudget(2, reverse('task-search'), {'q': 'Task'})
+
+    def test_user_list_budget(self):
+        self.assertPageBudget(2, reverse('user-list'))
+
+    # Detail endpoints
+    def test_task_detail_budgets(self):
+        detail_url = reverse('task-detail', kwargs={'pk': self.task.id})
+        self.assertQueryBudget(1, 'get', detail_url)
+        self.assertQueryBudget(1, 'get', reverse('task-can-edit-title', kwargs={'pk': self.task.id}))
+        # Mutation actions are one guarded UPDATE; renames run it in a savepoint
+        self.assertQueryBudget(1 + NOTIFY, 'post', reverse('task-complete', kwargs={'pk': self.task.id}))
+        self.assertQueryBudget(
+            1 + NOTIFY, 'patch', reverse('task-update-description', kwargs={'pk': self.task.id}),
+            {'description': 'Updated'}
+        )
+        self.assertQueryBudget(
+            1 + NOTIFY, 'patch', reverse('task-update-status', kwargs={'pk': self.task.id}),
+            {'status': 'IN_PROGRESS'}
+        )
+        self.assertQueryBudget(
+            3 + NOTIFY, 'patch', reverse('task-update-title', kwargs={'pk': self.task.id}),
+            {'title': 'Renamed'}
+        )
+        self.assertQueryBudget(3 + NOTIFY, 'patch', detail_url, {'title': 'Renamed again'})
+        self.assertQueryBudget(1 + NOTIFY, 'post', reverse('task-list'), {'title': 'Brand new'})
+        self.assertQueryBudget(3 + NOTIFY, 'delete', detail_url)
+
+    def test_bulk_task_budgets(self):
+        # Title check + insert; status UPDATE; DELETE + tombstones in a
+        # savepoint. Skipped ids add one lookup. NOTIFYs for the batch go out
+        # in one statement
+        ids = list(Task.objects.filter(user=self.user).values_list('id', flat=True))
+        for size in (1, 10, 50):
+            with self.subTest(size=size):
+                self.assertQueryBudget(
+                    2 + NOTIFY, 'post', reverse('task-bulk-create'),
+                    {'tasks': [{'title': f'Bulk {size}-{i}'} for i in range(size)]}
+                )
+                self.assertQueryBudget(
+                    1 + NOTIFY, 'post', reverse('task-bulk-update-status'),
+                    {'ids': ids[:size], 'status': 'IN_PROGRESS'}
+                )
+        self.assertQueryBudget(
+            2 + NOTIFY, 'post', reverse('task-bulk-update-status'), {'ids': ids[:10] + [0], 'status': 'COMPLETED'}
+        )
+        self.assertQueryBudget(4 + NOTIFY, 'post', reverse('task-bulk-delete'), {'ids': ids[:50]})
+
+    def test_user_detail_budgets(self):
+        self.assertQueryBudget(0, 'get', reverse('user-me'))
+        self.assertQueryBudget(1, 'put', reverse('user-me'), {'first_name': 'Updated'})
+        self.assertQueryBudget(1, 'get', reverse('user-detail', kwargs={'pk': self.other_user.id}))
+        self.assertQueryBudget(1, 'get', reverse('user-get-user', kwargs={'pk': self.other_user.id}))
+
+    def test_auth_endpoint_budgets(self):
+        # Workers load the revoked token filter when they start
+        revoked_tokens.load()
+        client = APIClient()
+        credentials = {'username': 'testuser', 'password': 'testpass123'}
+        access = client.post(reverse('login-list'), credentials, format='json').data['access']
+        budgets = (
+            (5, reverse('register-list'),
+             {'username': 'newuser', 'password': 'newpass123', 'first_name': 'New'}),
+            (2, reverse('login-list'), credentials),
+            (2, reverse('token_obtain_pair'), credentials),
+            (1, reverse('token_verify'), {'token': access}),
+            (1, reverse('token_refresh'), None),
+        )
+        for budget, url, data in budgets:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    response = client.post(url, data, format='json')
+                self.assertLess(response.status_code, 400, response.data)
+                self.assertEqual(len(context.captured_queries), budget)
+
+        self.client.cookies = client.cookies
+        self.assertQueryBudget(6, 'post', reverse('logout-list'))
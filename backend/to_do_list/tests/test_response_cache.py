@@ -0,0 +1,94 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.models import Task, User
+
+
+class TaskResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            password='otherpass123',
+            first_name='Other'
+        )
+        self.task = Task.objects.create(user=self.user, title='Test Task')
+        self.other_task = Task.objects.create(user=self.other_user, title='Other Task')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.my_tasks_url = reverse('task-my-tasks')
+        self.task_list_url = reverse('task-list')
+
+    def assertCached(self, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(context.captured_queries), 0)
+        return response
+
+    def test_repeated_reads_are_served_from_cache(self):
+        for url, params in (
+            (self.my_tasks_url, None),
+            (self.task_list_url, {'page_size': 5}),
+            (reverse('task-search'), {'q': 'task'}),
+        ):
+            with self.subTest(url=url):
+                first = self.client.get(url, params)
+                self.assertEqual(self.assertCached(url, params).data, first.data)
+
+    def test_query_params_and_users_get_separate_entries(self):
+        self.client.get(self.my_tasks_url)
+        response = self.client.get(self.my_tasks_url, {'status': 'COMPLETED'})
+        self.assertEqual(response.data['results'], [])
+
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(self.my_tasks_url)
+        self.assertEqual(response.data['results'][0]['id'], self.other_task.id)
+
+    def test_errors_are_not_cached(self):
+        self.assertEqual(self.client.get(reverse('task-search')).status_code, 400)
+        response = self.client.get(reverse('task-search'), {'q': 'Test'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_every_write_path_invalidates(self):
+        detail_url = reverse('task-detail', kwargs={'pk': self.task.id})
+        writes = (
+            ('post', self.task_list_url, {'title': 'Created'}),
+            ('post', reverse('task-complete', kwargs={'pk': self.task.id}), None),
+            ('patch', reverse('task-update-title', kwargs={'pk': self.task.id}), {'title': 'Renamed'}),
+            ('patch', reverse('task-update-description', kwargs={'pk': self.task.id}), {'description': 'Desc'}),
+            ('patch', reverse('task-update-status', kwargs={'pk': self.task.id}), {'status': 'IN_PROGRESS'}),
+            ('put', detail_url, {'title': 'Replaced', 'description': '', 'status': 'COMPLETED'}),
+            ('patch', detail_url, {'description': 'Patched'}),
+            ('delete', detail_url, None),
+        )
+        for method, url, data in writes:
+            with self.subTest(method=method, url=url):
+                before = self.client.get(self.my_tasks_url).data
+                global_before = self.client.get(self.task_list_url).data
+                response = getattr(self.client, method)(url, data, format='json')
+                self.assertLess(response.status_code, 400)
+                self.assertNotEqual(self.client.get(self.my_tasks_url).data, before)
+                self.assertNotEqual(self.client.get(self.task_list_url).data, global_before)
+
+    def test_other_users_writes_keep_my_tasks_cached(self):
+        self.client.get(self.my_tasks_url)
+        Task.objects.create(user=self.other_user, title='Unrelated')
+        self.assertCached(self.my_tasks_url)
+
+    @override_settings(TASK_RESPONSE_CACHE_TIMEOUT=0)
+    def test_cache_can_be_disabled(self):
+        self.client.get(self.my_tasks_url)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.my_tasks_url)
+        self.assertGreater(len(context.captured_queries), 0)
@@ -0,0 +1,67 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from to_do_list.models import User
+from to_do_list.retention import TokenPruner, prune_expired_tokens
+
+
+class TokenRetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        now = timezone.now()
+        for index in range(5):
+            expired = self.outstand(f'expired-{index}', now - timedelta(days=index + 1))
+            if index % 2 == 0:
+                BlacklistedToken.objects.create(token=expired)
+        live = self.outstand('live', now + timedelta(days=1))
+        BlacklistedToken.objects.create(token=live)
+
+    def outstand(self, jti, expires_at):
+        return OutstandingToken.objects.create(
+            user=self.user, jti=jti, token=jti, created_at=expires_at - timedelta(days=14), expires_at=expires_at
+        )
+
+    def test_prunes_expired_tokens_in_batches(self):
+        result = prune_expired_tokens(batch_size=2)
+        self.assertEqual((result['outstanding'], result['blacklisted'], result['batches']), (5, 3, 3))
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+    def test_max_batches_bounds_a_run(self):
+        result = prune_expired_tokens(batch_size=2, max_batches=1)
+        self.assertEqual((result['outstanding'], result['batches']), (2, 1))
+        self.assertEqual(OutstandingToken.objects.count(), 4)
+
+    def test_command_reports_rows_removed(self):
+        output = StringIO()
+        call_command('prune_tokens', '--dry-run', stdout=output)
+        self.assertIn('5 expired outstanding tokens (3 blacklisted)', output.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 6)
+
+        output = StringIO()
+        call_command('prune_tokens', '--batch-size', '10', stdout=output)
+        self.assertIn('Removed 5 outstanding and 3 blacklisted tokens in 1 batches', output.getvalue())
+
+    def test_pruner_stats_in_metrics(self):
+        pruner = TokenPruner()
+        pruner.record(prune_expired_tokens())
+        self.assertEqual(pruner.get_stats()['outstanding'], 5)
+
+        admin = User.objects.create_user(
+            username='adminuser', password='adminpass123', first_name='Admin', is_staff=True
+        )
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        response = client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('token_retention', response.data)
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.authentication import ClaimsRefreshToken
+from to_do_list.caching import user_auth_cache, user_cache
+from to_do_list.models import Task, User
+
+# Registered before the test databases are set up; as a test mirror it connects
+# to the default test database instead of creating its own
+connections.settings.setdefault('replica', {
+    **connections.settings['default'],
+    'TEST': {**connections.settings['default']['TEST'], 'MIRROR': 'default'},
+})
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], TASK_SYNC_SETTLE_SECONDS=0)
+class ReplicaRoutingTests(APITestCase):
+    """
+    'replica' is a second connection to the test database. It cannot see rows
+    the test case has not committed, so it behaves like a lagging replica.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        user_auth_cache.local.clear()
+        user_cache.local.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        Task.objects.create(user=self.user, title='Existing task')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def my_tasks_count(self, client=None):
+        response = (client or self.client).get(reverse('task-my-tasks'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['pagination']['total_items']
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.my_tasks_count(), 0)
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, self.client.cookies)
+
+    def test_writer_reads_from_primary(self):
+        response = self.client.post(reverse('task-list'), {'title': 'New task'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.cookies[settings.REPLICA_PIN_COOKIE]['max-age'],
+            settings.DATABASE_REPLICA_PIN_SECONDS
+        )
+        self.assertEqual(self.my_tasks_count(), 2)
+
+        # Other clients still read from the replica
+        other_client = APIClient()
+        other_client.force_authenticate(user=self.user)
+        cache.clear()
+        self.assertEqual(self.my_tasks_count(other_client), 0)
+
+    def test_sync_reads_from_primary(self):
+        response = self.client.get(reverse('task-sync'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_code_outside_requests_reads_from_primary(self):
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_shared_caches_are_filled_from_primary(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}')
+        # The replica has not seen the user yet
+        response = client.get(reverse('user-me'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_auth_cache.get(self.user.id)[:2], (True, 'testuser'))
+        self.assertEqual(user_cache.get(self.user.id).username, 'testuser')
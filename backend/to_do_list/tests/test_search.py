@@ -0,0 +1,138 @@
+import unittest
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.models import Task, User
+from to_do_list.operations import extension_installed
+
+requires_postgres = unittest.skipUnless(
+    connection.vendor == 'postgresql', 'Full-text search needs PostgreSQL'
+)
+
+
+class TaskSearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.title_match = Task.objects.create(
+            user=self.user,
+            title='Prepare quarterly report',
+            description='Numbers for finance'
+        )
+        self.description_match = Task.objects.create(
+            user=self.user,
+            title='Email finance',
+            description='Ask about the quarterly report deadline'
+        )
+        Task.objects.create(user=self.user, title='Buy groceries', description='Milk and bread')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.search_url = reverse('task-search')
+
+    def result_ids(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [task['id'] for task in response.data['results']]
+
+    def test_search_requires_term(self):
+        response = self.client.get(self.search_url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @requires_postgres
+    def test_search_vector_follows_updates(self):
+        self.title_match.title = 'Renamed completely'
+        self.title_match.save()
+        response = self.client.get(self.search_url, {'q': 'renamed'})
+        self.assertEqual(self.result_ids(response), [self.title_match.id])
+
+    @requires_postgres
+    def test_fulltext_search_ranks_title_matches_first(self):
+        response = self.client.get(self.search_url, {'q': 'quarterly report'})
+        self.assertEqual(self.result_ids(response), [self.title_match.id, self.description_match.id])
+
+    @requires_postgres
+    def test_fulltext_search_matches_prefixes(self):
+        response = self.client.get(self.search_url, {'q': 'quart rep'})
+        self.assertEqual(len(self.result_ids(response)), 2)
+
+        response = self.client.get(self.search_url, {'q': 'grocer'})
+        self.assertEqual(len(self.result_ids(response)), 1)
+
+    @requires_postgres
+    def test_fulltext_search_respects_explicit_ordering(self):
+        response = self.client.get(self.search_url, {'q': 'quarterly', 'ordering': 'title'})
+        self.assertEqual(self.result_ids(response), [self.description_match.id, self.title_match.id])
+
+    @requires_postgres
+    def test_search_filter_uses_fulltext(self):
+        response = self.client.get(reverse('task-my-tasks'), {'search': 'finance'})
+        self.assertEqual(
+            sorted(self.result_ids(response)),
+            sorted([self.title_match.id, self.description_match.id])
+        )
+
+    @override_settings(TASK_SEARCH_BACKEND='icontains')
+    def test_icontains_fallback(self):
+        # The search action only matches titles, as before full-text search
+        response = self.client.get(self.search_url, {'q': 'uarterly rep'})
+        self.assertEqual(self.result_ids(response), [self.title_match.id])
+
+        response = self.client.get(reverse('task-my-tasks'), {'search': 'finance'})
+        self.assertEqual(len(self.result_ids(response)), 2)
+
+
+@override_settings(TASK_SEARCH_BACKEND='trigram', TASK_TRIGRAM_THRESHOLD=0.5)
+class TrigramSearchTests(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not extension_installed(connection, 'pg_trgm'):
+            raise unittest.SkipTest('pg_trgm is not installed on this database server')
+        super().setUpClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.report = Task.objects.create(user=self.user, title='Prepare quarterly report')
+        self.groceries = Task.objects.create(
+            user=self.user, title='Shopping', description='Buy groceries for the week'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.search_url = reverse('task-search')
+
+    def result_ids(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [task['id'] for task in response.data['results']]
+
+    def test_substring_match(self):
+        response = self.client.get(self.search_url, {'q': 'arterly rep'})
+        self.assertEqual(self.result_ids(response), [self.report.id])
+
+    def test_typo_tolerant_match(self):
+        response = self.client.get(self.search_url, {'q': 'quartrly'})
+        self.assertEqual(self.result_ids(response), [self.report.id])
+
+    def test_threshold_is_configurable(self):
+        with override_settings(TASK_TRIGRAM_THRESHOLD=0.95):
+            response = self.client.get(self.search_url, {'q': 'quartrly'})
+        self.assertEqual(self.result_ids(response), [])
+
+    def test_search_filter_covers_description(self):
+        response = self.client.get(reverse('task-my-tasks'), {'search': 'grocries'})
+        self.assertEqual(self.result_ids(response), [self.groceries.id])
+
+    def test_substring_search_uses_trigram_index(self):
+        queryset = Task.objects.filter(title__icontains='quarter')
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            plan = queryset.explain()
+            cursor.execute('RESET enable_seqscan')
+        self.assertIn('task_title_trgm', plan)
@@ -0,0 +1,262 @@
+import json
+import unittest
+from datetime import timedelta
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.models import Task, TaskStatusCount, TaskTombstone, User, UserShard
+from to_do_list.sharding import ScatteredQuerySet, move_user, shard_for_user, user_shard_cache
+
+SHARD = 'shard_test'
+
+if connection.vendor == 'postgresql':
+    # Registered before the test databases are set up, so the runner creates
+    # and migrates a second test database for it
+    connections.settings.setdefault(SHARD, {
+        **connections.settings['default'],
+        'TEST': {
+            **connections.settings['default']['TEST'],
+            'NAME': f"test_{connections.settings['default']['NAME']}_shard",
+        },
+    })
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Sharding needs PostgreSQL')
+@override_settings(TASK_SHARDS=['default', SHARD], TASK_SYNC_SETTLE_SECONDS=0)
+class TaskShardingTests(APITestCase):
+    databases = {'default', SHARD}
+
+    def setUp(self):
+        cache.clear()
+        user_shard_cache.local.clear()
+        self.local_user = self.create_user('localuser', 'default')
+        self.remote_user = self.create_user('remoteuser', SHARD)
+        now = timezone.now()
+        for index in range(3):
+            self.create_task(self.local_user, f'Local {index}', now - timedelta(minutes=2 * index))
+            self.create_task(self.remote_user, f'Remote {index}', now - timedelta(minutes=2 * index + 1))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.remote_user)
+
+    def create_user(self, username, shard):
+        user = User.objects.create_user(username=username, password='testpass123', first_name='Test')
+        UserShard.objects.create(user=user, shard=shard)
+        if shard != 'default':
+            User.objects.using(shard).bulk_create([user])
+        return user
+
+    def create_task(self, user, title, created_at):
+        task = Task(user=user, title=title)
+        task.save(using=shard_for_user(user.id))
+        Task.objects.using(task._state.db).filter(pk=task.pk).update(created_at=created_at)
+        return task
+
+    def list_titles(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [task['title'] for task in response.data['results']], response.data['pagination']
+
+    def test_tasks_live_on_their_users_shard(self):
+        self.assertEqual(Task.objects.using(SHARD).filter(user=self.remote_user).count(), 3)
+        self.assertFalse(Task.objects.using('default').filter(user=self.remote_user).exists())
+
+    def test_new_user_is_placed_and_copied(self):
+        user = User.objects.create_user(username='newcomer', password='testpass123', first_name='New')
+        shard = shard_for_user(user.id)
+        self.assertEqual(shard, ['default', SHARD][user.id % 2])
+        self.assertEqual(UserShard.objects.get(user=user).shard, shard)
+        self.assertTrue(User.objects.using(shard).filter(pk=user.id).exists())
+
+    def test_create_and_my_tasks_use_the_users_shard(self):
+        response = self.client.post(reverse('task-list'), {'title': 'New task'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertTrue(Task.objects.using(SHARD).filter(pk=response.data['id']).exists())
+        # Ids come from the default database's sequence
+        self.assertFalse(Task.objects.using('default').filter(pk=response.data['id']).exists())
+
+        titles, pagination = self.list_titles(reverse('task-my-tasks'))
+        self.assertEqual(pagination['total_items'], 4)
+        self.assertIn('New task', titles)
+
+    def test_global_list_merges_shards(self):
+        titles, pagination = self.list_titles(reverse('task-list'), page_size=4)
+        self.assertEqual(titles, ['Local 0', 'Remote 0', 'Local 1', 'Remote 1'])
+        self.assertEqual(pagination['total_items'], 6)
+
+        titles, _ = self.list_titles(reverse('task-list'), page_size=4, page=2)
+        self.assertEqual(titles, ['Local 2', 'Remote 2'])
+
+        titles, _ = self.list_titles(reverse('task-list'), ordering='title', page_size=6)
+        self.assertEqual(titles, sorted(titles))
+
+    def test_global_list_cursor_pages(self):
+        titles, pagination = self.list_titles(reverse('task-list'), cursor='', page_size=4)
+        self.assertEqual(titles, ['Local 0', 'Remote 0', 'Local 1', 'Remote 1'])
+        response = self.client.get(pagination['next'])
+        self.assertEqual([task['title'] for task in response.data['results']], ['Local 2', 'Remote 2'])
+
+    def test_title_cursor_pages_merge_mixed_case(self):
+        self.create_task(self.local_user, 'apple', timezone.now())
+        self.create_task(self.remote_user, 'Banana', timezone.now())
+        titles, pagination = self.list_titles(reverse('task-list'), cursor='', ordering='title', page_size=4)
+        while pagination['next']:
+            response = self.client.get(pagination['next'])
+            titles += [task['title'] for task in response.data['results']]
+            pagination = response.data['pagination']
+        self.assertEqual(titles, sorted(titles))
+        self.assertEqual(len(titles), 8)
+
+    def test_export_merges_shards(self):
+        response = self.client.get(reverse('task-export'))
+        titles = [json.loads(line)['title'] for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(titles, ['Local 0', 'Remote 0', 'Local 1', 'Remote 1', 'Local 2', 'Remote 2'])
+
+    def test_user_id_filter_uses_that_users_shard(self):
+        titles, pagination = self.list_titles(reverse('task-list'), user_id=self.local_user.id)
+        self.assertEqual(pagination['total_items'], 3)
+        self.assertTrue(all(title.startswith('Local') for title in titles))
+
+    def test_detail_actions_find_other_shards(self):
+        task = Task.objects.using('default').filter(user=self.local_user).first()
+        response = self.client.get(reverse('task-detail', args=[task.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], task.title)
+
+        response = self.client.delete(reverse('task-detail', args=[task.id]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_delete_records_tombstone_on_the_shard(self):
+        task = Task.objects.using(SHARD).filter(user=self.remote_user).first()
+        response = self.client.delete(reverse('task-detail', args=[task.id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(TaskTombstone.objects.using(SHARD).filter(task_id=task.id).exists())
+
+        response = self.client.get(reverse('task-sync'))
+        self.assertEqual(response.data['deleted'], [task.id])
+
+    def test_bulk_actions_use_the_users_shard(self):
+        response = self.client.post(
+            reverse('task-bulk-create'), {'tasks': [{'title': 'Bulk A'}, {'title': 'Bulk B'}]}, format='json'
+        )
+        created = [result['task']['id'] for result in response.data['results']]
+        self.assertEqual(Task.objects.using(SHARD).filter(id__in=created).count(), 2)
+        self.assertFalse(Task.objects.using('default').filter(id__in=created).exists())
+
+        local = Task.objects.using('default').filter(user=self.local_user).first()
+        response = self.client.post(reverse('task-bulk-delete'), {'ids': created + [local.id]}, format='json')
+        self.assertEqual([result['status'] for result in response.data['results']], [204, 204, 403])
+        self.assertEqual(
+            sorted(TaskTombstone.objects.using(SHARD).values_list('task_id', flat=True)), sorted(created)
+        )
+
+    def test_import_writes_to_the_users_shard(self):
+        body = b'{"title": "Imported"}\n{"title": "Remote 0"}\n'
+        response = self.client.generic(
+            'POST', reverse('task-import') + '?on_conflict=rename', body, content_type='application/x-ndjson'
+        )
+        summary = json.loads(b''.join(response.streaming_content).splitlines()[-1])
+        self.assertEqual((summary['created'], summary['renamed']), (2, 1))
+        self.assertEqual(
+            set(Task.objects.using(SHARD).filter(title__in=['Imported', 'Remote 0 (2)']).values_list('title', flat=True)),
+            {'Imported', 'Remote 0 (2)'}
+        )
+        self.assertFalse(Task.objects.using('default').filter(title='Imported').exists())
+
+    def test_move_user_keeps_rows_intact(self):
+        before = list(Task.objects.using(SHARD).filter(user=self.remote_user).values_list(
+            'id', 'title', 'created_at', 'updated_at'
+        ).order_by('id'))
+        moved = move_user(self.remote_user.id, 'default')
+
+        self.assertEqual(moved, 3)
+        self.assertEqual(shard_for_user(self.remote_user.id), 'default')
+        self.assertFalse(Task.objects.using(SHARD).filter(user=self.remote_user).exists())
+        self.assertFalse(User.objects.using(SHARD).filter(pk=self.remote_user.id).exists())
+        after = list(Task.objects.using('default').filter(user=self.remote_user).values_list(
+            'id', 'title', 'created_at', 'updated_at'
+        ).order_by('id'))
+        self.assertEqual(after, before)
+
+    def test_interrupted_move_can_be_retried(self):
+        task = Task.objects.using(SHARD).filter(user=self.remote_user).first()
+        task.delete()
+        before = list(Task.objects.using(SHARD).filter(user=self.remote_user).values_list(
+            'id', 'title', 'created_at', 'updated_at'
+        ).order_by('id'))
+        # What a move that died after copying leaves behind
+        Task.objects.using('default').bulk_create(Task.objects.using(SHARD).filter(user=self.remote_user))
+        TaskTombstone.objects.using('default').bulk_create(
+            TaskTombstone.objects.using(SHARD).filter(user=self.remote_user)
+        )
+
+        moved = move_user(self.remote_user.id, 'default')
+
+        self.assertEqual(moved, 3)
+        after = list(Task.objects.using('default').filter(user=self.remote_user).values_list(
+            'id', 'title', 'created_at', 'updated_at'
+        ).order_by('id'))
+        self.assertEqual(after, before)
+        self.assertEqual(TaskTombstone.objects.using('default').filter(user=self.remote_user).count(), 1)
+
+    def test_renaming_a_user_updates_their_shard_copy(self):
+        self.remote_user.username = 'renamed'
+        self.remote_user.save()
+
+        response = self.client.get(reverse('task-my-tasks'))
+        self.assertEqual({task['user'] for task in response.data['results']}, {'renamed'})
+        self.assertEqual(User.objects.using(SHARD).get(pk=self.remote_user.id).username, 'renamed')
+
+    def test_stats_follow_a_moved_user(self):
+        self.client.post(reverse('task-complete', kwargs={'pk': Task.objects.using(SHARD).filter(
+            user=self.remote_user
+        ).first().id}))
+        move_user(self.remote_user.id, 'default')
+
+        response = self.client.get(reverse('task-stats'))
+        self.assertEqual(response.data['by_status'], {'NEW': 2, 'IN_PROGRESS': 0, 'COMPLETED': 1})
+        self.assertFalse(TaskStatusCount.objects.using(SHARD).exists())
+
+    def test_rebalance_command(self):
+        for index in range(3, 9):
+            self.create_task(self.local_user, f'Local {index}', timezone.now())
+        extra = self.create_user('extrauser', 'default')
+        for index in range(4):
+            self.create_task(extra, f'Extra {index}', timezone.now())
+
+        output = StringIO()
+        call_command('rebalance_shards', '--dry-run', stdout=output)
+        self.assertIn(f'Would move user {extra.id} from default to {SHARD}', output.getvalue())
+        self.assertEqual(shard_for_user(extra.id), 'default')
+
+        call_command('rebalance_shards', stdout=StringIO())
+        self.assertEqual(shard_for_user(extra.id), SHARD)
+        self.assertEqual(Task.objects.using(SHARD).count(), 7)
+
+    def test_deleting_a_user_clears_their_shard(self):
+        self.remote_user.delete()
+        self.assertFalse(Task.objects.using(SHARD).exists())
+        self.assertFalse(User.objects.using(SHARD).exists())
+
+
+class ScatteredQuerySetTests(unittest.TestCase):
+    def test_slices_compose(self):
+        scattered = ScatteredQuerySet(Task.objects.order_by('id'), ['default'])[2:10][3:5]
+        self.assertEqual((scattered.start, scattered.stop), (5, 7))
+
+    def test_filtering_a_slice_is_refused(self):
+        with self.assertRaises(TypeError):
+            ScatteredQuerySet(Task.objects.all(), ['default'])[:5].filter(status='NEW')
+
+    def test_text_ordering_uses_code_point_collation(self):
+        scattered = ScatteredQuerySet(Task.objects.order_by('-title', 'id'), ['default'])
+        sql = str(scattered.shard_querysets()[0].query)
+        self.assertIn('ORDER BY "to_do_list_task"."title" COLLATE "C" DESC', sql)
+        sql = str(ScatteredQuerySet(Task.objects.order_by('id'), ['default']).shard_querysets()[0].query)
+        self.assertNotIn('COLLATE', sql)
@@ -0,0 +1,93 @@
+import unittest
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.models import Task, TaskStatusCount, User
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Task status counters need PostgreSQL')
+class TaskStatsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            password='otherpass123',
+            first_name='Other'
+        )
+        self.tasks = [Task.objects.create(user=self.user, title=f'Task {i}') for i in range(3)]
+        Task.objects.create(user=self.other_user, title='Not mine', status='COMPLETED')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.stats_url = reverse('task-stats')
+
+    def stats(self):
+        response = self.client.get(self.stats_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def assertCounts(self, new, in_progress, completed):
+        self.assertEqual(self.stats(), {
+            'total': new + in_progress + completed,
+            'by_status': {'NEW': new, 'IN_PROGRESS': in_progress, 'COMPLETED': completed},
+        })
+
+    def test_stats_is_one_lookup(self):
+        with CaptureQueriesContext(connection) as context:
+            self.assertCounts(3, 0, 0)
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_single_task_writes_keep_counts(self):
+        self.client.post(reverse('task-list'), {'title': 'Created'}, format='json')
+        self.client.post(reverse('task-complete', kwargs={'pk': self.tasks[0].id}))
+        self.client.patch(
+            reverse('task-update-status', kwargs={'pk': self.tasks[1].id}), {'status': 'IN_PROGRESS'}, format='json'
+        )
+        self.client.patch(reverse('task-detail', kwargs={'pk': self.tasks[1].id}), {'title': 'Renamed'}, format='json')
+        self.assertCounts(2, 1, 1)
+
+        self.client.delete(reverse('task-detail', kwargs={'pk': self.tasks[0].id}))
+        self.assertCounts(2, 1, 0)
+
+    def test_bulk_and_queryset_writes_keep_counts(self):
+        self.client.post(
+            reverse('task-bulk-create'), {'tasks': [{'title': f'Bulk {i}'} for i in range(4)]}, format='json'
+        )
+        self.client.post(
+            reverse('task-bulk-update-status'),
+            {'ids': [task.id for task in self.tasks], 'status': 'COMPLETED'}, format='json'
+        )
+        self.assertCounts(4, 0, 3)
+
+        self.client.post(reverse('task-bulk-delete'), {'ids': [self.tasks[0].id]}, format='json')
+        Task.objects.filter(user=self.user, title__startswith='Bulk').update(status='IN_PROGRESS')
+        Task.objects.filter(user=self.user, title='Bulk 0').delete()
+        self.assertCounts(0, 3, 2)
+
+    def test_user_delete_cascades(self):
+        self.other_user.delete()
+        self.assertFalse(TaskStatusCount.objects.filter(user_id=self.other_user.id).exists())
+        self.assertCounts(3, 0, 0)
+
+    def test_reconcile_repairs_drift(self):
+        TaskStatusCount.objects.filter(user=self.user, status='NEW').update(count=7)
+        TaskStatusCount.objects.create(user=self.user, status='COMPLETED', count=2)
+
+        output = StringIO()
+        call_command('reconcile_task_counts', '--dry-run', stdout=output)
+        self.assertIn('Found 2 drifted counters among 2 users', output.getvalue())
+        self.assertEqual(self.stats()['total'], 9)
+
+        output = StringIO()
+        call_command('reconcile_task_counts', '--batch-size', '1', stdout=output)
+        self.assertIn(f'default: user {self.user.id} NEW counted 7, has 3', output.getvalue())
+        self.assertIn('Fixed 2 drifted counters', output.getvalue())
+        self.assertCounts(3, 0, 0)
@@ -0,0 +1,95 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from to_do_list.models import Task, TaskTombstone, User
+
+
+@override_settings(TASK_SYNC_SETTLE_SECONDS=0)
+class TaskSyncTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            password='otherpass123',
+            first_name='Other'
+        )
+        self.tasks = [Task.objects.create(user=self.user, title=f'Task {i}') for i in range(3)]
+        Task.objects.create(user=self.other_user, title='Not mine')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.sync_url = reverse('task-sync')
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        response = self.client.get(self.sync_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response.data
+
+    def test_initial_sync_returns_all_own_tasks(self):
+        data = self.sync()
+        self.assertEqual([task['id'] for task in data['results']], [task.id for task in self.tasks])
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['has_more'])
+
+    def test_sync_returns_only_changes(self):
+        watermark = self.sync()['watermark']
+        self.assertEqual(self.sync(watermark)['results'], [])
+
+        self.client.patch(
+            reverse('task-detail', kwargs={'pk': self.tasks[0].id}), {'title': 'Renamed'}, format='json'
+        )
+        created = self.client.post(reverse('task-list'), {'title': 'New task'}, format='json').data
+        data = self.sync(watermark)
+        self.assertEqual([task['id'] for task in data['results']], [self.tasks[0].id, created['id']])
+        self.assertEqual(data['results'][0]['title'], 'Renamed')
+
+    def test_deletes_are_returned_as_tombstones(self):
+        watermark = self.sync()['watermark']
+        self.client.delete(reverse('task-detail', kwargs={'pk': self.tasks[1].id}))
+
+        data = self.sync(watermark)
+        self.assertEqual(data['results'], [])
+        self.assertEqual(data['deleted'], [self.tasks[1].id])
+        self.assertEqual(self.sync(data['watermark'])['deleted'], [])
+
+    def test_batches_resume_from_watermark(self):
+        first = self.sync(page_size=2)
+        self.assertTrue(first['has_more'])
+        second = self.sync(first['watermark'], page_size=2)
+        self.assertFalse(second['has_more'])
+        synced = [task['id'] for task in first['results'] + second['results']]
+        self.assertEqual(synced, [task.id for task in self.tasks])
+
+    def test_same_timestamp_is_broken_by_id(self):
+        Task.objects.filter(user=self.user).update(updated_at=self.tasks[0].updated_at)
+        first = self.sync(page_size=1)
+        second = self.sync(first['watermark'], page_size=1)
+        self.assertEqual([first['results'][0]['id'], second['results'][0]['id']], [self.tasks[0].id, self.tasks[1].id])
+
+    @override_settings(TASK_SYNC_SETTLE_SECONDS=60)
+    def test_recent_changes_wait_for_the_next_sync(self):
+        data = self.sync()
+        self.assertEqual(data['results'], [])
+        self.assertEqual(self.sync(data['watermark'])['results'], [])
+
+    def test_invalid_watermark(self):
+        response = self.client.get(self.sync_url, {'since': 'not-a-watermark'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_is_independent_of_changes(self):
+        with CaptureQueriesContext(connection) as context:
+            self.sync(page_size=100)
+        self.assertEqual(len(context.captured_queries), 2)
+
+    def test_deleting_a_user_leaves_no_tombstones(self):
+        self.other_user.delete()
+        self.assertFalse(TaskTombstone.objects.exists())
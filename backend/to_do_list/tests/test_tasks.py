@@ -1,4 +1,6 @@
+from datetime import timedelta
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from to_do_list.models import Task, User
@@ -118,4 +120,53 @@ class TaskTests(APITestCase):
         response = self.client.get(self.task_list_url, {'status': 'COMPLETED'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
-        self.assertEqual(response.data['results'][0]['status'], 'COMPLETED')
\ No newline at end of file
+        self.assertEqual(response.data['results'][0]['status'], 'COMPLETED')
+
+    # Mutation Action Tests
+    def action_url(self, name, task=None):
+        return reverse(f'task-{name}', kwargs={'pk': (task or self.task).id})
+
+    def test_complete_task(self):
+        response = self.client.post(self.action_url('complete'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'COMPLETED')
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.status, self.task.description), ('COMPLETED', 'Test Description'))
+
+    def test_update_title_rules(self):
+        Task.objects.create(user=self.user, title='Taken')
+        response = self.client.patch(self.action_url('update-title'), {'title': 'Taken'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(self.action_url('update-title'), {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.data['title'], 'Renamed')
+
+        Task.objects.filter(pk=self.task.pk).update(created_at=timezone.now() - timedelta(minutes=6))
+        response = self.client.patch(self.action_url('update-title'), {'title': 'Too late'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Renamed')
+
+    def test_update_status_cannot_return_to_new(self):
+        self.client.patch(self.action_url('update-status'), {'status': 'IN_PROGRESS'}, format='json')
+        response = self.client.patch(self.action_url('update-status'), {'status': 'NEW'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'IN_PROGRESS')
+
+    def test_mutation_actions_check_ownership(self):
+        self.client.force_authenticate(user=self.other_user)
+        for method, name, data in (
+            ('post', 'complete', None),
+            ('patch', 'update-title', {'title': 'Should Not Work'}),
+            ('patch', 'update-description', {'description': 'Should Not Work'}),
+            ('patch', 'update-status', {'status': 'COMPLETED'}),
+        ):
+            with self.subTest(name=name):
+                response = getattr(self.client, method)(self.action_url(name), data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.status), ('Test Task', 'NEW'))
+
+        response = self.client.post(reverse('task-complete', kwargs={'pk': self.task.id + 1000}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
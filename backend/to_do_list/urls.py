@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import (
@@ -7,15 +8,25 @@ from rest_framework_simplejwt.views import (
 )
 from . import views
 
+# ASGI deployments serve the read paths from the event loop (see to_do_list.async_views)
+if settings.ASYNC_VIEWS:
+    from .async_views import AsyncTaskViewSet as TaskViewSet, AsyncUserViewSet as UserViewSet
+else:
+    from .views import TaskViewSet, UserViewSet
+
 router = DefaultRouter()
-router.register(r'users', views.UserViewSet, basename='user')
+router.register(r'users', UserViewSet, basename='user')
 router.register(r'login', views.LoginViewSet, basename='login')
 router.register(r'register', views.UserRegistrationViewSet, basename='register')
-router.register(r'tasks', views.TaskViewSet, basename='task')
+router.register(r'tasks', TaskViewSet, basename='task')
 router.register(r'logout', views.LogoutViewSet, basename='logout')
 
 urlpatterns = [
+    # Ahead of the router, whose task detail route would match 'events'
+    path('tasks/events/', views.task_events, name='task-events'),
     path('', include(router.urls)),
+    path('batch/', views.batch, name='batch'),
+    path('metrics/', views.metrics, name='metrics'),
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', views.CookieTokenRefreshView.as_view(), name='token_refresh'),
     path('token/verify/', TokenVerifyView.as_view(), name='token_verify'),
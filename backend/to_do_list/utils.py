@@ -1,3 +1,7 @@
+from functools import lru_cache
+from django.core.exceptions import FieldDoesNotExist
+
+
 class CreateResponse:
     @staticmethod
     def create_user_response(user, token_data=None, access_token=None):
@@ -19,4 +23,41 @@ class CreateResponse:
         if access_token:
             response_data['access'] = str(access_token)
             
-        return response_data
\ No newline at end of file
+        return response_data
+
+class QueryPlanner:
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def for_serializer(serializer_class):
+        """
+        Work out which relations to join and which columns to load so that
+        serializing a model instance never triggers a lazy query.
+        Returns (select_related, only) tuples; `only` is None when a field
+        reads something that is not a plain model column (method, property).
+        """
+        model = serializer_class.Meta.model
+        related, columns = set(), {model._meta.pk.name}
+
+        for field in serializer_class().fields.values():
+            if field.write_only:
+                continue
+            if not field.source_attrs:
+                return tuple(sorted(related)), None
+
+            current_model = model
+            for depth, attr in enumerate(field.source_attrs):
+                try:
+                    model_field = current_model._meta.get_field(attr)
+                except FieldDoesNotExist:
+                    return tuple(sorted(related)), None
+
+                path = '__'.join(field.source_attrs[:depth + 1])
+                columns.add(path)
+                if not model_field.is_relation:
+                    break
+                if model_field.many_to_many or model_field.one_to_many:
+                    return tuple(sorted(related)), None
+                related.add(path)
+                current_model = model_field.related_model
+
+        return tuple(sorted(related)), tuple(sorted(columns))
@@ -1,48 +1,66 @@
-from datetime import timedelta
-from django.db.models import Q
+import json
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
+from django.views.decorators.http import require_GET
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed, ParseError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
-from rest_framework_simplejwt.exceptions import TokenError 
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from .models import User, Task
-from .serializers import UserRegistrationSerializer, UserSerializer, LoginSerializer, TaskSerializer
-from .utils import CreateResponse
+from .serializers import (
+    CookieTokenRefreshSerializer, UserRegistrationSerializer, UserSerializer, LoginSerializer, TaskSerializer
+)
+from .utils import CreateResponse, QueryPlanner
 from .permissions import IsTaskCreator
+from .pagination import TaskPaginator, task_count_cache_key
+from .search import TaskSearchFilter, get_search_backend, order_by_rank
+from .sync import sync_tasks
+from .stats import task_status_counts
+from .batch import run_batch
+from .export import EXPORT_FORMATS, iter_rows, stream_export
+from .importing import CONFLICT_MODES, IMPORT_FORMATS, read_records, stream_import
+from .bulk import (
+    create_tasks, delete_tasks, locate_tasks, update_task_status, update_task_title, update_tasks
+)
+from .routers import route_to_shard
+from .sharding import find_task_shard, is_sharded, scatter, shard_for_user
+from .authentication import ClaimsJWTAuthentication, ClaimsRefreshToken
+from .events import TaskEventStream, hub as task_event_hub
+from .pooling import connection_stats
+from .retention import pruner
+from .caching import (
+    ALL_TASKS_SCOPE, cache_stats, cache_task_response, get_task_version, task_payload_cache,
+    user_payload_cache
+)
+from .conditional import (
+    conditional_list_response, make_etag, precondition_response, set_validators, task_validators
+)
 from rest_framework_simplejwt.views import TokenRefreshView
 
 class CookieTokenRefreshView(TokenRefreshView):
+    """
+    Refreshes the access token from the refresh_token cookie (or a `refresh`
+    field). The token is decoded and checked once; the response carries the
+    user's profile (see CookieTokenRefreshSerializer).
+    """
+    serializer_class = CookieTokenRefreshSerializer
+
     def post(self, request, *args, **kwargs):
-        refresh_token = request.COOKIES.get('refresh_token')
-        if refresh_token:
-            request.data['refresh'] = refresh_token
-            
-        response = super().post(request, *args, **kwargs)
-        
-        # If refresh was successful, add user data
-        if response.status_code == 200 and 'access' in response.data:
-            try:
-                # Get user from refresh token
-                refresh = RefreshToken(refresh_token)
-                user_id = refresh.payload.get('user_id')
-                user = User.objects.get(id=user_id)
-                
-                # Add user data to response
-                response.data['user'] = {
-                    'id': user.id,
-                    'username': user.username,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                }
-            except (User.DoesNotExist, TokenError):
-                pass
-                
-        return response
+        refresh_token = request.COOKIES.get('refresh_token') or request.data.get('refresh')
+        serializer = self.get_serializer(data={'refresh': refresh_token})
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -54,10 +72,18 @@ class UserViewSet(viewsets.ModelViewSet):
         """Helper method to format user responses consistently"""
         return Response(self.get_serializer(user).data)
 
+    def _get_me_response(self, request, data):
+        """The cached profile payload, or a 304 when the client's copy is current"""
+        etag = make_etag('user', json.dumps(data, sort_keys=True, default=str))
+        return precondition_response(request, etag=etag) or set_validators(Response(data), etag)
+
     @action(detail=False, methods=['get', 'put'], permission_classes=[IsAuthenticated])
     def me(self, request):
         if request.method == 'GET':
-            return self._get_user_response(request.user)
+            data = user_payload_cache.get_or_set(
+                request.user.id, lambda: dict(self.get_serializer(request.user).data)
+            )
+            return self._get_me_response(request, data)
         
         serializer = self.get_serializer(
             request.user, 
@@ -100,7 +126,7 @@ class UserRegistrationViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         user = User.objects.get(username=serializer.data['username'])
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         headers = self.get_success_headers(serializer.data)
         return Response({
             'user': serializer.data,
@@ -115,7 +141,7 @@ class LoginViewSet(viewsets.ViewSet):
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
         
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         response = Response(
             CreateResponse.create_user_response(user, token_data=refresh),
             status=status.HTTP_200_OK
@@ -140,7 +166,7 @@ class LogoutViewSet(viewsets.ViewSet):
         refresh_token = request.COOKIES.get('refresh_token')
         if refresh_token:
             try:
-                token = RefreshToken(refresh_token)
+                token = ClaimsRefreshToken(refresh_token)
                 token.blacklist()
             except TokenError as e:
                 print(f"Token blacklist error: {str(e)}")
@@ -167,37 +193,57 @@ class LogoutViewSet(viewsets.ViewSet):
         
         return response
 
-class TaskPaginator(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-    
-    def get_paginated_response(self, data):
-        return Response({
-            'pagination': {
-                'next': self.get_next_link(),
-                'previous': self.get_previous_link(),
-                'current_page': self.page.number,
-                'total_pages': self.page.paginator.num_pages,
-                'page_size': self.page_size,
-                'total_items': self.page.paginator.count
-            },
-            'results': data
-        })
-        
 class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter, DjangoFilterBackend]
+    filter_backends = [filters.OrderingFilter, TaskSearchFilter, DjangoFilterBackend]
     ordering_fields = ['created_at', 'updated_at', 'status', 'title']
     search_fields = ['title', 'description']
     ordering = ['-created_at']  # Default ordering
     filterset_fields = ['status']
     pagination_class = TaskPaginator
+    # Actions that only render tasks; their querysets are trimmed to the serialized columns
+    read_actions = ('list', 'retrieve', 'my_tasks', 'search', 'sync', 'export')
+    # Query params that change which page is shown but not which rows are counted
+    page_query_params = ('page', 'page_size', 'ordering', 'cursor')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.route_to_user_shard()
+
+    def route_to_user_shard(self):
+        """Task queries default to the requesting user's shard (see to_do_list.sharding)."""
+        if is_sharded() and self.request.user.is_authenticated:
+            route_to_shard(shard_for_user(self.request.user.id))
+
+    def route_to_task_shard(self, pk):
+        """Detail actions may target another user's task, which can live on another shard."""
+        try:
+            shard = find_task_shard(pk, preferred=shard_for_user(self.request.user.id))
+        except (TypeError, ValueError, ValidationError):
+            return
+        if shard is not None:
+            route_to_shard(shard)
+
+    def get_object(self):
+        if is_sharded():
+            self.route_to_task_shard(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        return super().get_object()
 
     def get_base_queryset(self):
         """Base queryset without any user filtering"""
-        return Task.objects.all()
+        return self._plan_queryset(Task.objects.all())
+
+    def _plan_queryset(self, queryset):
+        """
+        Join the relations the serializer reads (so rendering a page never
+        queries per row) and, for read-only actions, load only the serialized columns.
+        """
+        related, columns = QueryPlanner.for_serializer(self.get_serializer_class())
+        queryset = queryset.select_related(*related)
+        if columns is not None and self.action in self.read_actions:
+            queryset = queryset.only(*columns)
+        return queryset
 
     def get_queryset(self):
         """
@@ -210,17 +256,64 @@ class TaskViewSet(viewsets.ModelViewSet):
         user_id = self.request.query_params.get('user_id')
         if user_id:
             queryset = queryset.filter(user__id=user_id)
+            if is_sharded() and user_id.isdigit():
+                queryset = queryset.using(shard_for_user(int(user_id)))
             
         return queryset
 
+    def get_count_cache_key(self):
+        """
+        Unfiltered my_tasks counts the same rows on every page, so its total
+        is cached per user (invalidated when the user's tasks are created or deleted).
+        """
+        if self.action != 'my_tasks':
+            return None
+        if set(self.request.query_params) - set(self.page_query_params):
+            return None
+        return task_count_cache_key(self.request.user.id)
+
+    def get_response_cache_scope(self):
+        """
+        Version scope whose task writes can change this action's response:
+        the user's own tasks for my_tasks and ?user_id=, every task otherwise.
+        """
+        if self.action == 'my_tasks':
+            return self.request.user.id
+        user_id = self.request.query_params.get('user_id', '')
+        if self.action == 'list' and user_id.isdigit():
+            return int(user_id)
+        return ALL_TASKS_SCOPE
+
+    def get_list_queryset(self):
+        """Filtered (not yet paginated) rows of the list, my_tasks and export actions."""
+        if self.action == 'my_tasks':
+            return self._get_filtered_queryset(self.get_base_queryset().filter(user=self.request.user))
+        queryset = self._get_filtered_queryset(self.get_queryset())
+        if not self.request.query_params.get('user_id'):
+            # Every user's tasks: gathered from all shards
+            queryset = scatter(queryset)
+        return queryset
+
+    def get_list_etag(self):
+        """
+        ETag for a list/my_tasks page, from the full URL and the version of the
+        response cache scope, which every task create, update and delete in the
+        scope and every rename of their owners moves (see to_do_list.caching).
+        Revalidating costs no query, whatever the count strategy. Cursor pages
+        skip conditional handling.
+        """
+        if self.paginator.cursor_query_param in self.request.query_params:
+            return None
+        return make_etag(self.request.build_absolute_uri(), get_task_version(self.get_response_cache_scope()))
+
     def get_permissions(self):
         """
         Custom permission handling:
         - For create/list: only require IsAuthenticated
         - For update/delete: require IsTaskCreator
+        (the single-task mutation actions check ownership in SQL)
         """
-        if self.action in ['update', 'partial_update', 'destroy', 
-                         'complete', 'update_title', 'update_description']:
+        if self.action in ['update', 'partial_update', 'destroy']:
             self.permission_classes = [IsAuthenticated, IsTaskCreator]
         return super().get_permissions()
 
@@ -242,6 +335,9 @@ class TaskViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
         
+        return self._get_unpaginated_response(queryset.count())
+
+    def _get_unpaginated_response(self, total_items):
         return Response({
             'pagination': {
                 'next': None,
@@ -249,25 +345,114 @@ class TaskViewSet(viewsets.ModelViewSet):
                 'current_page': 1,
                 'total_pages': 1,
                 'page_size': self.pagination_class.page_size,
-                'total_items': queryset.count()
+                'total_items': total_items,
+                'is_estimate': False
             },
             'results': []
         })
 
     @action(detail=False, methods=['get'])
+    @cache_task_response
+    @conditional_list_response
     def my_tasks(self, request):
         """
         Get all tasks for the currently authenticated user.
         Supports all the same filtering/ordering as the main list view.
         """
-        queryset = self.get_base_queryset().filter(user=request.user)
-        filtered_queryset = self._get_filtered_queryset(queryset)
-        return self._get_paginated_response(filtered_queryset)
+        return self._get_paginated_response(self.get_list_queryset())
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        The current user's task count per status and in total, read from the
+        maintained counters (see to_do_list.stats) rather than counted.
+        """
+        counts = task_status_counts(request.user.id)
+        return Response({'total': sum(counts.values()), 'by_status': counts})
+
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        """
+        Changes to the current user's tasks since `?since=`, a watermark from a
+        previous sync (omit it for a full download): tasks created or updated
+        since then, the ids of tasks deleted since then, and the watermark to
+        send next. While `has_more` is true, syncing again returns more changes.
+        Batch size follows `?page_size=`.
+        """
+        tasks, deleted, watermark, has_more = sync_tasks(
+            self.get_base_queryset().filter(user=request.user),
+            request.user,
+            request.query_params.get('since'),
+            self.paginator.get_page_size(request)
+        )
+        return Response({
+            'results': self.get_serializer(tasks, many=True).data,
+            'deleted': deleted,
+            'watermark': watermark,
+            'has_more': has_more
+        })
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every task the list view would show for the same filters and
+        ordering (`?user_id=`, `?status=`, `?search=`, `?ordering=`), unpaginated,
+        as newline-delimited JSON or, with `?as=csv`, CSV.
+        """
+        export_format = request.query_params.get('as', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Unsupported export format; use one of {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer()
+        content_type, extension, _, _ = EXPORT_FORMATS[export_format]
+        rows = iter_rows(self.get_list_queryset(), serializer)
+        return StreamingHttpResponse(
+            stream_export(rows, list(serializer.fields), export_format),
+            content_type=content_type,
+            headers={'Content-Disposition': f'attachment; filename="tasks.{extension}"'}
+        )
+
+    @action(detail=False, methods=['post'], url_path='import', url_name='import')
+    def import_tasks(self, request):
+        """
+        Create tasks for the current user from an uploaded body of NDJSON or,
+        with `?as=csv`, CSV rows (an export's rows import as they are). Rows
+        whose title is taken are skipped, renamed or update the existing task,
+        per `?on_conflict=skip|rename|upsert`. Responds with an NDJSON line of
+        progress, row errors and conflicts per batch, then one with the totals.
+        """
+        import_format = request.query_params.get('as', 'ndjson')
+        on_conflict = request.query_params.get('on_conflict', 'skip')
+        if import_format not in IMPORT_FORMATS:
+            return Response(
+                {"detail": f"Unsupported import format; use one of {', '.join(IMPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if on_conflict not in CONFLICT_MODES:
+            return Response(
+                {"detail": f"Unsupported on_conflict; use one of {', '.join(CONFLICT_MODES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if request.stream is None:
+            return Response({"detail": "Nothing to import"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Rows are written while the response streams, after the request's routing has ended
+        shard = shard_for_user(request.user.id) if is_sharded() else None
+        return StreamingHttpResponse(
+            stream_import(request.user, read_records(request.stream, import_format), on_conflict, shard),
+            content_type='application/x-ndjson'
+        )
 
     @action(detail=False, methods=['get'])
+    @cache_task_response
     def search(self, request):
         """
-        Search tasks by title containing the search term.
+        Search tasks matching the search term, most relevant first.
+        Uses the TASK_SEARCH_BACKEND: full-text prefix search over title and
+        description, or the title icontains fallback.
         Supports all the same filtering/ordering as the main list view.
         """
         search_term = request.query_params.get('q')
@@ -276,74 +461,91 @@ class TaskViewSet(viewsets.ModelViewSet):
                 {"detail": "Search term 'q' is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
+        return self._get_paginated_response(self.get_search_queryset(search_term))
+
+    def get_search_queryset(self, search_term):
+        """Tasks matching the search term, filtered and most relevant first"""
         # Start with base search queryset
-        queryset = self.get_base_queryset().filter(
-            Q(title__icontains=search_term)
-        )
+        queryset = self.get_base_queryset()
+        queryset = get_search_backend(queryset).search(queryset, search_term, fields=('title',))
         
         # Apply all filters and ordering
-        filtered_queryset = self._get_filtered_queryset(queryset)
-        return self._get_paginated_response(filtered_queryset)
+        return scatter(order_by_rank(self._get_filtered_queryset(queryset), self.request, self))
 
+    @cache_task_response
+    @conditional_list_response
     def list(self, request, *args, **kwargs):
         """
         List all tasks (or filtered by user_id if provided).
         Supports filtering by status and ordering by any field.
         """
-        queryset = self._get_filtered_queryset()
-        return self._get_paginated_response(queryset)
+        return self._get_paginated_response(self.get_list_queryset())
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Task payloads are cached per task and evicted whenever the task is saved
+        or deleted, or its owner renamed; only payloads read from the primary
+        are cached. Responses carry an ETag and Last-Modified derived from the
+        task's id, updated_at and owner, and matching conditional requests get
+        a 304 without the task being serialized.
+        """
+        data = task_payload_cache.get(kwargs['pk'])
+        if data is not None:
+            return self._get_task_response(request, data)
+
+        task = self.get_object()
+        validators = task_validators(task.id, task.updated_at, task.user.username)
+        not_modified = precondition_response(request, *validators)
+        if not_modified:
+            return not_modified
+        data = dict(self.get_serializer(task).data)
+        # Rows from a replica may lag behind a write (see to_do_list.routers)
+        if task._state.db not in settings.DATABASE_REPLICAS:
+            task_payload_cache.set(task.id, data)
+        return set_validators(Response(data), *validators)
+
+    def _get_task_response(self, request, data):
+        """A cached task payload, or a 304 when the client's copy is current"""
+        validators = task_validators(data['id'], data['updated_at'], data['user'])
+        return precondition_response(request, *validators) or set_validators(Response(data), *validators)
+
+    # Single-task mutations: one guarded UPDATE each (see to_do_list.bulk),
+    # with ownership and the task rules in its WHERE clause. Only when it
+    # updates nothing is the task looked up, to say why.
 
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
-        task = self.get_object()
-        task.status = 'COMPLETED'
-        task.save()
-        serializer = self.get_serializer(task)
-        return Response(serializer.data)
+        return self._update_task(request, pk, lambda ids: update_tasks(request.user, ids, {'status': 'COMPLETED'}))
 
     @action(detail=True, methods=['patch'])
     def update_title(self, request, pk=None):
-        task = self.get_object()
-        print(f"Checking title edit for task created at {task.created_at}")  # Debug logging
-        print(f"Current time: {timezone.now()}")  # Debug logging
-        print(f"Can edit title: {task.can_edit_title()}")  # Debug logging
-        
-        if not task.can_edit_title():
-            return Response(
-                {"detail": "Title can only be updated within 5 minutes of creation"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-            
         title = request.data.get('title')
         if not title:
             return Response(
                 {"detail": "Title is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
-        if Task.objects.filter(user=task.user, title=title).exclude(pk=task.pk).exists():
+
+        try:
+            return self._update_task(
+                request, pk, lambda ids: update_task_title(request.user, ids, title),
+                "Title can only be updated within 5 minutes of creation", status.HTTP_403_FORBIDDEN
+            )
+        except IntegrityError:
             return Response(
                 {"detail": "You already have a task with this title"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
-        task.title = title
-        task.save()
-        return Response(self.get_serializer(task).data)
     
-    @action(detail=True, methods=['patch'], permission_classes=[IsAuthenticated, IsTaskCreator])
+    @action(detail=True, methods=['patch'])
     def update_description(self, request, pk=None):
-        task = self.get_object()
         description = request.data.get('description', '')
-        
-        task.description = description
-        task.save()
-        return Response(self.get_serializer(task).data)
+        return self._update_task(
+            request, pk, lambda ids: update_tasks(request.user, ids, {'description': description})
+        )
     
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
-        task = self.get_object()
         new_status = request.data.get('status')
         
         if not new_status:
@@ -357,16 +559,29 @@ class TaskViewSet(viewsets.ModelViewSet):
                 {"detail": "Invalid status"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        if not task.can_change_to_new() and new_status == 'NEW':
-            return Response(
-                {"detail": "Cannot set status back to NEW once task has progressed"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-            
-        task.status = new_status
-        task.save()
-        return Response(self.get_serializer(task).data)
+
+        return self._update_task(
+            request, pk, lambda ids: update_task_status(request.user, ids, new_status),
+            "Cannot set status back to NEW once task has progressed"
+        )
+
+    def _update_task(self, request, pk, update, rejected_detail=None, rejected_status=status.HTTP_400_BAD_REQUEST):
+        """
+        Run `update` (a set-based write taking task ids) on the task `pk` and
+        respond with the updated task, or with why it was not updated.
+        """
+        try:
+            pk = int(pk)
+        except ValueError:
+            raise Http404
+        if is_sharded():
+            self.route_to_task_shard(pk)
+
+        tasks = update([pk])
+        if tasks:
+            return Response(self.get_serializer(tasks[0]).data)
+        failure = self._get_failed_results(request, [pk], rejected_detail, rejected_status)[pk]
+        return Response({"detail": failure['detail']}, status=failure['status'])
     
     @action(detail=True, methods=['get'])
     def can_edit_title(self, request, pk=None):
@@ -375,7 +590,7 @@ class TaskViewSet(viewsets.ModelViewSet):
             'can_edit': task.can_edit_title(),
             'created_at': task.created_at,
             'current_time': timezone.now(),
-            'cutoff_time': task.created_at + timedelta(minutes=5)
+            'cutoff_time': task.created_at + Task.TITLE_EDIT_WINDOW
         })
 
     def destroy(self, request, *args, **kwargs):
@@ -384,4 +599,176 @@ class TaskViewSet(viewsets.ModelViewSet):
         return Response(
             {"detail": "Task deleted successfully"},
             status=status.HTTP_204_NO_CONTENT
-        )
\ No newline at end of file
+        )
+
+    # Bulk actions: one statement for all of the request's tasks, touching
+    # only the requesting user's; per-task results come back in request order
+    # (see to_do_list.bulk)
+
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """Create `tasks`, a list of task payloads; invalid ones are reported and skipped."""
+        items = self._get_bulk_list(request, 'tasks')
+        titles = [item.get('title') for item in items if isinstance(item, dict)]
+        taken = set(
+            Task.objects.filter(user=request.user, title__in=[title for title in titles if isinstance(title, str)])
+            .values_list('title', flat=True)
+        )
+
+        results, tasks = [], []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if not serializer.is_valid():
+                results.append({'index': index, 'status': status.HTTP_400_BAD_REQUEST, 'errors': serializer.errors})
+            elif serializer.validated_data['title'] in taken:
+                results.append({
+                    'index': index,
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': {'title': ['You already have a task with this title']}
+                })
+            else:
+                taken.add(serializer.validated_data['title'])
+                tasks.append(Task(**serializer.validated_data))
+                results.append({'index': index, 'status': status.HTTP_201_CREATED})
+
+        try:
+            create_tasks(request.user, tasks)
+        except IntegrityError:
+            return Response(
+                {"detail": "A title in the batch was taken by a concurrent request; retry"},
+                status=status.HTTP_409_CONFLICT
+            )
+        created = iter(tasks)
+        for result in results:
+            if result['status'] == status.HTTP_201_CREATED:
+                result['task'] = self.get_serializer(next(created)).data
+        return self._get_bulk_response(results, status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def bulk_update_status(self, request):
+        """Set the `status` of the tasks in `ids`."""
+        ids = self._get_bulk_ids(request)
+        new_status = request.data.get('status')
+        if new_status not in dict(Task.STATUS_CHOICES):
+            raise ParseError('Invalid status' if new_status else 'Status is required')
+
+        updated = {task.id: task for task in update_task_status(request.user, ids, new_status)}
+        failed = self._get_failed_results(
+            request, [pk for pk in ids if pk not in updated],
+            'Cannot set status back to NEW once task has progressed'
+        )
+        results = [
+            failed[pk] if pk in failed
+            else {'id': pk, 'status': status.HTTP_200_OK, 'task': self.get_serializer(updated[pk]).data}
+            for pk in ids
+        ]
+        return self._get_bulk_response(results)
+
+    @action(detail=False, methods=['post'])
+    def bulk_delete(self, request):
+        """Delete the tasks in `ids`."""
+        ids = self._get_bulk_ids(request)
+        deleted = set(delete_tasks(request.user, ids))
+        failed = self._get_failed_results(request, [pk for pk in ids if pk not in deleted])
+        results = [failed.get(pk, {'id': pk, 'status': status.HTTP_204_NO_CONTENT}) for pk in ids]
+        return self._get_bulk_response(results)
+
+    def _get_bulk_list(self, request, field):
+        items = request.data.get(field) if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            raise ParseError(f"'{field}' must be a non-empty list")
+        if len(items) > settings.TASK_BULK_MAX_ITEMS:
+            raise ParseError(f"At most {settings.TASK_BULK_MAX_ITEMS} items per request")
+        return items
+
+    def _get_bulk_ids(self, request):
+        """The request's task ids, without duplicates, in request order."""
+        ids = self._get_bulk_list(request, 'ids')
+        if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+            raise ParseError("'ids' must be task ids")
+        return list(dict.fromkeys(ids))
+
+    def _get_failed_results(self, request, ids, rejected_detail=None, rejected_status=status.HTTP_400_BAD_REQUEST):
+        """
+        Results for the ids a set-based write skipped: missing tasks, other
+        users' tasks, and the user's own tasks the write's rule rejected.
+        Costs a query only when something was skipped.
+        """
+        if not ids:
+            return {}
+        found = locate_tasks(ids)
+        failures = {}
+        for pk in ids:
+            if pk not in found:
+                failures[pk] = {'id': pk, 'status': status.HTTP_404_NOT_FOUND, 'detail': 'Not found.'}
+            elif found[pk][0] != request.user.id:
+                failures[pk] = {
+                    'id': pk,
+                    'status': status.HTTP_403_FORBIDDEN,
+                    'detail': 'You do not have permission to perform this action.'
+                }
+            else:
+                failures[pk] = {'id': pk, 'status': rejected_status, 'detail': rejected_detail}
+        return failures
+
+    def _get_bulk_response(self, results, success_status=status.HTTP_200_OK):
+        """`success_status` when every item succeeded, otherwise 207 Multi-Status."""
+        failed = sum(result['status'] >= 400 for result in results)
+        return Response(
+            {'results': results, 'succeeded': len(results) - failed, 'failed': failed},
+            status=status.HTTP_207_MULTI_STATUS if failed else success_status
+        )
+
+@require_GET
+async def task_events(request):
+    """
+    Server-sent event stream of task creates, updates and deletes: the
+    current user's tasks, or every task with `?scope=all`. Reconnecting
+    clients resume from the Last-Event-ID header.
+
+    Open streams wait on the event loop, so serve this through
+    backend.asgi:application rather than the sync WSGI workers.
+    """
+    try:
+        authenticated = await ClaimsJWTAuthentication().aauthenticate(request)
+    except AuthenticationFailed as exc:
+        return JsonResponse({'detail': exc.detail}, status=status.HTTP_401_UNAUTHORIZED)
+    if authenticated is None:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    user, _ = authenticated
+    subscription = task_event_hub.subscribe(None if request.GET.get('scope') == 'all' else user.id)
+    stream = TaskEventStream(task_event_hub, subscription, request.headers.get('Last-Event-ID'))
+    return StreamingHttpResponse(
+        stream,
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch(request):
+    """
+    Run up to BATCH_MAX_REQUESTS API requests in one: `requests` is a list of
+    `{"method", "path", "body", "headers", "id"}` (path including any query
+    string), run in order as the current user. With `"atomic": true` they
+    share one transaction, rolled back if any of them fails. Returns each
+    one's status, body and validator headers, in order (see to_do_list.batch).
+    """
+    items = request.data.get('requests') if isinstance(request.data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ParseError("'requests' must be a non-empty list")
+    if len(items) > settings.BATCH_MAX_REQUESTS:
+        raise ParseError(f"At most {settings.BATCH_MAX_REQUESTS} requests per batch")
+    return Response({'responses': run_batch(request, items, atomic=request.data.get('atomic') is True)})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """Database connection, two-tier cache and token pruning counters of the worker serving the request."""
+    return Response({'database': connection_stats(), 'caches': cache_stats(), 'token_retention': pruner.get_stats()})